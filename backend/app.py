@@ -1,13 +1,39 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, redirect, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 import os
 import json
+import ipaddress
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
 
-from auth import auth_bp, token_blocklist
+from auth import auth_bp, is_token_revoked, get_blocklist, use_journal, get_user as get_auth_user
+from ratings import RatingAggregates
+from store import Store
+from journal import Journal, JournaledStore, JOURNAL_DIR
+from sqlite_store import SqliteStore
+from db import get_pool
+from ids import IdAllocator
+from uploads import UploadQueue, UploadQueueFull, CloudinaryUploader, FakeUploader
+from response_cache import ResponseCache, cached_json_response
+from catalog_index import CatalogIndex, SORTS, encode_cursor, decode_cursor, district_of
+from search_index import SearchIndex
+from geo_index import GeoIndex
+from trending import Trending, WINDOWS as TRENDING_WINDOWS
+from leaderboards import Leaderboards, METRICS as LEADERBOARD_METRICS
+from polls import PollStore, SqlitePollStore, PollResults, AlreadyVoted, week_window, status_of, iso
+from thumbnails import load_image_sets, CACHE_DIR as THUMBNAIL_CACHE_DIR
+from catalog_loader import CatalogError, CatalogWatcher, load_catalog, file_signature
+from events import (BROADCASTER, StreamServer, is_loopback, listen as stream_listen,
+                    STREAM_HOST, STREAM_PORT, STREAM_PUBLIC_URL)
+import metrics
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
+# Request timing and GET /metrics; registered first so its timer wraps every other hook
+metrics.init_app(app)
 
 # Basic config for JWT
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "dev-secret-change-me")
@@ -18,7 +44,7 @@ jwt = JWTManager(app)
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
     jti = jwt_payload.get("jti")
-    return jti in token_blocklist
+    return is_token_revoked(jti)
 
 # Register auth blueprint
 app.register_blueprint(auth_bp, url_prefix="/auth")
@@ -42,9 +68,33 @@ except Exception:
     cloudinary = None
     _cloudinary_enabled = False
 
+# Background upload workers (see uploads.py). UPLOAD_BACKEND=fake uses a local fake instead of Cloudinary.
+if os.environ.get("UPLOAD_BACKEND") == "fake":
+    _uploader = FakeUploader(
+        directory=os.environ.get("FAKE_UPLOAD_DIR"),
+        delay=float(os.environ.get("FAKE_UPLOAD_DELAY", "0")),
+    )
+elif _cloudinary_enabled:
+    _uploader = CloudinaryUploader(cloudinary)
+else:
+    _uploader = None
+upload_queue = UploadQueue(
+    _uploader,
+    workers=int(os.environ.get("UPLOAD_WORKERS", "4")),
+    max_pending=int(os.environ.get("UPLOAD_MAX_PENDING", "256")),
+) if _uploader else None
+
+def _upload_queue_full():
+    resp = jsonify({"error": "Upload queue is full, please retry shortly"})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = "5"
+    return resp
+
 import random
 
-def build_kerala_mandi_dataset(n: int = 100):
+def build_kerala_mandi_dataset(n: int = 100, seed: int = 2024):
+    # Seeded so every worker process generates the same catalog
+    rng = random.Random(seed)
     districts = {
         "Thiruvananthapuram": ["Kazhakkoottam", "Thampanoor", "Pattom", "Attingal", "Neyyattinkara"],
         "Kollam": ["Chinnakada", "Kottarakkara", "Paravur", "Karunagappally"],
@@ -81,17 +131,17 @@ def build_kerala_mandi_dataset(n: int = 100):
     while len(out) < n:
         for dist, areas in districts.items():
             for area in areas:
-                name_root = random.choice(["Majlis", "Barkas", "Hadramout", "Zam Zam", "Al Taza", "Arab Spice", "Al Razi", "Khaleef", "Go Grill", "Ajwa"]) 
+                name_root = rng.choice(["Majlis", "Barkas", "Hadramout", "Zam Zam", "Al Taza", "Arab Spice", "Al Razi", "Khaleef", "Go Grill", "Ajwa"]) 
                 name = f"{name_root} Mandi"
                 entry = {
                     "id": rid,
                     "name": name,
                     "location": f"{area}, {dist}",
-                    "type": random.choice(types),
-                    "rating": round(random.uniform(3.8, 4.6), 1),
-                    "image": random.choice(images),
+                    "type": rng.choice(types),
+                    "rating": round(rng.uniform(3.8, 4.6), 1),
+                    "image": rng.choice(images),
                     "description": "Popular mandhi spot with aromatic rice and tender meat.",
-                    "specialties": random.choice(specs),
+                    "specialties": rng.choice(specs),
                     "phone": "N/A",
                     "address": f"{area}, {dist}, Kerala"
                 }
@@ -103,68 +153,319 @@ def build_kerala_mandi_dataset(n: int = 100):
                 break
     return out
 
-def _valid_restaurants_payload(data):
-    if not isinstance(data, list) or len(data) == 0:
-        return False
-    # require minimal fields on first few
-    for item in data[:5]:
-        if not isinstance(item, dict):
-            return False
-        if not item.get('name') or not item.get('location'):
-            return False
-    return True
-
-# Build dataset: prefer curated JSON if available
-DATA_PATH = os.path.join(os.path.dirname(__file__), 'data', 'restaurants.json')
+# Catalog: prefer the curated JSON file (RESTAURANTS_PATH overrides the default location).
+# catalog_loader streams and validates every record; an invalid file falls back to the generator.
+DATA_PATH = os.environ.get('RESTAURANTS_PATH') or os.path.join(os.path.dirname(__file__), 'data', 'restaurants.json')
+CATALOG_POLL_INTERVAL = float(os.environ.get('CATALOG_POLL_INTERVAL', '5'))
+ADMIN_EMAILS = {e.strip().lower() for e in os.environ.get('ADMIN_EMAILS', '').split(',') if e.strip()}
+DEFAULT_THUMBNAIL = "https://images.unsplash.com/photo-1550547660-d9450f859349?w=640&auto=format&fit=crop&q=60"
+
+# If local mandhi photos exist in frontend/public/images/mandhi, use them sequentially.
+# thumbnails.py resizes them into content-hashed variants (cached on disk, rebuilt only when a source changes).
+local_image_sets = []
+try:
+    local_image_sets = load_image_sets()
+except Exception as e:
+    print('Could not build local mandhi thumbnails:', e)
+
+def _prepare_catalog(records) -> list:
+    """Copies of records with a photo thumbnail each (the local image sets, when there are any)."""
+    out = []
+    total = len(local_image_sets)
+    for i, record in enumerate(records):
+        r = dict(record)
+        if total:
+            image_set = local_image_sets[i % total]
+            r['image'] = image_set['src']
+            r['image_sources'] = image_set['sources']
+        elif not isinstance(r.get("image"), str) or not r["image"].strip():
+            r["image"] = DEFAULT_THUMBNAIL
+        out.append(r)
+    return out
+
+catalog_digest = None  # sha256 of the loaded catalog file; None for the generated dataset
+catalog_signature = file_signature(DATA_PATH)
 restaurants = None
-if os.path.exists(DATA_PATH):
+if catalog_signature:
     try:
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            payload = json.load(f)
-        if _valid_restaurants_payload(payload):
-            restaurants = payload
-        else:
-            print('Curated restaurants.json is empty or invalid; falling back to generated dataset')
-    except Exception as e:
-        print('Failed to load curated restaurants.json, falling back to generator:', e)
+        restaurants, catalog_digest = load_catalog(DATA_PATH)
+    except CatalogError as e:
+        print('Curated restaurants.json is invalid, falling back to generator:', '; '.join(e.errors))
 
 if not restaurants:
-    restaurants = build_kerala_mandi_dataset(100)
+    # RESTAURANT_COUNT scales the generated catalog (e.g. for benchmarks/bench_suite.py)
+    restaurants = build_kerala_mandi_dataset(int(os.environ.get('RESTAURANT_COUNT', '100')))
+restaurants = _prepare_catalog(restaurants)
 
-# Ensure every spot has a photo thumbnail
-DEFAULT_THUMBNAIL = "https://images.unsplash.com/photo-1550547660-d9450f859349?w=640&auto=format&fit=crop&q=60"
-for r in restaurants:
-    if not r.get("image") or not isinstance(r.get("image"), str) or not r.get("image").strip():
-        r["image"] = DEFAULT_THUMBNAIL
-
-# If local mandhi photos exist in frontend/public/images/mandhi, use them sequentially
-LOCAL_MANDHI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend', 'public', 'images', 'mandhi'))
-local_thumbs = []
-if os.path.isdir(LOCAL_MANDHI_DIR):
-    try:
-        names = sorted(os.listdir(LOCAL_MANDHI_DIR))
-        for nm in names:
-            low = nm.lower()
-            if low.endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                # Public path for CRA
-                local_thumbs.append(f"/images/mandhi/{nm}")
-    except Exception as e:
-        print('Could not list local mandhi images:', e)
-
-if local_thumbs:
-    total = len(local_thumbs)
-    for i, r in enumerate(restaurants):
-        r['image'] = local_thumbs[i % total]
-
-# In-memory reviews store (demo). Replace with DB when ready.
+# Indexed in-memory store by default; set DATABASE_PATH to persist in SQLite (see db.py).
 # Each review: { id, restaurant_id, user_email, user_name, rating (1-5), comment, created_at }
-reviews = []
-_next_review_id = 1
+# Each photo: { id, review_id, restaurant_id, user_email, url, status (pending|ready|failed), created_at }
+# Each user: { id (10-digit string), name, avatar_url (optional), avatar_sources (optional), created_at }
+_db_pool = get_pool()
+# `python app.py` runs the debug reloader: this parent process only watches files and restarts
+# the child that serves, so only the child opens the journal (its directory lock allows one owner)
+_reloader_parent = __name__ == '__main__' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if _db_pool:
+    store = SqliteStore(_db_pool, restaurants)
+elif JOURNAL_DIR and not _reloader_parent:
+    # In-memory store persisted through journal.py: latest snapshot plus the journal tail
+    _journal = Journal(JOURNAL_DIR)
+    store = JournaledStore(_journal, restaurants)
+    use_journal(_journal)
+    print('Journal recovered:', _journal.recover())
+else:
+    store = Store(restaurants)
+restaurants = store.restaurants
+if _db_pool:
+    # Load the blocklist first: revocations after this point arrive via change_log
+    get_blocklist()
+    reviews, _last_change_seq = store.snapshot()
+else:
+    reviews, _last_change_seq = store.reviews, 0
+
+# Unique across threads and, with DATABASE_PATH, across worker processes (see ids.py)
+review_ids = IdAllocator('reviews', start=max((r["id"] for r in reviews), default=0) + 1, pool=_db_pool)
+photo_ids = IdAllocator('photos', start=max((p["id"] for p in store.photos), default=0) + 1, pool=_db_pool)
+
+# Running avg/count/histogram per restaurant, updated on every review write
+rating_aggregates = RatingAggregates()
+rating_aggregates.rebuild(reviews)
+
+def _with_aggregates(restaurant: dict) -> dict:
+    """Copy a restaurant dict and attach its avg_rating and review_count."""
+    avg, count = rating_aggregates.get(restaurant["id"])
+    item = dict(restaurant)
+    item["avg_rating"] = avg if avg is not None else restaurant.get("rating")
+    item["review_count"] = count
+    return item
+
+# Presorted/filter indexes for the paginated listing, kept current as ratings change
+catalog_index = CatalogIndex(rating_aggregates)
+catalog_index.rebuild(restaurants)
+
+# Inverted index for ranked full-text search, updated as reviews arrive
+search_index = SearchIndex()
+search_index.rebuild(restaurants, reviews)
+
+# Per district/type ranked boards for /api/leaderboards, kept current as ratings change
+leaderboards = Leaderboards(rating_aggregates)
+leaderboards.rebuild(restaurants)
+
+# Grid index over coordinates for /api/restaurants/nearby; only changes with the catalog
+geo_index = GeoIndex()
+geo_index.rebuild(restaurants)
+
+# Time-decayed recent activity for /api/trending, fed by review and photo writes
+def _trending_district(restaurant_id):
+    restaurant = store.get_restaurant(restaurant_id) if store.has_restaurant(restaurant_id) else None
+    return district_of(restaurant).lower() if restaurant else None
+
+trending = Trending(_trending_district)
+trending.rebuild(reviews, store.photos)
+
+# Pre-serialized listing responses, rebuilt only when store.version changes
+response_cache = ResponseCache()
+
+# Held while reviews are folded into the indexes and while a catalog reload swaps them
+_catalog_lock = threading.RLock()
+_reload_log = None  # reviews applied while a reload builds its indexes, replayed into them at the swap
+
+def _apply_review(review: dict):
+    """Fold a newly written review into the in-process indexes."""
+    _index_review(review)
+    _announce_review(review)
+
+def _index_review(review: dict):
+    """The catalog-dependent part of _apply_review: aggregates, catalog, leaderboards and search."""
+    with _catalog_lock:
+        rating_aggregates.add(review["restaurant_id"], review["rating"])
+        catalog_index.update(review["restaurant_id"])
+        leaderboards.update(review["restaurant_id"])
+        search_index.add_review(review["restaurant_id"], review.get("comment"))
+        if _reload_log is not None:
+            _reload_log.append(review)
 
-# In-memory photos store (demo). Replace with DB when ready.
-# Each photo: { id, review_id, restaurant_id, user_email, url, created_at }
-photos = []
-_next_photo_id = 1
+def _announce_review(review: dict):
+    """The rest of _apply_review: trending counts and live subscribers."""
+    trending.record_review(review)
+    _publish_review(review)
+
+def _apply_photo(photo: dict):
+    """Count a photo whose upload finished and push it to live subscribers."""
+    if photo and photo.get("status") == "ready":
+        trending.record_photo(photo)
+        _publish_photo(photo)
+
+# Live change feed (see events.py); publishing is a no-op while nobody is subscribed
+def _publish_review(review: dict):
+    if not BROADCASTER.subscribers:
+        return
+    restaurant = store.get_restaurant(review["restaurant_id"])
+    avg, count = rating_aggregates.get(review["restaurant_id"])
+    BROADCASTER.publish('review', {
+        "restaurant_id": review["restaurant_id"],
+        "review": {k: review.get(k) for k in ("id", "rating", "comment", "user_name", "created_at")},
+        "avg_rating": avg,
+        "review_count": count,
+    }, restaurant_id=review["restaurant_id"], district=district_of(restaurant) if restaurant else None)
+
+def _publish_photo(photo: dict):
+    if not BROADCASTER.subscribers or not photo or photo.get("status") != "ready":
+        return
+    restaurant = store.get_restaurant(photo["restaurant_id"])
+    BROADCASTER.publish('photo', {
+        "restaurant_id": photo["restaurant_id"],
+        "review_id": photo["review_id"],
+        "photo": {k: photo.get(k) for k in ("id", "url", "created_at")},
+    }, restaurant_id=photo["restaurant_id"], district=district_of(restaurant) if restaurant else None)
+
+# Shared-state mode: with DATABASE_PATH set, several worker processes share one database.
+# Every write is also appended to change_log; each worker tails it (at most every
+# SHARED_SYNC_INTERVAL seconds, and right after its own writes) and applies the new
+# entries to its indexes, so all workers converge on the same state.
+SHARED_SYNC_INTERVAL = float(os.environ.get('SHARED_SYNC_INTERVAL', '0.05'))
+_sync_lock = threading.Lock()
+_last_sync = 0.0
+
+def _sync_shared_state(force: bool = False):
+    global _last_change_seq, _last_sync
+    if not _db_pool:
+        return
+    if not force and time.monotonic() - _last_sync < SHARED_SYNC_INTERVAL:
+        return
+    # Another thread already syncing is as good as syncing ourselves, unless we just wrote
+    if not _sync_lock.acquire(blocking=force):
+        return
+    try:
+        while True:
+            changes = store.changes_since(_last_change_seq)
+            for seq, kind, ref_id in changes:
+                if kind == 'review':
+                    review = store.get_review(ref_id)
+                    if review:
+                        _apply_review(review)
+                elif kind == 'photo_ready':
+                    # Plain 'photo' entries (added pending, failed) only need the version bump below
+                    _apply_photo(store.get_photo(ref_id))
+                elif kind == 'revoke':
+                    get_blocklist().apply_change(ref_id)
+                _last_change_seq = seq
+            if changes:
+                store.version += 1
+            if len(changes) < 1000:
+                break
+        _last_sync = time.monotonic()
+    finally:
+        _sync_lock.release()
+
+@app.before_request
+def _before_request_sync():
+    _sync_shared_state()
+
+# Catalog hot reload: reload_catalog() re-reads DATA_PATH, builds the new catalog and its
+# indexes off to the side and swaps them in at once, so requests see the old catalog or the
+# new one, never a half-built one. It runs when the file changes (polled every
+# CATALOG_POLL_INTERVAL seconds, 0 disables; each worker polls on its own) or on
+# POST /api/admin/catalog/reload. Rating aggregates are keyed by restaurant id and carry over.
+_reload_lock = threading.Lock()
+last_catalog_reload = None
+
+def _reviews_for_reload() -> list:
+    """Reviews already in the live indexes; later ones are logged to _reload_log until the swap."""
+    global _reload_log
+    if _db_pool:
+        # _last_change_seq only moves under _sync_lock, so this is exactly what sync has applied
+        with _sync_lock, _catalog_lock:
+            _reload_log = []
+            return store.reviews_through(_last_change_seq)
+    with _catalog_lock:
+        _reload_log = []
+        return list(store.reviews)
+
+def _rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+def reload_catalog(force: bool = False) -> dict:
+    """Load DATA_PATH and swap it in if its hash changed (or force). Returns a report of what
+    happened and how long each phase took; raises CatalogError, keeping the old catalog, if the
+    file is invalid."""
+    global restaurants, catalog_index, search_index, leaderboards, geo_index, _reload_log
+    global catalog_digest, catalog_signature, last_catalog_reload
+    with _reload_lock:
+        t0 = time.perf_counter()
+        rss_before = _rss_mb()
+        signature = file_signature(DATA_PATH)
+        records, digest = load_catalog(DATA_PATH)
+        catalog_signature = signature
+        if digest == catalog_digest and not force:
+            return {"status": "unchanged", "restaurants": len(restaurants), "digest": digest}
+        fresh = _prepare_catalog(records)
+        t_load = time.perf_counter()
+
+        try:
+            ids = {r["id"] for r in fresh}
+            reviews_seen = _reviews_for_reload()
+            new_catalog_index = CatalogIndex(rating_aggregates)
+            new_catalog_index.rebuild(fresh)
+            new_search_index = SearchIndex()
+            new_search_index.rebuild(fresh, [rv for rv in reviews_seen if rv["restaurant_id"] in ids])
+            new_leaderboards = Leaderboards(rating_aggregates)
+            new_leaderboards.rebuild(fresh)
+            new_geo_index = GeoIndex()
+            new_geo_index.rebuild(fresh)
+            del reviews_seen
+            t_build = time.perf_counter()
+
+            with _catalog_lock:
+                for review in _reload_log:
+                    if review["restaurant_id"] in ids:
+                        new_catalog_index.update(review["restaurant_id"])
+                        new_leaderboards.update(review["restaurant_id"])
+                        new_search_index.add_review(review["restaurant_id"], review.get("comment"))
+                # Freed after the lock is released: dropping 100k-entry indexes takes a while
+                retired = (catalog_index, search_index, leaderboards, geo_index)
+                # Store first: ids handed out by the old indexes still resolve (see set_restaurants)
+                store.set_restaurants(fresh)
+                restaurants = store.restaurants
+                catalog_index, search_index, leaderboards = new_catalog_index, new_search_index, new_leaderboards
+                geo_index = new_geo_index
+                catalog_digest = digest
+                # Again, now that the indexes match: nothing cached under the old version survives
+                store.version += 1
+            t_swap = time.perf_counter()
+            del retired
+        finally:
+            with _catalog_lock:
+                _reload_log = None
+
+        last_catalog_reload = {
+            "status": "reloaded",
+            "restaurants": len(fresh),
+            "digest": digest,
+            "at": time.time(),
+            "seconds": {
+                "load": round(t_load - t0, 4),
+                "build": round(t_build - t_load, 4),
+                "swap": round(t_swap - t_build, 4),
+                "total": round(t_swap - t0, 4),
+            },
+            "rss_mb": {"before": rss_before, "after": _rss_mb()},
+        }
+        print(f"Catalog reloaded: {len(fresh)} restaurants in {t_swap - t0:.2f}s")
+        return last_catalog_reload
+
+def _reload_catalog_quietly():
+    try:
+        reload_catalog()
+    except CatalogError as e:
+        print('Catalog reload rejected, keeping the current catalog:', '; '.join(e.errors))
+
+if CATALOG_POLL_INTERVAL > 0:
+    CatalogWatcher(DATA_PATH, CATALOG_POLL_INTERVAL, _reload_catalog_quietly, catalog_signature).start()
 
 @app.route('/')
 def home():
@@ -172,89 +473,408 @@ def home():
 
 @app.route('/api/assets/mandhi-images')
 def list_mandhi_images():
-    """Return the list of available mandhi thumbnail image paths (public URLs).
+    """Return the available mandhi thumbnails as srcset-ready image sets:
+      [{ name, src, width?, height?, sources: [{ type, srcset }] }]
     Frontend can use this to assign thumbnails sequentially to avoid consecutive repeats.
     """
-    return jsonify(local_thumbs)
+    return jsonify(local_image_sets)
+
+@app.route('/assets/mandhi/<path:filename>')
+def mandhi_thumbnail(filename):
+    """Serve a generated thumbnail variant. Names are content hashes, so they can be cached forever."""
+    resp = send_from_directory(THUMBNAIL_CACHE_DIR, filename, max_age=31536000)
+    resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return resp
 
 @app.route('/api/restaurants')
 def get_restaurants():
-    """Get all restaurants with computed average rating and review count"""
-    def avg_for(rid: int):
-        vals = [r["rating"] for r in reviews if r["restaurant_id"] == rid]
-        if not vals:
-            return None, 0
-        return round(sum(vals) / len(vals), 1), len(vals)
-
-    enriched = []
-    for r in restaurants:
-        avg, count = avg_for(r["id"])
-        item = dict(r)
-        if avg is not None:
-            item["avg_rating"] = avg
-            item["review_count"] = count
-        else:
-            item["avg_rating"] = r.get("rating")
-            item["review_count"] = 0
-        enriched.append(item)
-    return jsonify(enriched)
+    """Get all restaurants with computed average rating and review count.
+    Served from a pre-encoded cache with a strong ETag; If-None-Match hits return 304.
+
+    Passing any of limit, cursor, sort (rating_desc|rating_asc|reviews_desc|reviews_asc|name_asc|name_desc),
+    district, type or specialty switches to a paginated response:
+      { items: [...], next_cursor: string|null, total: int }
+    district/type/specialty accept comma-separated values (any match); different filters combine with AND.
+    q narrows the results to text search matches (same matching as /api/restaurants/search) in the chosen sort.
+
+    ids=1,5,9 instead returns just those restaurants (see _restaurants_by_ids).
+    """
+    if 'ids' in request.args:
+        return _restaurants_by_ids_response(_split_param('ids'), _split_param('include'),
+                                            request.args.get('reviews_limit'), request.args.get('photos_limit'))
+    if any(k in request.args for k in ('limit', 'cursor', 'sort', 'district', 'type', 'specialty', 'q')):
+        return _restaurants_page()
+    payload = response_cache.get(
+        'restaurants', store.version,
+        lambda: app.json.dumps([_with_aggregates(r) for r in restaurants]).encode('utf-8'),
+    )
+    return cached_json_response(payload)
+
+BATCH_MAX_IDS = 100
+BATCH_INCLUDES = ('reviews', 'photos')
+
+@app.route('/api/restaurants/batch', methods=['POST'])
+def get_restaurants_batch():
+    """Bulk lookup. Body: { ids: [int], include?: ['reviews', 'photos'], reviews_limit?: int, photos_limit?: int }
+    Same response as GET /api/restaurants?ids=...&include=...
+    """
+    data = _json_object()
+    if data is None:
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    ids, include = data.get('ids'), data.get('include') or []
+    if not isinstance(ids, list) or not isinstance(include, list):
+        return jsonify({"error": "ids and include must be lists"}), 400
+    return _restaurants_by_ids_response(ids, include, data.get('reviews_limit'), data.get('photos_limit'))
+
+def _json_object():
+    """The JSON request body if it is an object ({} when there is none); None for any other JSON value."""
+    data = request.get_json(silent=True)
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+def _strict_int(value) -> int:
+    """An int from JSON or a query string; raises ValueError for booleans, floats and other types."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(value)
+    return int(value)
+
+def _restaurants_by_ids_response(raw_ids, include, reviews_limit, photos_limit):
+    """Validate a bulk lookup and answer it: { items: [...], missing: [ids] }, items in request order."""
+    try:
+        ids = list(dict.fromkeys(_strict_int(i) for i in raw_ids or []))
+        reviews_limit = max(1, min(_strict_int(reviews_limit or 3), 50))
+        photos_limit = max(1, min(_strict_int(photos_limit or 6), 100))
+    except ValueError:
+        return jsonify({"error": "ids, reviews_limit and photos_limit must be integers"}), 400
+    if len(ids) > BATCH_MAX_IDS:
+        return jsonify({"error": f"At most {BATCH_MAX_IDS} ids per request"}), 400
+    if not all(isinstance(name, str) for name in include or ()):
+        return jsonify({"error": f"include accepts: {', '.join(BATCH_INCLUDES)}"}), 400
+    include = set(include or ())
+    if not include <= set(BATCH_INCLUDES):
+        return jsonify({"error": f"include accepts: {', '.join(BATCH_INCLUDES)}"}), 400
+    return jsonify(_restaurants_by_ids(ids, include, reviews_limit, photos_limit))
+
+def _restaurants_by_ids(ids, include=(), reviews_limit=3, photos_limit=6):
+    """Resolve restaurant ids through the store's id index in O(k).
+    include='reviews' / 'photos' attaches the newest page of each ({ items, next_cursor }, as on /detail).
+    """
+    items, missing = [], []
+    for rid in ids:
+        restaurant = store.get_restaurant(rid)
+        if restaurant is None:
+            missing.append(rid)
+            continue
+        item = _with_aggregates(restaurant)
+        if 'reviews' in include:
+            item["reviews"] = _review_page(rid, None, reviews_limit)
+        if 'photos' in include:
+            item["photos"] = _photo_page(rid, None, photos_limit)
+        items.append(item)
+    return {"items": items, "missing": missing}
+
+def _split_param(name):
+    raw = request.args.get(name) or ''
+    return [v for v in (s.strip() for s in raw.split(',')) if v] or None
+
+def _restaurants_page():
+    sort = request.args.get('sort') or 'rating_desc'
+    if sort not in SORTS:
+        return jsonify({"error": f"sort must be one of: {', '.join(SORTS)}"}), 400
+    try:
+        limit = int(request.args.get('limit') or 20)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, 100))
+    cursor = request.args.get('cursor') or None
+    query = (request.args.get('q') or '').strip()
+
+    def build():
+        # Every search match, not just the best few, so the count and later pages cover them all
+        matches = {rid for rid, _ in search_index.search(query, limit=len(restaurants))} if query else None
+        ids, next_cursor, total = catalog_index.page(
+            sort=sort, limit=limit, cursor=cursor,
+            district=_split_param('district'), types=_split_param('type'), specialties=_split_param('specialty'),
+            ids=matches,
+        )
+        items = [_with_aggregates(store.get_restaurant(rid)) for rid in ids]
+        return app.json.dumps({"items": items, "next_cursor": next_cursor, "total": total}).encode('utf-8')
+
+    try:
+        payload = response_cache.get(('restaurants', request.query_string), store.version, build)
+    except ValueError as ex:
+        return jsonify({"error": str(ex)}), 400
+    return cached_json_response(payload)
+
+@app.route('/api/leaderboards')
+def get_leaderboards():
+    """Top restaurants for one board, best first.
+    Query: metric (bayesian|score|rating|reviews, default bayesian), district?, type?, limit (default 10, max 100).
+    Returns { metric, district, type, total, items: [restaurant + { rank, value }], districts: [...], types: [...] }
+    where value is the metric's ranking value and districts/types list the available boards.
+    """
+    metric = request.args.get('metric') or 'bayesian'
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({"error": f"metric must be one of: {', '.join(LEADERBOARD_METRICS)}"}), 400
+    try:
+        limit = int(request.args.get('limit') or 10)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, 100))
+    district = (request.args.get('district') or '').strip()
+    rtype = (request.args.get('type') or '').strip()
+
+    def build():
+        entries, total = leaderboards.top(metric, limit, district=district, rtype=rtype)
+        items = []
+        for rank, (rid, value) in enumerate(entries, 1):
+            item = _with_aggregates(store.get_restaurant(rid))
+            item["rank"] = rank
+            item["value"] = value
+            items.append(item)
+        return app.json.dumps({
+            "metric": metric, "district": district or None, "type": rtype or None, "total": total,
+            "items": items, "districts": leaderboards.districts, "types": leaderboards.types,
+        }).encode('utf-8')
+
+    payload = response_cache.get(('leaderboards', request.query_string), store.version, build)
+    return cached_json_response(payload)
+
+@app.route('/api/trending')
+def get_trending():
+    """Restaurants with the most recent activity, hottest first.
+    Query: window (24h|7d, default 24h), district?, limit (default 10, max TRENDING_TOP_K).
+    Returns { window, district, generated_at, items: [restaurant + { trend_score, recent_reviews, recent_photos }] }
+    where trend_score is the time-decayed activity score and recent_* count the window's reviews/photos.
+    Served from a top-K snapshot recomputed at most every TRENDING_REFRESH seconds (see trending.py).
+    """
+    window = request.args.get('window') or '24h'
+    if window not in TRENDING_WINDOWS:
+        return jsonify({"error": f"window must be one of: {', '.join(TRENDING_WINDOWS)}"}), 400
+    try:
+        limit = int(request.args.get('limit') or 10)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, trending.top_k))
+    district = (request.args.get('district') or '').strip()
+
+    def build():
+        items = []
+        for rid, score, recent_reviews, recent_photos in trending.top(window, district, limit):
+            restaurant = store.get_restaurant(rid)
+            if restaurant is None:
+                continue
+            item = _with_aggregates(restaurant)
+            item["trend_score"] = score
+            item["recent_reviews"] = recent_reviews
+            item["recent_photos"] = recent_photos
+            items.append(item)
+        generated_at = datetime.utcfromtimestamp(trending.generated_at).isoformat() + "Z" if trending.generated_at else None
+        return app.json.dumps({
+            "window": window, "district": district or None, "generated_at": generated_at, "items": items,
+        }).encode('utf-8')
+
+    version = (store.version, trending.generation())
+    payload = response_cache.get(('trending', request.query_string), version, build)
+    return cached_json_response(payload)
+
+NEARBY_MAX_RADIUS_KM = 500
+
+@app.route('/api/restaurants/nearby')
+def nearby_restaurants():
+    """Restaurants nearest to a point, nearest first.
+    Query: lat, lon (required), radius (km, optional, max 500), limit (default 20, max 100),
+    plus the district/type/specialty filters of GET /api/restaurants.
+    Returns { items: [restaurant + { distance_km, location_precision }], total }, where
+    location_precision is 'exact' for catalog coordinates and 'district' for entries placed at their
+    district's centroid. total counts every match within radius (null without a radius).
+    """
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        radius = float(request.args['radius']) if request.args.get('radius') else None
+        limit = int(request.args.get('limit') or 20)
+    except KeyError:
+        return jsonify({"error": "lat and lon are required"}), 400
+    except ValueError:
+        return jsonify({"error": "lat, lon and radius must be numbers, limit an integer"}), 400
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({"error": "lat must be within -90..90 and lon within -180..180"}), 400
+    if radius is not None and not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+        return jsonify({"error": f"radius must be between 0 and {NEARBY_MAX_RADIUS_KM} km"}), 400
+    limit = max(1, min(limit, 100))
+
+    index = geo_index
+    candidates = catalog_index.matching(
+        district=_split_param('district'), types=_split_param('type'), specialties=_split_param('specialty'),
+    )
+    if radius is None:
+        hits, total = index.nearest(lat, lon, limit, candidates), None
+    else:
+        hits, total = index.within(lat, lon, radius, limit, candidates)
+    items = []
+    for distance, rid in hits:
+        restaurant = store.get_restaurant(rid)
+        if restaurant is None:
+            continue
+        item = _with_aggregates(restaurant)
+        item["distance_km"] = round(distance, 3)
+        item["location_precision"] = index.point(rid)[2]
+        items.append(item)
+    return jsonify({"items": items, "total": total})
 
 @app.route('/api/restaurants/<int:restaurant_id>')
 def get_restaurant(restaurant_id):
     """Get a specific restaurant by ID (includes avg_rating and review_count)"""
-    restaurant = next((r for r in restaurants if r["id"] == restaurant_id), None)
+    restaurant = store.get_restaurant(restaurant_id)
     if not restaurant:
         return jsonify({"error": "Restaurant not found"}), 404
-    vals = [r["rating"] for r in reviews if r["restaurant_id"] == restaurant_id]
-    avg = round(sum(vals) / len(vals), 1) if vals else restaurant.get("rating")
-    data = dict(restaurant)
-    data["avg_rating"] = avg
-    data["review_count"] = len(vals)
-    return jsonify(data)
+    return jsonify(_with_aggregates(restaurant))
 
 @app.route('/api/restaurants/search/<string:query>')
 def search_restaurants(query):
-    """Search restaurants by name or type"""
-    query = query.lower()
-    filtered_restaurants = [
-        r for r in restaurants 
-        if query in r["name"].lower() or query in r["type"].lower()
-    ]
-    return jsonify(filtered_restaurants)
+    """Ranked search over name, type, location, specialties and review comments.
+    Query params: limit (default 50, max 100), prefix (default 1; treat the last word as a typeahead prefix).
+    Tolerates typos and common transliterations (e.g. Calicut/Kozhikode, manthi/mandhi).
+    """
+    try:
+        limit = max(1, min(int(request.args.get('limit') or 50), 100))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    prefix = request.args.get('prefix', '1') not in ('0', 'false')
+    hits = search_index.search(query, limit=limit, prefix=prefix)
+    return jsonify([_with_aggregates(store.get_restaurant(rid)) for rid, _ in hits])
 
 from flask import request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from datetime import datetime, timezone
 import uuid
-import io
-try:
-    from PIL import Image
-    _pil_enabled = True
-except Exception:
-    Image = None
-    _pil_enabled = False
+from images import AVATAR_SIZES, PIL_AVAILABLE, ImageRejected, probe as probe_image, square_variants_async
+
+# Avatars are stored as square WebP and JPEG variants at AVATAR_SIZES (see images.square_variants);
+# avatar_url stays the largest JPEG for clients that only read that
+AVATAR_FORMATS = ('webp', 'jpeg')
+AVATAR_MIME = {'webp': 'image/webp', 'jpeg': 'image/jpeg'}
 
 @app.route('/api/restaurants/<int:restaurant_id>/reviews', methods=['GET'])
 def list_reviews(restaurant_id):
-    """List reviews for a restaurant."""
+    """List reviews for a restaurant.
+    With limit and/or cursor: one page, newest first, photos embedded: { items, next_cursor }.
+    """
     # Ensure restaurant exists
-    if not any(r["id"] == restaurant_id for r in restaurants):
+    if not store.has_restaurant(restaurant_id):
         return jsonify({"error": "Restaurant not found"}), 404
-    data = [r for r in reviews if r["restaurant_id"] == restaurant_id]
-    return jsonify(data)
+    if 'limit' in request.args or 'cursor' in request.args:
+        try:
+            return jsonify(_review_page(restaurant_id, request.args.get('cursor'), _page_limit('limit', 10, 50)))
+        except ValueError as ex:
+            return jsonify({"error": str(ex)}), 400
+    return jsonify([_public(r) for r in store.reviews_for_restaurant(restaurant_id)])
+
+def _now_iso():
+    """created_at for new records, always with microseconds so the strings sort in time order."""
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+def _page_limit(name, default, maximum):
+    """Integer query param clamped to 1..maximum; raises ValueError if it is not a number."""
+    try:
+        value = int(request.args.get(name) or default)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    return max(1, min(value, maximum))
+
+def _before_key(cursor):
+    """Keyset cursors over created_at-ordered lists encode (created_at, id); pages continue below that key."""
+    if not cursor:
+        return None
+    created_at, record_id = decode_cursor(cursor)
+    if not isinstance(created_at, str) or not isinstance(record_id, int) or isinstance(record_id, bool):
+        raise ValueError('Invalid cursor')
+    return created_at, record_id
+
+def _keyset_page(rows, limit):
+    """Split limit + 1 fetched rows into (items, next_cursor)."""
+    items = rows[:limit]
+    if len(rows) <= limit or not items:
+        return items, None
+    return items, encode_cursor((items[-1]["created_at"], items[-1]["id"]))
+
+def _review_page(restaurant_id, cursor, limit):
+    """One page of reviews (newest first) with their ready photos embedded: { items, next_cursor }."""
+    items, next_cursor = _keyset_page(store.review_page(restaurant_id, _before_key(cursor), limit + 1), limit)
+    photos = store.ready_photos_for_reviews([r["id"] for r in items])
+    items = [dict(_public(r), photos=[_public(p) for p in photos.get(r["id"], [])]) for r in items]
+    return {"items": items, "next_cursor": next_cursor}
+
+def _photo_page(restaurant_id, cursor, limit):
+    """One page of the restaurant's ready photos, newest first: { items, next_cursor }."""
+    items, next_cursor = _keyset_page(store.photo_page(restaurant_id, _before_key(cursor), limit + 1), limit)
+    return {"items": [_public(p) for p in items], "next_cursor": next_cursor}
+
+def _user_review_page(user_email, cursor, limit):
+    """One page of an identity's reviews (newest first), each with restaurant_name: { items, next_cursor }."""
+    items, next_cursor = _keyset_page(store.user_review_page(user_email, _before_key(cursor), limit + 1), limit)
+    out = []
+    for r in items:
+        restaurant = store.get_restaurant(r["restaurant_id"])
+        out.append(dict(_public(r), restaurant_name=restaurant["name"] if restaurant else None))
+    return {"items": out, "next_cursor": next_cursor}
+
+def _optional_identity():
+    """JWT identity if a valid token was sent, else None (an expired or revoked token counts as none)."""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+def _public(record: dict) -> dict:
+    """Copy of an account, review or photo without its email identity, which stays private."""
+    out = dict(record)
+    out.pop("user_email", None)
+    return out
+
+def _account_out(user: dict) -> dict:
+    """Public view of an account."""
+    return _public(user)
+
+@app.route('/api/restaurants/<int:restaurant_id>/detail', methods=['GET'])
+def get_restaurant_detail(restaurant_id):
+    """Everything the detail page needs in one round trip:
+      { restaurant (with avg_rating, review_count, rating_histogram),
+        reviews: { items (newest first, photos embedded), next_cursor },
+        photos: { items (newest first), next_cursor } }
+    Query: reviews_limit (default 10, max 50), photos_limit (default 24, max 100).
+    Further pages come from /reviews and /photos with ?cursor=.
+    """
+    restaurant = store.get_restaurant(restaurant_id)
+    if not restaurant:
+        return jsonify({"error": "Restaurant not found"}), 404
+    try:
+        reviews_limit = _page_limit('reviews_limit', 10, 50)
+        photos_limit = _page_limit('photos_limit', 24, 100)
+    except ValueError as ex:
+        return jsonify({"error": str(ex)}), 400
+    item = _with_aggregates(restaurant)
+    item["rating_histogram"] = rating_aggregates.histogram(restaurant_id)
+    return jsonify({
+        "restaurant": item,
+        "reviews": _review_page(restaurant_id, None, reviews_limit),
+        "photos": _photo_page(restaurant_id, None, photos_limit),
+    })
 
 # -----------------------------
 # Simple Accounts (No Auth)
 # -----------------------------
-# Each user: { id (10-digit string), name, avatar_url (optional), created_at }
-users = []
-
 def _generate_user_id() -> str:
-    """Generate a unique 10-digit numeric ID (as a string)."""
-    import random
+    """Generate a 10-digit numeric ID (as a string) that is not taken yet.
+    Two workers can still race to the same ID, so callers retry when add_user raises ValueError.
+    """
+    import secrets
     while True:
-        uid = ''.join(str(random.randint(0, 9)) for _ in range(10))
-        if not any(u.get('id') == uid for u in users):
+        uid = str(secrets.randbelow(10 ** 10)).zfill(10)
+        if not store.has_user(uid):
             return uid
 
 @app.route('/api/accounts', methods=['POST'])
@@ -263,46 +883,30 @@ def create_account():
     Accepts either:
       - multipart/form-data: fields => name (text, required), avatar (file, optional)
       - application/json: { name: string, avatar_url?: string }
-    If an avatar file is provided and Pillow is available, performs a center 1:1 crop before upload.
-    Returns 201 with: { id, name, avatar_url, created_at }
+    If an avatar file is provided and Pillow is available, it is center-cropped 1:1 and downscaled
+    in the image process pool before upload. The upload runs in the background; avatar_url is filled in once it finishes.
+    Returns 201 with: { id, name, avatar_url, created_at, avatar_upload?: { job_id, status } };
+    avatar_sources ([{ type, srcset }]) appears once the upload is ready.
+    When called with a JWT, the account is linked to that identity (its review timeline).
     """
     name = None
     avatar_url = None
+    avatar_bytes = None
 
     if request.content_type and request.content_type.startswith('multipart/'):
         name = (request.form.get('name') or '').strip()
         avatar_file = request.files.get('avatar')
         if avatar_file and getattr(avatar_file, 'filename', ''):
-            # Attempt server-side 1:1 crop if Pillow is available
-            file_to_upload = avatar_file
-            if _pil_enabled:
-                try:
-                    img = Image.open(avatar_file.stream).convert('RGB')
-                    w, h = img.size
-                    side = min(w, h)
-                    left = (w - side) // 2
-                    top = (h - side) // 2
-                    right = left + side
-                    bottom = top + side
-                    img_sq = img.crop((left, top, right, bottom))
-                    buf = io.BytesIO()
-                    img_sq.save(buf, format='JPEG', quality=90)
-                    buf.seek(0)
-                    file_to_upload = buf
-                except Exception as ex:
-                    print('Pillow crop failed, uploading original:', ex)
-                    avatar_file.stream.seek(0)
-                    file_to_upload = avatar_file
-            if _cloudinary_enabled:
-                try:
-                    up = cloudinary.uploader.upload(
-                        file_to_upload,
-                        folder='bmit/users/avatars',
-                        resource_type='image',
-                    )
-                    avatar_url = up.get('secure_url') or up.get('url')
-                except Exception as ex:
-                    print('Cloudinary avatar upload failed:', ex)
+            if upload_queue:
+                if upload_queue.pending() >= upload_queue.max_pending:
+                    return _upload_queue_full()
+                avatar_bytes = avatar_file.read()
+                if PIL_AVAILABLE:
+                    # Header-only check: rejects non-images and oversized uploads before any decoding
+                    try:
+                        probe_image(avatar_bytes)
+                    except ImageRejected as ex:
+                        return jsonify({"error": str(ex)}), 400
     else:
         data = request.get_json(silent=True) or {}
         name = (data.get('name') or '').strip()
@@ -311,82 +915,131 @@ def create_account():
     if not name:
         return jsonify({"error": "'name' is required"}), 400
 
-    user = {
-        "id": _generate_user_id(),
-        "name": name,
-        "avatar_url": avatar_url,
-        "created_at": datetime.utcnow().isoformat() + "Z",
-    }
-    users.append(user)
-    return jsonify(user), 201
+    created_at = _now_iso()
+    while True:
+        user = {
+            "id": _generate_user_id(),
+            "name": name,
+            "avatar_url": avatar_url,
+            "created_at": created_at,
+            "user_email": _optional_identity(),
+        }
+        try:
+            store.add_user(user)
+            break
+        except ValueError:
+            continue
+    out = _account_out(user)
+    if avatar_bytes:
+        out["avatar_upload"] = _queue_avatar(user["id"], avatar_bytes)
+    return jsonify(out), 201
+
+def _prepare_avatar(data: bytes):
+    """Square-crop and downscale an avatar in the image process pool into {"<size>.<format>": bytes}
+    (the original as-is without Pillow). Raises if processing fails, which marks the upload job failed."""
+    if not PIL_AVAILABLE:
+        return data
+    try:
+        with metrics.IMAGE_SECONDS.time(kind='avatar'):
+            variants = square_variants_async(data, sizes=AVATAR_SIZES, formats=AVATAR_FORMATS).result(timeout=60)
+        return {f'{size}.{fmt}': variants[(size, fmt)] for size in AVATAR_SIZES for fmt in AVATAR_FORMATS}
+    except Exception as ex:
+        print('Avatar processing failed, not uploading it:', repr(ex))
+        raise
+
+def _avatar_fields(urls) -> dict:
+    """avatar_url plus srcset-ready avatar_sources ([{type, srcset}], like thumbnail image sets)
+    from an upload job's url: one url without Pillow, else {"<size>.<format>": url}."""
+    if isinstance(urls, str):
+        return {"avatar_url": urls}
+    sources = [{"type": AVATAR_MIME[fmt],
+                "srcset": ', '.join(f'{urls[f"{size}.{fmt}"]} {size}w' for size in AVATAR_SIZES)}
+               for fmt in AVATAR_FORMATS]
+    return {"avatar_url": urls[f'{AVATAR_SIZES[-1]}.jpeg'], "avatar_sources": sources}
+
+def _queue_avatar(user_id, data: bytes):
+    """Queue an avatar upload that sets the account's avatar_url and avatar_sources when done;
+    returns {job_id, status}."""
+    def on_done(urls):
+        user = store.get_user(user_id)
+        if user:
+            user.pop("avatar_sources", None)
+            user.update(_avatar_fields(urls))
+            store.update_user(user)
+    try:
+        job_id = upload_queue.submit(lambda: _prepare_avatar(data), 'bmit/users/avatars', on_done=on_done)
+    except UploadQueueFull:
+        return {"job_id": None, "status": "failed"}
+    return {"job_id": job_id, "status": "pending"}
 
 @app.route('/api/accounts/<user_id>', methods=['GET'])
 def get_account(user_id):
-    user = next((u for u in users if u["id"] == user_id), None)
+    user = store.get_user(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
-    return jsonify(user)
+    return jsonify(_account_out(user))
 
 @app.route('/api/accounts/<user_id>/reviews', methods=['GET'])
 def list_user_reviews(user_id):
-    """List reviews written by this account. We match by user_name for the simple demo.
-    Returns newest-first list of reviews.
+    """List reviews written by this account's linked identity, newest first.
+    With limit and/or cursor: one page, { items, next_cursor }. Accounts not linked to a
+    signed-in identity have no reviews.
     """
-    user = next((u for u in users if u["id"] == user_id), None)
+    user = store.get_user(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
-    name = user.get('name')
-    data = [r for r in reviews if r.get('user_name') == name]
-    data.sort(key=lambda r: r.get('created_at', ''), reverse=True)
-    return jsonify(data)
+    email = user.get("user_email")
+    if 'limit' in request.args or 'cursor' in request.args:
+        try:
+            limit = _page_limit('limit', 20, 100)
+            page = _user_review_page(email, request.args.get('cursor'), limit) if email else {"items": [], "next_cursor": None}
+        except ValueError as ex:
+            return jsonify({"error": str(ex)}), 400
+        return jsonify(page)
+    return jsonify([_public(r) for r in store.reviews_for_user(email)[::-1]] if email else [])
+
+@app.route('/api/me/reviews', methods=['GET'])
+@jwt_required()
+def list_my_reviews():
+    """The signed-in identity's review timeline, newest first, with restaurant_name.
+    Query: limit (default 20, max 100), cursor. Returns { items, next_cursor }.
+    """
+    try:
+        limit = _page_limit('limit', 20, 100)
+        return jsonify(_user_review_page(get_jwt_identity(), request.args.get('cursor'), limit))
+    except ValueError as ex:
+        return jsonify({"error": str(ex)}), 400
 
 @app.route('/api/accounts/<user_id>', methods=['PATCH'])
 def update_account(user_id):
     """Update an account's name and/or avatar. Accepts multipart/form-data or JSON.
     Multipart: fields => name? (text), avatar? (file)
     JSON: { name?: string, avatar_url?: string }
-    Performs 1:1 crop if Pillow is available for file uploads.
+    The linked identity is set only when the account is created (with a JWT); it cannot be claimed later.
+    Avatar files are cropped 1:1 and downscaled in the background if Pillow is available.
     """
-    user = next((u for u in users if u["id"] == user_id), None)
+    user = store.get_user(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     new_name = None
     new_avatar_url = None
+    avatar_bytes = None
 
     if request.content_type and request.content_type.startswith('multipart/'):
         new_name = (request.form.get('name') or '').strip() or None
         avatar_file = request.files.get('avatar')
         if avatar_file and getattr(avatar_file, 'filename', ''):
-            file_to_upload = avatar_file
-            if _pil_enabled:
-                try:
-                    img = Image.open(avatar_file.stream).convert('RGB')
-                    w, h = img.size
-                    side = min(w, h)
-                    left = (w - side) // 2
-                    top = (h - side) // 2
-                    right = left + side
-                    bottom = top + side
-                    img_sq = img.crop((left, top, right, bottom))
-                    buf = io.BytesIO()
-                    img_sq.save(buf, format='JPEG', quality=90)
-                    buf.seek(0)
-                    file_to_upload = buf
-                except Exception as ex:
-                    print('Pillow crop failed, uploading original:', ex)
-                    avatar_file.stream.seek(0)
-                    file_to_upload = avatar_file
-            if _cloudinary_enabled:
-                try:
-                    up = cloudinary.uploader.upload(
-                        file_to_upload,
-                        folder='bmit/users/avatars',
-                        resource_type='image',
-                    )
-                    new_avatar_url = up.get('secure_url') or up.get('url')
-                except Exception as ex:
-                    print('Cloudinary avatar upload failed:', ex)
+            if upload_queue:
+                if upload_queue.pending() >= upload_queue.max_pending:
+                    return _upload_queue_full()
+                avatar_bytes = avatar_file.read()
+                if PIL_AVAILABLE:
+                    # Header-only check: rejects non-images and oversized uploads before any decoding
+                    try:
+                        probe_image(avatar_bytes)
+                    except ImageRejected as ex:
+                        return jsonify({"error": str(ex)}), 400
     else:
         data = request.get_json(silent=True) or {}
         new_name = (data.get('name') or '').strip() or None
@@ -396,8 +1049,14 @@ def update_account(user_id):
         user['name'] = new_name
     if new_avatar_url is not None:
         user['avatar_url'] = new_avatar_url
+        user.pop('avatar_sources', None)  # they described the previous avatar
+    store.update_user(user)
 
-    return jsonify(user)
+    out = _account_out(user)
+    if avatar_bytes:
+        # The current avatar stays in place until the new upload finishes
+        out["avatar_upload"] = _queue_avatar(user_id, avatar_bytes)
+    return jsonify(out)
 
 @app.route('/api/restaurants/<int:restaurant_id>/reviews', methods=['POST'])
 @jwt_required()
@@ -405,9 +1064,8 @@ def create_review(restaurant_id):
     """Create a review for a restaurant (auth required).
     Supports JSON or multipart/form-data with optional photo uploads (key: photos).
     """
-    global _next_review_id, _next_photo_id
     # Ensure restaurant exists
-    if not any(r["id"] == restaurant_id for r in restaurants):
+    if not store.has_restaurant(restaurant_id):
         return jsonify({"error": "Restaurant not found"}), 404
 
     rating = None
@@ -431,50 +1089,55 @@ def create_review(restaurant_id):
     if rating < 1 or rating > 5:
         return jsonify({"error": "Rating must be between 1 and 5"}), 400
 
+    files = [f for f in files if f and getattr(f, 'filename', '')]
+    if files:
+        if not upload_queue:
+            return jsonify({"error": "Photo upload not configured"}), 500
+        # Hold the queue slots now: once the review is committed its photos must not be turned away
+        try:
+            upload_queue.reserve(len(files))
+        except UploadQueueFull:
+            return _upload_queue_full()
+
     email = get_jwt_identity()
-    user_name = email.split('@')[0] if email else "Anonymous"
+    auth_user = get_auth_user(email) if email else None
+    user_name = (auth_user or {}).get("name") or (email.split('@')[0] if email else "Anonymous")
     review = {
-        "id": _next_review_id,
+        "id": review_ids.next(),
         "restaurant_id": restaurant_id,
         "user_email": email,
         "user_name": user_name,
         "rating": rating,
         "comment": comment,
-        "created_at": datetime.utcnow().isoformat() + "Z",
+        "created_at": _now_iso(),
     }
-    _next_review_id += 1
-    reviews.append(review)
+    try:
+        if _db_pool:
+            # Shared-state mode: the change_log sync applies this (and any other worker's) writes
+            store.add_review(review)
+            _sync_shared_state(force=True)
+        elif isinstance(store, JournaledStore):
+            # Journal first: if the journal refuses the write, no index has counted the review. The fsync
+            # is awaited after _catalog_lock is released, so concurrent reviews share one (group commit).
+            with _catalog_lock:
+                position = store.queue_review(review, before=lambda: _index_review(review))
+            store.wait_durable(position)
+            _announce_review(review)
+        else:
+            # Update indexes before the store bumps its version so cached listings never go stale;
+            # both under _catalog_lock so a catalog reload sees the review in neither or both
+            with _catalog_lock:
+                _apply_review(review)
+                store.add_review(review)
+    except Exception:
+        if files:
+            upload_queue.release(len(files))
+        raise
 
-    # Upload any photos if provided
-    uploaded_photos = []
-    if files:
-        if not _cloudinary_enabled:
-            return jsonify({"error": "Photo upload not configured"}), 500
-        for f in files:
-            if not f or not getattr(f, 'filename', ''):
-                continue
-            try:
-                up = cloudinary.uploader.upload(
-                    f,
-                    folder=f"bmit/restaurants/{restaurant_id}/reviews/{review['id']}",
-                    resource_type="image",
-                )
-                photo = {
-                    "id": _next_photo_id,
-                    "review_id": review["id"],
-                    "restaurant_id": restaurant_id,
-                    "user_email": email,
-                    "url": up.get("secure_url") or up.get("url"),
-                    "created_at": datetime.utcnow().isoformat() + "Z",
-                }
-                _next_photo_id += 1
-                photos.append(photo)
-                uploaded_photos.append(photo)
-            except Exception as ex:
-                # Continue on single-file failure
-                print("Cloudinary upload failed:", ex)
-
-    out = dict(review)
+    # Queue any photos into the reserved slots; they start out pending and turn ready once uploaded
+    uploaded_photos = _queue_review_photos(files, review, email, reserved=True) if files else []
+
+    out = _public(review)
     if uploaded_photos:
         out["photos"] = uploaded_photos
     return jsonify(out), 201
@@ -483,55 +1146,337 @@ def create_review(restaurant_id):
 @jwt_required()
 def upload_review_photos(review_id):
     """Upload photos to an existing review (multipart/form-data, key: photos)."""
-    global _next_photo_id
-    review = next((r for r in reviews if r["id"] == review_id), None)
+    review = store.get_review(review_id)
     if not review:
         return jsonify({"error": "Review not found"}), 404
     restaurant_id = review["restaurant_id"]
     email = get_jwt_identity()
     if not (request.content_type and request.content_type.startswith('multipart/')):
         return jsonify({"error": "Content-Type must be multipart/form-data"}), 400
-    files = request.files.getlist("photos") or []
+    files = [f for f in (request.files.getlist("photos") or []) if f and getattr(f, 'filename', '')]
     if not files:
         return jsonify({"error": "No files uploaded"}), 400
-    if not _cloudinary_enabled:
+    if not upload_queue:
         return jsonify({"error": "Photo upload not configured"}), 500
 
-    uploaded = []
-    for f in files:
-        if not f or not getattr(f, 'filename', ''):
-            continue
-        try:
-            up = cloudinary.uploader.upload(
-                f,
-                folder=f"bmit/restaurants/{restaurant_id}/reviews/{review_id}",
-                resource_type="image",
-            )
+    try:
+        uploaded = _queue_review_photos(files, review, email)
+    except UploadQueueFull:
+        return _upload_queue_full()
+    return jsonify(uploaded), 202
+
+def _queue_review_photos(files, review, email, reserved=False):
+    """Store pending photo records for a review and queue their uploads.
+    Returns the pending photos (each with its upload job_id). If the queue cannot take them
+    all, the records are marked failed and UploadQueueFull is raised. reserved=True submits into
+    slots taken by upload_queue.reserve, which are handed back if anything fails.
+    """
+    restaurant_id = review["restaurant_id"]
+    folder = f"bmit/restaurants/{restaurant_id}/reviews/{review['id']}"
+    photos_out, jobs = [], []
+    try:
+        for f in files:
             photo = {
-                "id": _next_photo_id,
-                "review_id": review_id,
+                "id": photo_ids.next(),
+                "review_id": review["id"],
                 "restaurant_id": restaurant_id,
                 "user_email": email,
-                "url": up.get("secure_url") or up.get("url"),
-                "created_at": datetime.utcnow().isoformat() + "Z",
+                "url": None,
+                "status": "pending",
+                "created_at": _now_iso(),
             }
-            _next_photo_id += 1
-            photos.append(photo)
-            uploaded.append(photo)
-        except Exception as ex:
-            print("Cloudinary upload failed:", ex)
+            store.add_photo(photo)
+            photos_out.append(_public(photo))
+
+            def on_done(url, photo_id=photo["id"]):
+                store.update_photo(photo_id, url, "ready")
+                if not _db_pool:  # shared mode applies it from the change_log sync
+                    _apply_photo(store.get_photo(photo_id))
 
-    return jsonify(uploaded), 201
+            def on_fail(error, photo_id=photo["id"]):
+                store.update_photo(photo_id, None, "failed")
+
+            jobs.append((f.read(), folder, on_done, on_fail))
+        job_ids = upload_queue.submit_many(jobs, reserved=reserved)
+    except Exception:
+        for photo in photos_out:
+            store.update_photo(photo["id"], None, "failed")
+        if reserved:
+            upload_queue.release(len(files))
+        raise
+    for photo, job_id in zip(photos_out, job_ids):
+        photo["job_id"] = job_id
+    return photos_out
+
+@app.route('/api/uploads/<job_id>', methods=['GET'])
+def get_upload_status(job_id):
+    """Status of a background upload job: { job_id, status (pending|ready|failed), attempts, url, error }.
+    Jobs are tracked by the worker process that accepted them.
+    """
+    job = upload_queue.status(job_id) if upload_queue else None
+    if not job:
+        return jsonify({"error": "Upload job not found"}), 404
+    return jsonify(job)
 
 @app.route('/api/restaurants/<int:restaurant_id>/photos', methods=['GET'])
 def list_restaurant_photos(restaurant_id):
-    """List photos for a restaurant (aggregated from reviews)."""
-    if not any(r["id"] == restaurant_id for r in restaurants):
+    """List uploaded photos for a restaurant (aggregated from reviews), newest first.
+    With limit and/or cursor: one page, { items, next_cursor }.
+    """
+    if not store.has_restaurant(restaurant_id):
         return jsonify({"error": "Restaurant not found"}), 404
-    data = [p for p in photos if p["restaurant_id"] == restaurant_id]
-    # newest first
-    data.sort(key=lambda p: p["created_at"], reverse=True)
-    return jsonify(data)
+    if 'limit' in request.args or 'cursor' in request.args:
+        try:
+            return jsonify(_photo_page(restaurant_id, request.args.get('cursor'), _page_limit('limit', 24, 100)))
+        except ValueError as ex:
+            return jsonify({"error": str(ex)}), 400
+    return jsonify([_public(p) for p in store.photo_page(restaurant_id, limit=None)])
+
+# Polls: weekly windows, one vote per signed-in account (see polls.py)
+poll_store = SqlitePollStore(_db_pool) if _db_pool else PollStore()
+poll_results = PollResults(poll_store)
+POLL_MAX_OPTIONS = 10
+
+def _ensure_weekly_poll():
+    """Create this week's featured poll (top restaurants of a rotating district) if it does not exist yet.
+    The id is derived from the week, so concurrent workers agree on a single poll.
+    """
+    starts_at, ends_at, week = week_window()
+    poll_id = f"weekly-{week}"
+    if poll_store.get_poll(poll_id) or not leaderboards.districts:
+        return
+    district = leaderboards.districts[int(week[-2:]) % len(leaderboards.districts)]
+    entries, _ = leaderboards.top('bayesian', 4, district=district)
+    if len(entries) < 2:
+        return
+    options = []
+    for rid, _ in entries:
+        r = store.get_restaurant(rid)
+        options.append({"key": str(rid), "label": f"{r['name']}, {r['location'].split(',')[0]}", "restaurant_id": rid})
+    poll_store.add_poll({
+        "id": poll_id, "title": f"Best Mandhi in {district} (Weekly)", "options": options,
+        "starts_at": starts_at, "ends_at": ends_at, "created_by": None,
+        "created_at": _now_iso(),
+    })
+
+def _poll_out(poll: dict, now: str) -> dict:
+    out = dict(poll)
+    out["status"] = status_of(poll, now)
+    out["total_votes"] = sum(poll_results.counts(poll["id"]).values())
+    return out
+
+@app.route('/api/polls', methods=['GET'])
+def list_polls():
+    """List polls. Query: status (open|upcoming|closed|all, default open).
+    Each poll: { id, title, options: [{ key, label, restaurant_id? }], starts_at, ends_at, status, total_votes, ... }
+    """
+    status = request.args.get('status') or 'open'
+    if status not in ('open', 'upcoming', 'closed', 'all'):
+        return jsonify({"error": "status must be one of: open, upcoming, closed, all"}), 400
+    _ensure_weekly_poll()
+    now = iso(datetime.now(timezone.utc))
+    polls = [_poll_out(p, now) for p in poll_store.list_polls()]
+    return jsonify([p for p in polls if status == 'all' or p["status"] == status])
+
+@app.route('/api/polls', methods=['POST'])
+@jwt_required()
+def create_poll():
+    """Create a poll for the current (or next) weekly window.
+    Body: { title: string, options: [string | { label, restaurant_id? }] (2-10), week?: 'current'|'next' }
+    """
+    data = _json_object()
+    if data is None:
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    title = data.get('title') or ''
+    raw_options = data.get('options')
+    week = data.get('week') or 'current'
+    if not isinstance(title, str) or not title.strip() or len(title.strip()) > 120:
+        return jsonify({"error": "title is required (max 120 characters)"}), 400
+    title = title.strip()
+    if week not in ('current', 'next'):
+        return jsonify({"error": "week must be 'current' or 'next'"}), 400
+    if not isinstance(raw_options, list) or not 2 <= len(raw_options) <= POLL_MAX_OPTIONS:
+        return jsonify({"error": f"options must be a list of 2-{POLL_MAX_OPTIONS} choices"}), 400
+    options = []
+    for i, opt in enumerate(raw_options, 1):
+        if isinstance(opt, dict):
+            label, rid = opt.get('label') or '', opt.get('restaurant_id')
+        else:
+            label, rid = opt, None
+        if not isinstance(label, str):
+            return jsonify({"error": "option labels must be strings"}), 400
+        if rid is not None and (isinstance(rid, bool) or not isinstance(rid, int)):
+            return jsonify({"error": "restaurant_id must be an integer"}), 400
+        label = label.strip()
+        if rid is not None and not store.has_restaurant(rid):
+            return jsonify({"error": f"Restaurant {rid} not found"}), 400
+        if not label and rid is not None:
+            label = store.get_restaurant(rid)['name']
+        if not label or len(label) > 80:
+            return jsonify({"error": "each option needs a label (max 80 characters)"}), 400
+        option = {"key": str(i), "label": label}
+        if rid is not None:
+            option["restaurant_id"] = rid
+        options.append(option)
+    starts_at, ends_at, _ = week_window(offset=1 if week == 'next' else 0)
+    poll = {
+        "id": uuid.uuid4().hex[:12], "title": title, "options": options,
+        "starts_at": starts_at, "ends_at": ends_at, "created_by": get_jwt_identity(),
+        "created_at": _now_iso(),
+    }
+    poll_store.add_poll(poll)
+    return jsonify(_poll_out(poll, iso(datetime.now(timezone.utc)))), 201
+
+@app.route('/api/polls/<poll_id>', methods=['GET'])
+def get_poll(poll_id):
+    """One poll, plus my_vote (the caller's option key, or null) when a token is sent."""
+    poll = poll_store.get_poll(poll_id)
+    if not poll:
+        return jsonify({"error": "Poll not found"}), 404
+    out = _poll_out(poll, iso(datetime.now(timezone.utc)))
+    identity = _optional_identity()
+    out["my_vote"] = poll_store.vote_of(poll_id, identity) if identity else None
+    return jsonify(out)
+
+@app.route('/api/polls/<poll_id>/vote', methods=['POST'])
+@jwt_required()
+def vote_in_poll(poll_id):
+    """Cast the caller's vote. Body: { option: key }. 409 if already voted or outside the poll window."""
+    poll = poll_store.get_poll(poll_id)
+    if not poll:
+        return jsonify({"error": "Poll not found"}), 404
+    status = status_of(poll)
+    if status != 'open':
+        return jsonify({"error": f"Poll is {status}"}), 409
+    data = _json_object()
+    if data is None:
+        return jsonify({"error": "Body must be a JSON object"}), 400
+    option = str(data.get('option') or '')
+    if option not in {o["key"] for o in poll["options"]}:
+        return jsonify({"error": "Unknown option"}), 400
+    try:
+        poll_store.record_vote(poll_id, get_jwt_identity(), option)
+    except AlreadyVoted:
+        return jsonify({"error": "You have already voted in this poll"}), 409
+    return jsonify({"poll_id": poll_id, "option": option}), 201
+
+@app.route('/api/polls/<poll_id>/results', methods=['GET'])
+def get_poll_results(poll_id):
+    """Vote counts from the rolled-up snapshot (refreshed every POLL_ROLLUP_INTERVAL seconds).
+    Returns { poll_id, status, total, results: { option_key: count } }.
+    """
+    poll = poll_store.get_poll(poll_id)
+    if not poll:
+        return jsonify({"error": "Poll not found"}), 404
+    status = status_of(poll)
+
+    def build():
+        counts = poll_results.counts(poll_id)
+        results = {o["key"]: counts.get(o["key"], 0) for o in poll["options"]}
+        return app.json.dumps({
+            "poll_id": poll_id, "status": status, "total": sum(results.values()), "results": results,
+        }).encode('utf-8')
+
+    payload = response_cache.get(('poll', poll_id, status), poll_results.generation(), build)
+    return cached_json_response(payload)
+
+@app.route('/api/admin/catalog/reload', methods=['POST'])
+@jwt_required()
+def admin_reload_catalog():
+    """Reload the restaurant catalog from disk (admins only: emails listed in ADMIN_EMAILS).
+    Query: force=1 rebuilds even if the file is unchanged.
+    Returns the reload report: { status: reloaded|unchanged, restaurants, digest, seconds?, rss_mb? }.
+    An invalid file is rejected with 422 and its errors; the current catalog stays in place.
+    Only this worker reloads; other workers pick the change up through their file watcher.
+    """
+    if (get_jwt_identity() or '').lower() not in ADMIN_EMAILS:
+        return jsonify({"error": "Admin access required"}), 403
+    if not file_signature(DATA_PATH):
+        return jsonify({"error": "No catalog file to reload"}), 404
+    try:
+        report = reload_catalog(force=request.args.get('force') in ('1', 'true'))
+    except CatalogError as e:
+        return jsonify({"error": "Invalid catalog", "details": e.errors}), 422
+    return jsonify(report)
+
+# Stream server for /api/stream, started by the first stream request (so the debug
+# reloader's parent process never binds the port). serve.py passes a shared socket in STREAM_FD.
+_stream_server = None
+_stream_lock = threading.Lock()
+
+def _ensure_stream_server(host=None):
+    """Start the stream server on host (ignored for serve.py's shared socket); None if unavailable."""
+    global _stream_server
+    if _stream_server is None and STREAM_PORT > 0:
+        with _stream_lock:
+            if _stream_server is None:
+                try:
+                    fd = os.environ.get('STREAM_FD')
+                    sock = socket.socket(fileno=int(fd)) if fd else stream_listen(host, STREAM_PORT)
+                    _stream_server = StreamServer().start(sock)
+                    threading.Thread(target=_stream_housekeeping, name='stream-housekeeping', daemon=True).start()
+                except OSError as e:
+                    print('Could not start the event stream server:', e)
+                    _stream_server = False
+    return _stream_server
+
+def _stream_bind_host():
+    """STREAM_HOST, else the address this app is served on, so the stream is reachable wherever the app is.
+    Werkzeug reports its bound address (0.0.0.0 for all interfaces) as SERVER_NAME; other servers put the
+    Host header there, which is only used if it is an IP address."""
+    if STREAM_HOST:
+        return STREAM_HOST
+    name = request.environ.get('SERVER_NAME') or ''
+    try:
+        ipaddress.ip_address(name)
+        return name
+    except ValueError:
+        return '127.0.0.1'
+
+def _stream_housekeeping():
+    """While anyone is subscribed: apply other workers' writes (publishing them) even when no
+    requests arrive, and publish poll counts whenever the rollup changes them."""
+    published = {}
+    while True:
+        time.sleep(max(SHARED_SYNC_INTERVAL, 0.05))
+        if not BROADCASTER.subscribers:
+            continue
+        _sync_shared_state()
+        for poll_id, counts in poll_results.all_counts().items():
+            if published.get(poll_id) == counts:
+                continue
+            published[poll_id] = counts
+            poll = poll_store.get_poll(poll_id)
+            results = {o["key"]: counts.get(o["key"], 0) for o in poll["options"]} if poll else counts
+            BROADCASTER.publish('poll', {"poll_id": poll_id, "results": results, "total": sum(results.values())},
+                                poll_id=poll_id)
+
+if os.environ.get('STREAM_FD'):
+    _ensure_stream_server()  # serve.py worker: start accepting on the shared socket right away
+
+@app.route('/api/stream')
+def event_stream():
+    """Live change feed as Server-Sent Events. Redirects (307) to the stream server (events.py),
+    which holds the open connections. Query filters, combined with AND: restaurant_id, district, poll.
+    Events (JSON data):
+      review { restaurant_id, review: { id, rating, comment, user_name, created_at }, avg_rating, review_count }
+      photo  { restaurant_id, review_id, photo: { id, url, created_at } }   (once its upload is ready)
+      poll   { poll_id, results: { option_key: count }, total }               (at most every POLL_ROLLUP_INTERVAL)
+    Slow clients are disconnected; EventSource reconnects, so refetch on (re)open to catch up.
+    """
+    server = _ensure_stream_server(_stream_bind_host())
+    if not server:
+        return jsonify({"error": "Live updates are not available"}), 503
+    if STREAM_PUBLIC_URL:
+        base = STREAM_PUBLIC_URL.rstrip('/')
+    else:
+        host = urlsplit(request.host_url).hostname or '127.0.0.1'
+        if is_loopback(server.host) and not is_loopback(host):
+            print(f'Not redirecting {host} to the stream server on {server.host}; set STREAM_HOST or STREAM_PUBLIC_URL')
+            return jsonify({"error": "Live updates are not available"}), 503
+        base = f"{request.scheme}://{f'[{host}]' if ':' in host else host}:{server.port}"
+    query = request.query_string.decode('latin-1')
+    return redirect(f"{base}/api/stream" + (f"?{query}" if query else ""), code=307)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -5,27 +5,98 @@ from flask_jwt_extended import (
     jwt_required,
     get_jwt,
 )
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import timedelta
+import math
 import re
 import os
+import threading
+
+from db import get_pool
+from blocklist import TokenBlocklist, SqliteTokenBlocklist
+from passwords import PasswordHasher, HashQueueFull
+from ratelimit import TokenBucket
 try:
-    from google.oauth2 import id_token as google_id_token
-    from google.auth.transport import requests as google_requests
+    from google_certs import GoogleTokenVerifier, CertsUnavailable
+    google_verifier = GoogleTokenVerifier()
     GOOGLE_LIBS_AVAILABLE = True
 except Exception:
-    google_id_token = None
-    google_requests = None
+    google_verifier = None
+    CertsUnavailable = None
     GOOGLE_LIBS_AVAILABLE = False
 
 auth_bp = Blueprint("auth", __name__)
 
-# In-memory user store for demo purposes only
-# In production, replace with a database.
+# In-memory user store, used when DATABASE_PATH is not set (see db.py);
+# persisted through the app's journal when JOURNAL_DIR is set (see use_journal)
 users = {}
+user_journal = None
+
+# Password hashes run on a bounded pool (see passwords.py)
+password_hasher = PasswordHasher()
+
+# Admission control for signup/login: per client IP and per email, in requests per minute (0 disables)
+ip_buckets = TokenBucket(float(os.environ.get("AUTH_RATE_PER_IP", "30")) / 60, int(os.environ.get("AUTH_BURST_PER_IP", "10")))
+email_buckets = TokenBucket(float(os.environ.get("AUTH_RATE_PER_EMAIL", "6")) / 60, int(os.environ.get("AUTH_BURST_PER_EMAIL", "5")))
+
+# Token blocklist to support logout (revocation); entries expire with their tokens (see blocklist.py)
+token_blocklist = None
+_blocklist_lock = threading.Lock()
+
+
+def get_user(email: str):
+    pool = get_pool()
+    if pool is None:
+        return users.get(email)
+    row = pool.connection().execute(
+        "SELECT email, name, password_hash, auth_provider FROM auth_users WHERE email = ?", (email,)
+    ).fetchone()
+    return dict(row) if row else None
+
+
+def save_user(user: dict):
+    pool = get_pool()
+    if pool is None:
+        if user_journal is not None:
+            user_journal.write("auth_user", user, lambda: users.__setitem__(user["email"], user))
+        else:
+            users[user["email"]] = user
+        return
+    conn = pool.connection()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO auth_users (email, name, password_hash, auth_provider) VALUES (?, ?, ?, ?)",
+            (user["email"], user.get("name"), user.get("password_hash"), user.get("auth_provider")),
+        )
+
+
+def use_journal(journal):
+    """Journal in-memory auth users (see journal.py); call before journal.recover()."""
+    global user_journal
+    user_journal = journal
+    journal.register(
+        "auth_user",
+        lambda user: users.__setitem__(user["email"], user),
+        lambda: [dict(u) for u in users.values()],
+    )
+
+
+def get_blocklist():
+    global token_blocklist
+    if token_blocklist is None:
+        with _blocklist_lock:
+            if token_blocklist is None:
+                pool = get_pool()
+                token_blocklist = SqliteTokenBlocklist(pool) if pool else TokenBlocklist()
+    return token_blocklist
 
-# Token blocklist to support logout (revocation)
-token_blocklist = set()
+
+def revoke_token(jti: str, expires_at=None):
+    """Revoke a token until expires_at (its exp claim, unix seconds)."""
+    get_blocklist().revoke(jti, expires_at)
+
+
+def is_token_revoked(jti: str) -> bool:
+    return get_blocklist().is_revoked(jti)
 
 _email_regex = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 
@@ -34,6 +105,27 @@ def _valid_email(email: str) -> bool:
     return bool(_email_regex.match(email or ""))
 
 
+def _retry_later(message: str, status: int, seconds: float):
+    resp = jsonify({"error": message})
+    resp.status_code = status
+    resp.headers["Retry-After"] = str(max(1, math.ceil(seconds)))
+    return resp
+
+
+def _throttled(email: str = None):
+    """429 response if this client IP (or email) is over its rate, else None."""
+    wait = ip_buckets.take(request.remote_addr)
+    if not wait and email:
+        wait = email_buckets.take(email)
+    if wait:
+        return _retry_later("Too many attempts, please retry shortly", 429, wait)
+    return None
+
+
+def _hashing_busy():
+    return _retry_later("Server is busy, please retry shortly", 503, 1)
+
+
 @auth_bp.route("/signup", methods=["POST"])
 def signup():
     data = request.get_json(force=True, silent=True) or {}
@@ -45,15 +137,22 @@ def signup():
         return jsonify({"error": "Invalid email"}), 400
     if len(password) < 6:
         return jsonify({"error": "Password must be at least 6 characters"}), 400
-    if email in users:
+    throttled = _throttled(email)
+    if throttled:
+        return throttled
+    if get_user(email):
         return jsonify({"error": "Email already registered"}), 409
 
-    users[email] = {
+    try:
+        password_hash = password_hasher.hash(password)
+    except HashQueueFull:
+        return _hashing_busy()
+    save_user({
         "email": email,
         "name": name,
-        "password_hash": generate_password_hash(password),
+        "password_hash": password_hash,
         "auth_provider": "password",
-    }
+    })
 
     access_token = create_access_token(identity=email, expires_delta=timedelta(hours=12))
     return jsonify({
@@ -69,9 +168,19 @@ def login():
     email = (data.get("email") or "").strip().lower()
     password = data.get("password") or ""
 
-    user = users.get(email)
-    if not user or not check_password_hash(user.get("password_hash", ""), password):
+    throttled = _throttled(email)
+    if throttled:
+        return throttled
+    user = get_user(email)
+    try:
+        valid = bool(user) and password_hasher.check(user.get("password_hash"), password)
+    except HashQueueFull:
+        return _hashing_busy()
+    if not valid:
         return jsonify({"error": "Invalid email or password"}), 401
+    if password_hasher.needs_rehash(user["password_hash"]):
+        # PASSWORD_HASH_METHOD changed since this hash was made; upgrade it off the request path
+        password_hasher.rehash_later(password, user["password_hash"], lambda new_hash: save_user({**user, "password_hash": new_hash}))
 
     access_token = create_access_token(identity=email, expires_delta=timedelta(hours=12))
     return jsonify({
@@ -84,8 +193,8 @@ def login():
 @auth_bp.route("/logout", methods=["POST"])
 @jwt_required()
 def logout():
-    jti = get_jwt().get("jti")
-    token_blocklist.add(jti)
+    claims = get_jwt()
+    revoke_token(claims.get("jti"), claims.get("exp"))
     return jsonify({"message": "Logged out"})
 
 
@@ -93,7 +202,7 @@ def logout():
 @jwt_required()
 def me():
     email = get_jwt_identity()
-    user = users.get(email) or {}
+    user = get_user(email) or {}
     return jsonify({
         "email": user.get("email"),
         "name": user.get("name"),
@@ -128,11 +237,13 @@ def google_login():
         return jsonify({"error": "Server is missing GOOGLE_CLIENT_ID"}), 500
     if not token:
         return jsonify({"error": "Missing id_token"}), 400
+    throttled = _throttled()
+    if throttled:
+        return throttled
 
     try:
-        idinfo = google_id_token.verify_oauth2_token(
-            token, google_requests.Request(), client_id
-        )
+        # Checked against cached certs (see google_certs.py); no network round trip per login
+        idinfo = google_verifier.verify(token, client_id)
         # idinfo contains fields like: sub, email, email_verified, name, picture
         email = (idinfo.get("email") or "").lower()
         email_verified = idinfo.get("email_verified", False)
@@ -140,17 +251,18 @@ def google_login():
         if not email or not email_verified:
             return jsonify({"error": "Unverified Google account"}), 401
 
-        user = users.get(email)
+        user = get_user(email)
         if not user:
-            users[email] = {
+            save_user({
                 "email": email,
                 "name": name,
                 "password_hash": None,
                 "auth_provider": "google",
-            }
+            })
         else:
-            users[email]["auth_provider"] = "google"
-            users[email]["name"] = users[email].get("name") or name
+            user["auth_provider"] = "google"
+            user["name"] = user.get("name") or name
+            save_user(user)
 
         access_token = create_access_token(identity=email, expires_delta=timedelta(hours=12))
         return jsonify({
@@ -158,5 +270,8 @@ def google_login():
             "access_token": access_token,
             "user": {"email": email, "name": name, "auth_provider": "google"}
         })
+    except CertsUnavailable as e:
+        print("Google sign-in unavailable:", e)
+        return jsonify({"error": "Google sign-in is temporarily unavailable"}), 503
     except Exception as e:
         return jsonify({"error": "Invalid Google token", "detail": str(e)}), 401
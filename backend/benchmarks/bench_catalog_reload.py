@@ -0,0 +1,133 @@
+"""Catalog load and hot-reload cost for a large restaurants.json.
+
+Run from the backend folder:  python benchmarks/bench_catalog_reload.py [--count 100000] [--reloads 3]
+
+Writes a --count entry catalog to a temp file, points the app at it
+(RESTAURANTS_PATH, watcher off) and reports:
+
+  legacy json.load   the old single json.load of the whole file
+  load_catalog       streaming parse + per-record validation + sha256
+  reload             app.reload_catalog(force=True): load, build indexes, swap
+
+with wall time and the tracemalloc peak of each (one extra run, since
+tracing slows Python down), the process RSS, and read latency on the
+listing endpoint while reloads run in the background.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+DISTRICTS = ['Malappuram', 'Kozhikode', 'Thrissur', 'Ernakulam', 'Kannur', 'Palakkad', 'Kollam']
+TYPES = ['Restaurant', 'Cafe', 'Family Restaurant', 'Arabic Restaurant']
+SPECIALTIES = ['Chicken Mandhi', 'Mutton Mandhi', 'Beef Mandhi', 'Alfaham', 'Kuzhimandhi']
+
+
+def write_catalog(path, count, seed=7):
+    rng = random.Random(seed)
+    records = [{
+        "id": i,
+        "name": f"Mandhi House {i}",
+        "location": f"Area {i % 97}, {rng.choice(DISTRICTS)}",
+        "type": rng.choice(TYPES),
+        "rating": round(rng.uniform(3.5, 4.8), 1),
+        "image": "",
+        "description": "Popular mandhi spot with aromatic rice and tender meat.",
+        "specialties": rng.sample(SPECIALTIES, 2),
+        "phone": "N/A",
+        "address": f"Area {i % 97}, Kerala",
+    } for i in range(1, count + 1)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+
+
+def _measure(fn):
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2 ** 20
+
+
+def _rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--reloads', type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'restaurants.json')
+    write_catalog(path, args.count)
+    os.environ['RESTAURANTS_PATH'] = path
+    os.environ['CATALOG_POLL_INTERVAL'] = '0'
+    os.environ.pop('DATABASE_PATH', None)
+    print(f"cpus={os.cpu_count()} count={args.count} file={os.path.getsize(path) / 2 ** 20:.1f} MiB")
+
+    t0 = time.perf_counter()
+    import app as app_module
+    from catalog_loader import load_catalog
+    print(f"app import (initial load + indexes): {time.perf_counter() - t0:.2f}s  rss={_rss_mb():.0f} MiB")
+
+    def legacy():
+        with open(path, 'r', encoding='utf-8') as f:
+            json.load(f)
+
+    print(f"{'phase':>18} {'seconds':>8} {'peak MiB':>9}")
+    for name, fn in (('legacy json.load', legacy), ('load_catalog', lambda: load_catalog(path)),
+                     ('reload', lambda: app_module.reload_catalog(force=True))):
+        seconds, peak = _measure(fn)
+        print(f"{name:>18} {seconds:8.2f} {peak:9.1f}")
+
+    client = app_module.app.test_client()
+    latencies, stop = [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            t = time.perf_counter()
+            client.get('/api/restaurants?limit=20&sort=rating_desc&district=kozhikode')
+            latencies.append(time.perf_counter() - t)
+
+    quiet_until = time.perf_counter() + 2
+    while time.perf_counter() < quiet_until:
+        t = time.perf_counter()
+        client.get('/api/restaurants?limit=20&sort=rating_desc&district=kozhikode')
+        latencies.append(time.perf_counter() - t)
+    quiet, latencies = latencies, []
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    reports = [app_module.reload_catalog(force=True) for _ in range(args.reloads)]
+    stop.set()
+    thread.join()
+
+    for report in reports:
+        print(f"reload: {json.dumps(report['seconds'])} rss_mb={json.dumps(report['rss_mb'])}")
+    print(f"reads quiet p50/p99 {_percentile(quiet, 0.5):.2f}/{_percentile(quiet, 0.99):.2f} ms, "
+          f"during reloads {_percentile(latencies, 0.5):.2f}/{_percentile(latencies, 0.99):.2f} ms "
+          f"({len(latencies)} reads)")
+    print(f"max rss {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB, now {_rss_mb():.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
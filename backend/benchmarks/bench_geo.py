@@ -0,0 +1,92 @@
+"""Nearby-search cost: the geo_index grid against a full scan.
+
+Run from the backend folder:  python benchmarks/bench_geo.py [--count 100000] [--queries 500]
+
+Builds a --count entry catalog spread over Kerala (a tenth without
+coordinates, so they fall back to their district centroid), then times
+k-nearest (k=20), radius (5 and 25 km) and type-filtered queries from random
+points, through GeoIndex and through a haversine scan of every entry. Each
+indexed answer is checked against the scan.
+"""
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from catalog_index import CatalogIndex  # noqa: E402
+from geo_index import GeoIndex, DISTRICT_CENTROIDS, coordinates_of, haversine_km  # noqa: E402
+from ratings import RatingAggregates  # noqa: E402
+
+TYPES = ['Arabian / Mandhi', 'Yemeni / Mandhi', 'Kuzhimandhi / Arabian', 'Multicuisine + Mandhi']
+DISTRICTS = ['Thiruvananthapuram', 'Kollam', 'Alappuzha', 'Kottayam', 'Ernakulam', 'Thrissur',
+             'Palakkad', 'Malappuram', 'Kozhikode', 'Kannur', 'Kasaragod']
+
+
+def build(count, seed=11):
+    rng = random.Random(seed)
+    out = []
+    for i in range(1, count + 1):
+        district = rng.choice(DISTRICTS)
+        clat, clon = DISTRICT_CENTROIDS[district.lower()]
+        r = {"id": i, "name": f"Mandi {i}", "location": f"Area {i % 50}, {district}", "type": rng.choice(TYPES)}
+        if i % 10:
+            r["lat"], r["lon"] = clat + rng.gauss(0, 0.15), clon + rng.gauss(0, 0.15)
+        out.append(r)
+    return out
+
+
+def scan(points, lat, lon, limit, radius=None, candidates=None):
+    hits = [(haversine_km(lat, lon, p[0], p[1]), rid) for rid, p in points
+            if candidates is None or rid in candidates]
+    if radius is not None:
+        hits = [h for h in hits if h[0] <= radius]
+    return heapq.nsmallest(limit, hits), len(hits)
+
+
+def _time(fn, queries):
+    t0 = time.perf_counter()
+    results = [fn(q) for q in queries]
+    return (time.perf_counter() - t0) / len(queries) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    restaurants = build(args.count)
+    t0 = time.perf_counter()
+    index = GeoIndex()
+    index.rebuild(restaurants)
+    print(f"cpus={os.cpu_count()} count={args.count} indexed={len(index)} "
+          f"rebuild={time.perf_counter() - t0:.2f}s cells={len(index._cells)}")
+    catalog = CatalogIndex(RatingAggregates())
+    catalog.rebuild(restaurants)
+    yemeni = catalog.matching(types=['yemeni'])
+    points = [(r["id"], coordinates_of(r)) for r in restaurants]
+
+    rng = random.Random(3)
+    queries = [(rng.uniform(8.4, 12.4), rng.uniform(75.0, 77.1)) for _ in range(args.queries)]
+    cases = [
+        ('knn k=20', lambda q: index.nearest(q[0], q[1], 20), lambda q: scan(points, q[0], q[1], 20)[0]),
+        ('radius 5km', lambda q: index.within(q[0], q[1], 5, 20), lambda q: scan(points, q[0], q[1], 20, 5)),
+        ('radius 25km', lambda q: index.within(q[0], q[1], 25, 20), lambda q: scan(points, q[0], q[1], 20, 25)),
+        ('knn k=20 type', lambda q: index.nearest(q[0], q[1], 20, yemeni),
+         lambda q: scan(points, q[0], q[1], 20, candidates=yemeni)[0]),
+    ]
+    print(f"{'query':>14} {'index ms':>9} {'scan ms':>8} {'speedup':>8} {'mismatches':>10}")
+    for name, indexed, full in cases:
+        sample = queries if 'knn' in name or '5km' in name else queries[:100]
+        index_ms, got = _time(indexed, sample)
+        scan_ms, want = _time(full, sample[:50])
+        mismatches = sum(g != w for g, w in zip(got, want))
+        print(f"{name:>14} {index_ms:9.3f} {scan_ms:8.2f} {scan_ms / index_ms:7.0f}x {mismatches:10d}")
+
+
+if __name__ == '__main__':
+    main()
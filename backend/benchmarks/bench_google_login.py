@@ -0,0 +1,144 @@
+"""Google ID token verification: per-login cert fetch (old path) vs google_certs.GoogleTokenVerifier.
+
+Run from the backend folder:  python benchmarks/bench_google_login.py [--threads 8] [--logins 400] [--latency-ms 40]
+
+Starts a local fake of Google's certs endpoint ({kid: PEM}, Cache-Control
+max-age) with an artificial network delay, mints RS256 ID tokens signed by
+its key, and verifies them from several threads. "fetch" is what
+google_login did before: a fresh transport per login, fetch + parse the
+certs, then verify. "cached" is GoogleTokenVerifier. Also checks that an
+expired cache falls back to the stale certs while the endpoint is down
+(tests/test_google_certs.py covers the freshness rules in detail).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import rsa
+import urllib3
+from google.auth import crypt, jwt
+
+import google_certs
+from google_certs import CertCache, GoogleTokenVerifier
+
+KID = 'fake-key-1'
+AUDIENCE = 'bench-client-id.apps.googleusercontent.com'
+
+
+class FakeCerts:
+    """Local stand-in for https://www.googleapis.com/oauth2/v1/certs."""
+    def __init__(self, public_pem: str, max_age: int, latency: float):
+        self.body = json.dumps({KID: public_pem}).encode('utf-8')
+        self.max_age = max_age
+        self.latency = latency
+        self.hits = 0
+        self.down = False
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.hits += 1
+                time.sleep(fake.latency)
+                if fake.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={fake.max_age}, must-revalidate')
+                self.send_header('Content-Length', str(len(fake.body)))
+                self.end_headers()
+                self.wfile.write(fake.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/oauth2/v1/certs'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+def _mint(signer, n):
+    now = int(time.time())
+    return [jwt.encode(signer, {
+        'iss': 'https://accounts.google.com', 'aud': AUDIENCE, 'sub': str(i),
+        'email': f'user{i}@example.com', 'email_verified': True, 'iat': now, 'exp': now + 3600,
+    }, key_id=KID).decode('utf-8') for i in range(n)]
+
+
+def _verify_with_fetch(url, token):
+    """The old google_login path: new transport, fetch certs, parse, verify."""
+    http = urllib3.PoolManager()
+    resp = http.request('GET', url)
+    certs = json.loads(resp.data)
+    claims = jwt.decode(token, certs=certs, audience=AUDIENCE)
+    if claims['iss'] not in google_certs.GOOGLE_ISSUERS:
+        raise ValueError('Wrong issuer')
+    http.clear()
+    return claims
+
+
+def _run(label, verify, tokens, threads):
+    latencies = []
+    lock = threading.Lock()
+    chunks = [tokens[i::threads] for i in range(threads)]
+
+    def worker(chunk):
+        local = []
+        for token in chunk:
+            t0 = time.perf_counter()
+            verify(token)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    t0 = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(c,)) for c in chunks]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+    print(f'{label:>8} {len(tokens) / elapsed:10.0f} {p(0.5):9.2f} {p(0.99):9.2f}', end='')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--latency-ms', type=float, default=40, help='simulated round trip to the certs endpoint')
+    args = parser.parse_args()
+
+    public, private = rsa.newkeys(2048)
+    signer = crypt.RSASigner.from_string(private.save_pkcs1().decode('utf-8'), key_id=KID)
+    fake = FakeCerts(public.save_pkcs1().decode('utf-8'), max_age=3600, latency=args.latency_ms / 1000)
+    tokens = _mint(signer, args.logins)
+
+    print(f"{'path':>8} {'logins/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'cert fetches':>13}")
+    fake.hits = 0
+    _run('fetch', lambda t: _verify_with_fetch(fake.url, t), tokens, args.threads)
+    print(f' {fake.hits:13d}')
+
+    fake.hits = 0
+    verifier = GoogleTokenVerifier(CertCache(fake.url))
+    _run('cached', lambda t: verifier.verify(t, AUDIENCE), tokens, args.threads)
+    print(f' {fake.hits:13d}')
+
+    # Past max-age with the endpoint down: the refetch fails and the stale certs keep verifying
+    fake.down = True
+    verifier.certs._certs.expires_at = time.monotonic() - 1
+    verifier.verify(tokens[0], AUDIENCE)
+    verifier.verify(tokens[1], AUDIENCE)
+    print('stale-if-error with endpoint down: ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Avatar processing: peak RSS and latency per image size, old full decode vs images.square_variants.
+
+Run from the backend folder:  python benchmarks/bench_images.py [--sizes 2,12,48] [--repeat 3]
+
+Each measurement runs in a fresh interpreter, so ru_maxrss is the peak for
+that one code path only. "legacy" is the handler code this replaced: full
+decode, convert('RGB'), center crop, JPEG quality 90 at source resolution.
+"variants" is square_variants with 64/256/512 in WebP and JPEG.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+WORKER = r'''
+import io, json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+path, mode, repeat = sys.argv[2], sys.argv[3], int(sys.argv[4])
+with open(path, 'rb') as f:
+    data = f.read()
+from PIL import Image
+import images
+
+def legacy(data):
+    img = Image.open(io.BytesIO(data)).convert('RGB')
+    w, h = img.size
+    side = min(w, h)
+    left, top = (w - side) // 2, (h - side) // 2
+    buf = io.BytesIO()
+    img.crop((left, top, left + side, top + side)).save(buf, format='JPEG', quality=90)
+    return buf.getvalue()
+
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+times = []
+for _ in range(repeat):
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        out = len(legacy(data))
+    else:
+        out = sum(len(v) for v in images.square_variants(data).values())
+    times.append(time.perf_counter() - t0)
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"ms": min(times) * 1000, "peak_mb": peak / 1024, "delta_mb": (peak - base) / 1024, "out_kb": out / 1024}))
+'''
+
+
+MAKE = r'''
+import sys
+from PIL import Image
+path, megapixels = sys.argv[1], float(sys.argv[2])
+width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+height = width * 3 // 4
+tile = Image.effect_noise((512, 512), 64).convert('RGB')
+img = Image.new('RGB', (width, height))
+for x in range(0, width, 512):
+    for y in range(0, height, 512):
+        img.paste(tile, (x, y))
+img.save(path, format='JPEG', quality=92)
+print(width, height)
+'''
+
+
+def _make_jpeg(path, megapixels):
+    """Write a 4:3 noisy JPEG in a child process; Linux carries ru_maxrss across fork/exec,
+    so building a 48MP bitmap here would inflate every later measurement."""
+    out = subprocess.run([sys.executable, '-c', MAKE, path, str(megapixels)],
+                         capture_output=True, text=True, check=True)
+    w, h = out.stdout.split()
+    return int(w), int(h)
+
+
+def _measure(path, mode, repeat):
+    out = subprocess.run([sys.executable, '-c', WORKER, BACKEND, path, mode, str(repeat)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='2,12,48', help='source sizes in megapixels')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(f"{'source':>16} {'mode':>9} {'best ms':>9} {'peak MB':>9} {'+MB':>8} {'out KB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in [float(s) for s in args.sizes.split(',')]:
+            path = os.path.join(tmp, f'{mp}mp.jpg')
+            w, h = _make_jpeg(path, mp)
+            for mode in ('legacy', 'variants'):
+                r = _measure(path, mode, args.repeat)
+                print(f"{f'{w}x{h}':>16} {mode:>9} {r['ms']:9.1f} {r['peak_mb']:9.1f} "
+                      f"{r['delta_mb']:8.1f} {r['out_kb']:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Journal write throughput, recovery time and crash consistency (see journal.py).
+
+Run from the backend folder:
+    python benchmarks/bench_journal.py throughput [--writes 2000] [--threads 1,8,32]
+    python benchmarks/bench_journal.py recovery [--reviews 1000000] [--tail 10000]
+    python benchmarks/bench_journal.py crash [--rounds 20]
+
+throughput  fsync'd review writes per second from N threads. One thread pays
+            one fsync per write; with more threads group commit shares each
+            fsync across the writes queued behind it (records per flush).
+recovery    journals --reviews reviews (fsync off, to build it quickly), then
+            times startup from the journal alone and from a snapshot plus a
+            --tail record tail.
+crash       runs a child that writes reviews from 8 threads (snapshotting
+            every 500 records) and prints each id once write() has returned,
+            SIGKILLs it at a random moment and recovers. Every acknowledged
+            review must be back, intact and exactly once. The last segment
+            then gets a torn record appended, which recovery must truncate.
+            SIGKILL leaves the page cache intact, so this checks the
+            protocol (ordering, framing, snapshot rotation), not the disk.
+            tests/test_journal.py runs a shorter version of these checks.
+"""
+import argparse
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from journal import Journal, JournaledStore, encode  # noqa: E402
+
+RESTAURANTS = [{"id": i, "name": f"Mandi {i}", "location": "Pala, Kottayam"} for i in range(1, 1001)]
+
+
+def _review(i):
+    return {
+        "id": i, "restaurant_id": i % 1000 + 1, "user_email": f"user{i % 5000}@example.com",
+        "user_name": f"user{i % 5000}", "rating": i % 5 + 1,
+        "comment": f"Review {i}: tender meat, good rice", "created_at": "2026-01-01T00:00:00Z",
+    }
+
+
+def _open(directory, **kwargs):
+    journal = Journal(directory, **kwargs)
+    store = JournaledStore(journal, RESTAURANTS)
+    report = journal.recover()
+    return journal, store, report
+
+
+def _dir_mb(directory):
+    return sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory)) / 2 ** 20
+
+
+def throughput(args):
+    print(f"{'threads':>7} {'writes/s':>9} {'records/flush':>13}")
+    for threads in [int(t) for t in args.threads.split(',')]:
+        directory = tempfile.mkdtemp()
+        journal, store, _ = _open(directory, snapshot_every=0)
+        per_thread = max(1, args.writes // threads)
+        ids = iter(range(1, threads * per_thread + 1))
+        lock = threading.Lock()
+
+        def writer():
+            for _ in range(per_thread):
+                with lock:
+                    i = next(ids)
+                store.add_review(_review(i))
+
+        pool = [threading.Thread(target=writer) for _ in range(threads)]
+        t0 = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        seconds = time.perf_counter() - t0
+        total = threads * per_thread
+        print(f"{threads:7d} {total / seconds:9.0f} {total / max(1, journal.flushes):13.1f}")
+        journal.close()
+        shutil.rmtree(directory)
+
+
+def recovery(args):
+    directory = tempfile.mkdtemp()
+    journal, store, _ = _open(directory, fsync=False, snapshot_every=0)
+    t0 = time.perf_counter()
+    for i in range(1, args.reviews + 1):
+        store.add_review(_review(i))
+    journal.close()
+    print(f"wrote {args.reviews} reviews in {time.perf_counter() - t0:.1f}s, journal {_dir_mb(directory):.0f} MiB")
+
+    journal, store, report = _open(directory, fsync=False, snapshot_every=0)
+    print(f"journal only:      {report['seconds']:.2f}s  ({report['records']} records replayed)")
+    t0 = time.perf_counter()
+    journal.snapshot()
+    print(f"snapshot written in {time.perf_counter() - t0:.2f}s, directory {_dir_mb(directory):.0f} MiB")
+    for i in range(args.reviews + 1, args.reviews + args.tail + 1):
+        store.add_review(_review(i))
+    journal.close()
+    del journal, store
+
+    journal, store, report = _open(directory, fsync=False, snapshot_every=0)
+    assert len(store.reviews) == args.reviews + args.tail
+    print(f"snapshot + tail:   {report['seconds']:.2f}s  ({report['snapshot_items']} snapshot items, "
+          f"{report['records']} records replayed)")
+    journal.close()
+    shutil.rmtree(directory)
+
+
+def _child(directory):
+    _, store, _ = _open(directory, snapshot_every=500)
+    start = max((r["id"] for r in store.reviews), default=0) + 1
+    ids = iter(range(start, 10 ** 9))
+    lock = threading.Lock()
+
+    def writer():
+        while True:
+            with lock:
+                i = next(ids)
+            store.add_review(_review(i))
+            with lock:
+                sys.stdout.write(f"{i}\n")
+                sys.stdout.flush()
+
+    for _ in range(8):
+        threading.Thread(target=writer, daemon=True).start()
+    threading.Event().wait()
+
+
+def crash(args):
+    directory = tempfile.mkdtemp()
+    acked = set()
+    rng = random.Random(1)
+    for round_no in range(1, args.rounds + 1):
+        child = subprocess.Popen([sys.executable, __file__, '_child', directory], stdout=subprocess.PIPE, text=True)
+        kill_at = time.time() + rng.uniform(0.3, 1.5)
+        reader = threading.Thread(target=lambda: acked.update(int(line) for line in child.stdout))
+        reader.start()
+        time.sleep(max(0.0, kill_at - time.time()))
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        reader.join()
+
+        journal, store, report = _open(directory, snapshot_every=0)
+        found = {r["id"]: r for r in store.reviews}
+        missing = acked - found.keys()
+        broken = [i for i, r in found.items() if r != _review(i)]
+        assert len(found) == len(store.reviews), 'duplicate reviews after recovery'
+        assert not missing, f'{len(missing)} acknowledged reviews lost, e.g. {sorted(missing)[:5]}'
+        assert not broken, f'{len(broken)} reviews recovered with different content'
+        journal.close()
+        del journal, store
+        print(f"round {round_no:2d}: {len(acked):6d} acked, {len(found):6d} recovered, "
+              f"snapshot {report['snapshot']}, {report['records']} tail records, "
+              f"{report['truncated_bytes']} bytes truncated")
+
+    # A torn write: half a record at the end of the last segment
+    segment = sorted(n for n in os.listdir(directory) if n.startswith('journal-'))[-1]
+    frame = encode('review', _review(10 ** 8))
+    with open(os.path.join(directory, segment), 'ab') as f:
+        f.write(frame[:len(frame) // 2])
+    journal, store, report = _open(directory, snapshot_every=0)
+    assert report['truncated_bytes'] == len(frame) // 2 and store.get_review(10 ** 8) is None
+    assert acked <= {r["id"] for r in store.reviews}
+    print(f"torn tail: {report['truncated_bytes']} bytes truncated, all {len(acked)} acked reviews intact")
+    journal.close()
+    shutil.rmtree(directory)
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '_child':
+        return _child(sys.argv[2])
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode', choices=['throughput', 'recovery', 'crash'])
+    parser.add_argument('--writes', type=int, default=2000)
+    parser.add_argument('--threads', default='1,8,32')
+    parser.add_argument('--reviews', type=int, default=1_000_000)
+    parser.add_argument('--tail', type=int, default=10_000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+    print(f"cpus={os.cpu_count()}")
+    {'throughput': throughput, 'recovery': recovery, 'crash': crash}[args.mode](args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Read latency during a login storm: inline hashing vs the hashing pool vs pool + rate limits.
+
+Run from the backend folder:  python benchmarks/bench_login_storm.py [--storm 32] [--seconds 10]
+
+For each mode it starts serve.py (one worker, in-memory), signs up a few
+users, then runs --storm threads that log in as fast as they can (honouring
+Retry-After on 429/503) while one reader thread requests a listing page. It
+reports the reader's p50/p99 with and without the storm, and how the storm's
+logins were answered.
+
+  inline  PASSWORD_HASH_WORKERS=0, no rate limits (the old behaviour)
+  pool    hashing on PASSWORD_HASH_WORKERS=1 thread, no rate limits
+  limits  pool plus the default per-IP/per-email token buckets
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_workers import BACKEND, _free_port, _request, _wait_ready
+
+MODES = {
+    'inline': {'PASSWORD_HASH_WORKERS': '0', 'AUTH_RATE_PER_IP': '0', 'AUTH_RATE_PER_EMAIL': '0'},
+    'pool': {'PASSWORD_HASH_WORKERS': '1', 'AUTH_RATE_PER_IP': '0', 'AUTH_RATE_PER_EMAIL': '0'},
+    'limits': {'PASSWORD_HASH_WORKERS': '1'},
+}
+USERS = 8
+READ_PATH = '/api/restaurants?limit=12&sort=rating_desc'
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float('nan')
+
+
+def _read_for(base, seconds):
+    latencies = []
+    stop_at = time.time() + seconds
+    while time.time() < stop_at:
+        t0 = time.perf_counter()
+        _request(base, READ_PATH)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def run(mode, storm, seconds):
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, **MODES[mode])
+    env.pop('DATABASE_PATH', None)
+    proc = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', '1', '--port', str(port)],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base)
+        for i in range(USERS):
+            _request(base, '/auth/signup', 'POST', {"email": f"storm{i}@example.com", "password": "secret123"})
+        quiet = _read_for(base, min(seconds, 3))
+
+        lock = threading.Lock()
+        answers = {}
+        stop_at = time.time() + seconds
+
+        def login():
+            rnd = random.Random()
+            while time.time() < stop_at:
+                body = {"email": f"storm{rnd.randrange(USERS)}@example.com", "password": "secret123"}
+                try:
+                    status, _ = _request(base, '/auth/login', 'POST', body)
+                except urllib.error.HTTPError as ex:
+                    status = ex.code
+                    if status in (429, 503):
+                        # Well-behaved client: wait as told (a client that ignores this still only
+                        # gets cheap 429s, but can flood the server with them)
+                        time.sleep(min(float(ex.headers.get('Retry-After') or 1), max(0.0, stop_at - time.time())))
+                except Exception:
+                    status = 'error'
+                with lock:
+                    answers[status] = answers.get(status, 0) + 1
+
+        pool = [threading.Thread(target=login) for _ in range(storm)]
+        for t in pool:
+            t.start()
+        time.sleep(0.5)
+        loaded = _read_for(base, seconds - 1)
+        for t in pool:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    print(f"{mode:>7} {_percentile(quiet, 0.5):8.1f} {_percentile(quiet, 0.99):8.1f} "
+          f"{_percentile(loaded, 0.5):9.1f} {_percentile(loaded, 0.99):9.1f}  "
+          f"{json.dumps({str(k): v for k, v in sorted(answers.items(), key=str)})}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--modes', default='inline,pool,limits')
+    parser.add_argument('--storm', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+    print(f"cpus={os.cpu_count()} storm={args.storm} seconds={args.seconds}")
+    print(f"{'mode':>7} {'quiet p50':>8} {'p99':>8} {'storm p50':>9} {'p99':>9}  login answers")
+    for mode in args.modes.split(','):
+        run(mode, args.storm, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark review inserts and listing reads: in-memory Store vs SqliteStore (WAL).
+
+Run from the backend folder:  python benchmarks/bench_sqlite.py [reviews] [threads]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from db import ConnectionPool  # noqa: E402
+from sqlite_store import SqliteStore  # noqa: E402
+from store import Store  # noqa: E402
+
+N_RESTAURANTS = 1_000
+
+
+def _review(i):
+    return {
+        "id": i,
+        "restaurant_id": random.randint(1, N_RESTAURANTS),
+        "user_email": f"user{random.randint(1, 5_000)}@example.com",
+        "user_name": "user",
+        "rating": random.randint(1, 5),
+        "comment": "Tender meat, good rice",
+        "created_at": "2025-01-01T00:00:00Z",
+    }
+
+
+def _run(label, store, n_reviews, threads):
+    t0 = time.perf_counter()
+    for i in range(1, n_reviews + 1):
+        store.add_review(_review(i))
+    insert_s = time.perf_counter() - t0
+
+    reads_per_thread = 2_000
+    def reader():
+        for _ in range(reads_per_thread):
+            store.reviews_for_restaurant(random.randint(1, N_RESTAURANTS))
+
+    workers = [threading.Thread(target=reader) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    read_s = time.perf_counter() - t0
+    print(f"{label:<10} inserts {n_reviews / insert_s:12,.0f}/s   "
+          f"listing reads ({threads} threads) {threads * reads_per_thread / read_s:12,.0f}/s")
+
+
+def main(n_reviews=20_000, threads=4):
+    random.seed(7)
+    restaurants = [{"id": i, "name": f"Mandi {i}"} for i in range(1, N_RESTAURANTS + 1)]
+    _run("memory", Store(restaurants), n_reviews, threads)
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, 'bench.sqlite3'))
+        _run("sqlite", SqliteStore(pool, restaurants), n_reviews, threads)
+        pool.close_all()
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,62 @@
+"""Benchmark indexed Store lookups against the old linear scans.
+
+Run from the backend folder:  python benchmarks/bench_store.py [restaurants] [reviews]
+Defaults to 10k restaurants and 1M reviews.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from store import Store  # noqa: E402
+
+
+def _timeit(label, fn, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {per_call * 1e6:12.1f} us/op")
+    return per_call
+
+
+def main(n_restaurants=10_000, n_reviews=1_000_000):
+    random.seed(42)
+    restaurants = [{"id": i, "name": f"Mandi {i}", "location": "Pala, Kottayam"} for i in range(1, n_restaurants + 1)]
+    store = Store(restaurants)
+
+    t0 = time.perf_counter()
+    for i in range(1, n_reviews + 1):
+        store.add_review({
+            "id": i,
+            "restaurant_id": random.randint(1, n_restaurants),
+            "user_email": f"user{random.randint(1, 50_000)}@example.com",
+            "rating": random.randint(1, 5),
+            "comment": "",
+            "created_at": "",
+        })
+    load = time.perf_counter() - t0
+    print(f"loaded {n_restaurants} restaurants / {n_reviews} reviews in {load:.2f}s")
+
+    rid = n_restaurants // 2
+    review_id = n_reviews // 2
+    email = "user123@example.com"
+
+    print("-- linear scan (before)")
+    _timeit("restaurant by id", lambda: next(r for r in store.restaurants if r["id"] == rid), repeat=50)
+    _timeit("reviews for restaurant", lambda: [r for r in store.reviews if r["restaurant_id"] == rid], repeat=5)
+    _timeit("review by id", lambda: next(r for r in store.reviews if r["id"] == review_id), repeat=5)
+    _timeit("reviews for user", lambda: [r for r in store.reviews if r["user_email"] == email], repeat=5)
+
+    print("-- indexed (after)")
+    _timeit("restaurant by id", lambda: store.get_restaurant(rid), repeat=100_000)
+    _timeit("reviews for restaurant", lambda: store.reviews_for_restaurant(rid), repeat=100_000)
+    _timeit("review by id", lambda: store.get_review(review_id), repeat=100_000)
+    _timeit("reviews for user", lambda: store.reviews_for_user(email), repeat=100_000)
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,175 @@
+"""Idle-connection cost and fan-out latency of the /api/stream change feed.
+
+Run from the backend folder:  python benchmarks/bench_stream.py [--subscribers 2000] [--reviews 50] [--workers 1]
+
+Starts serve.py (in memory for one worker, on a fresh SQLite database for
+more), opens --subscribers SSE connections from one asyncio client (a
+tenth filtered to one restaurant, a tenth to its district, the rest
+unfiltered), then posts --reviews reviews to that restaurant and to others.
+It reports the server's thread count and RSS before and after the
+connections were opened, how long each event took from sending the POST
+to reaching every subscriber (p50/p99/max), and checks that each subscriber
+received exactly the events its filters match. The main server port
+redirects /api/stream to --stream-port; the bench connects there directly.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_workers import BACKEND, _free_port, _request, _wait_ready
+
+TARGET = 7  # restaurant the filtered subscribers follow
+
+
+def _proc_stats(pid):
+    threads, rss = 0, 0
+    for proc in [pid] + [int(p) for p in open(f'/proc/{pid}/task/{pid}/children').read().split()]:
+        with open(f'/proc/{proc}/status') as f:
+            for line in f:
+                if line.startswith('Threads:'):
+                    threads += int(line.split()[1])
+                elif line.startswith('VmRSS:'):
+                    rss += int(line.split()[1]) / 1024
+    return threads, rss
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else float('nan')
+
+
+class Client:
+    """All subscriber connections on one event loop in a background thread."""
+    def __init__(self, port):
+        self.port = port
+        self.received = {}  # subscriber index -> [(review id, arrival time)]
+        self.tasks = []  # the loop only keeps weak references to tasks
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    async def _subscribe(self, index, query, opened):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port, limit=1 << 20)
+        writer.write(f'GET /api/stream{query} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n'.encode())
+        await reader.readuntil(b'\r\n\r\n')
+        opened.append(index)
+        events = self.received.setdefault(index, [])
+        while True:
+            try:
+                block = await reader.readuntil(b'\n\n')
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return  # server stopped
+            for line in block.decode().split('\n'):
+                if line.startswith('data: '):
+                    data = json.loads(line[6:])
+                    if 'review' in data:
+                        events.append((data['review']['id'], time.perf_counter()))
+
+    def _start(self, index, query, opened):
+        self.tasks.append(self.loop.create_task(self._subscribe(index, query, opened)))
+
+    def open(self, queries, wave=200):
+        # In waves, so the burst of connects does not overflow the listen backlog (SYN retries take seconds)
+        opened = []
+        for start in range(0, len(queries), wave):
+            for i in range(start, min(start + wave, len(queries))):
+                self.loop.call_soon_threadsafe(self._start, i, queries[i], opened)
+            while len(opened) < min(start + wave, len(queries)):
+                time.sleep(0.01)
+
+    def close(self):
+        async def cancel():
+            for task in self.tasks:
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        asyncio.run_coroutine_threadsafe(cancel(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--subscribers', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    port, stream_port = _free_port(), _free_port()
+    base = f'http://127.0.0.1:{port}'
+    env = dict(os.environ, CATALOG_POLL_INTERVAL='0', AUTH_RATE_PER_IP='0', AUTH_RATE_PER_EMAIL='0')
+    env.pop('DATABASE_PATH', None)
+    if args.workers > 1:
+        env['DATABASE_PATH'] = os.path.join(tmp, 'stream.sqlite3')
+    proc = subprocess.Popen(
+        [sys.executable, 'serve.py', '--workers', str(args.workers), '--port', str(port), '--stream-port', str(stream_port)],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(base)
+        _request(base, '/auth/signup', 'POST', {"email": "stream@example.com", "password": "secret123"})
+        _, login = _request(base, '/auth/login', 'POST', {"email": "stream@example.com", "password": "secret123"})
+        token = login['access_token']
+        _, target = _request(base, f'/api/restaurants/{TARGET}')
+        district = target['location'].split(',')[-1].strip()
+        _, listing = _request(base, '/api/restaurants')
+        same_district = {r['id'] for r in listing if r['location'].split(',')[-1].strip().lower() == district.lower()}
+        time.sleep(1)
+        threads_before, rss_before = _proc_stats(proc.pid)
+
+        queries = []
+        for i in range(args.subscribers):
+            queries.append(f'?restaurant_id={TARGET}' if i % 10 == 0 else f'?district={district}' if i % 10 == 1 else '')
+        client = Client(stream_port)
+        t0 = time.perf_counter()
+        client.open(queries)
+        opened_in = time.perf_counter() - t0
+        time.sleep(1)
+        threads_after, rss_after = _proc_stats(proc.pid)
+
+        posted = {}  # review id -> (restaurant id, time the POST was sent)
+        others = [rid for rid in (1, 2, 3, 4, 5, 6, 8, 9) if rid != TARGET]
+        for n in range(args.reviews):
+            rid = TARGET if n % 2 == 0 else others[n % len(others)]
+            sent = time.perf_counter()
+            _, review = _request(base, f'/api/restaurants/{rid}/reviews', 'POST',
+                                 {"rating": 4, "comment": f"stream bench {n}"}, token)
+            posted[review['id']] = (rid, sent)
+            time.sleep(0.02)
+        time.sleep(2)
+        client.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    latencies, wrong = [], 0
+    for i, query in enumerate(queries):
+        got = client.received.get(i, [])
+        ids = [rv for rv, _ in got]
+        if 'restaurant_id' in query:
+            expected = [rv for rv, (rid, _) in posted.items() if rid == TARGET]
+        elif 'district' in query:
+            expected = [rv for rv, (rid, _) in posted.items() if rid in same_district]
+        else:
+            expected = list(posted)
+        if sorted(ids) != sorted(expected):
+            wrong += 1
+        latencies.extend(arrived - posted[rv][1] for rv, arrived in got if rv in posted)
+
+    print(f"cpus={os.cpu_count()} workers={args.workers} subscribers={args.subscribers} reviews={args.reviews}")
+    print(f"opened {len(queries)} streams in {opened_in:.2f}s")
+    print(f"server threads {threads_before} -> {threads_after}, rss {rss_before:.0f} -> {rss_after:.0f} MiB "
+          f"({(rss_after - rss_before) * 1024 / max(1, args.subscribers):.1f} KiB per stream)")
+    print(f"delivery from POST: p50 {_percentile(latencies, 0.5):.1f} ms, p99 {_percentile(latencies, 0.99):.1f} ms, "
+          f"max {max(latencies) * 1000 if latencies else float('nan'):.1f} ms over {len(latencies)} deliveries")
+    print(f"subscribers with missing/extra/duplicate events: {wrong}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,279 @@
+"""End-to-end benchmark suite with a regression baseline.
+
+Run from the backend folder:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--modes client,http]
+                                     [--baseline benchmarks/baseline.json] [--save-baseline]
+
+For each catalog size it generates the Kerala dataset (RESTAURANT_COUNT) and
+a SQLite database with synthetic users, reviews and photos, then drives every
+main endpoint:
+
+  listing    /api/restaurants?limit=20 with district filters and sorts
+  detail     /api/restaurants/<id>/detail
+  search     /api/restaurants/search/<query>
+  reviews    /api/restaurants/<id>/reviews?limit=20
+  timeline   /api/me/reviews?limit=20 (signed in)
+  account    /api/accounts/<id>/reviews?limit=20
+  create     POST /api/restaurants/<id>/reviews (signed in)
+
+"client" imports the app in a child process and calls it through Flask's
+test client, one request at a time (handler cost without HTTP). "http" starts
+serve.py and runs --threads concurrent clients for --seconds per endpoint.
+Each result is ops/s, p50 and p99 in ms.
+
+With --baseline, results are compared to the stored ones (same mode, size and
+endpoint) and the run exits 1 if any p99 grew, or throughput dropped, by more
+than --tolerance. --save-baseline writes this run's results there instead.
+Baselines are machine-specific; compare runs from the same host.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from load_workers import BACKEND, _free_port, _request, _wait_ready  # noqa: E402
+
+ENDPOINTS = ('listing', 'detail', 'search', 'reviews', 'timeline', 'account', 'create')
+DISTRICTS = ('', 'Kottayam', 'Ernakulam', 'Kozhikode', 'Thrissur', 'Kannur')
+SORTS = ('rating_desc', 'reviews_desc', 'name_asc')
+QUERIES = ('mandhi', 'chicken', 'al faham', 'kottayam', 'tender rice', 'barkas')
+COMMENTS = ('Tender meat, good rice', 'Chicken mandhi was juicy', 'Al faham a bit dry',
+            'Great kuzhimandhi, will come back', 'Spicy chutney, generous portions', 'Slow service but tasty')
+PASSWORD = 'bench-password'
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def build_database(path, restaurants, users, reviews_per_restaurant, photos_per_review, seed=7):
+    """Fill a fresh SQLite database with users/accounts, reviews and ready photos; returns (emails, account_ids)."""
+    from db import ConnectionPool
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(seed)
+    pool = ConnectionPool(path)
+    conn = pool.connection()
+    password_hash = generate_password_hash(PASSWORD, 'pbkdf2:sha256:1000')
+    emails = [f'user{i}@bench.test' for i in range(users)]
+    account_ids = [str(1_000_000_000 + i) for i in range(users)]
+    n_reviews = restaurants * reviews_per_restaurant
+    with conn:
+        conn.executemany("INSERT INTO auth_users (email, name, password_hash, auth_provider) VALUES (?, ?, ?, 'password')",
+                         ((e, f'User {i}', password_hash) for i, e in enumerate(emails)))
+        conn.executemany("INSERT INTO accounts (id, name, created_at, user_email) VALUES (?, ?, ?, ?)",
+                         ((a, f'User {i}', '2025-01-01T00:00:00Z', emails[i]) for i, a in enumerate(account_ids)))
+        conn.executemany(
+            "INSERT INTO reviews (id, restaurant_id, user_email, user_name, rating, comment, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((i, rng.randint(1, restaurants), emails[u], f'User {u}', rng.randint(1, 5), rng.choice(COMMENTS),
+              f'2025-{1 + i * 12 // (n_reviews + 1):02d}-01T00:00:00Z')
+             for i, u in ((i, rng.randrange(users)) for i in range(1, n_reviews + 1))))
+        photo_rows = []
+        for review_id, restaurant_id, email in conn.execute("SELECT id, restaurant_id, user_email FROM reviews"):
+            if rng.random() < photos_per_review:
+                photo_rows.append((len(photo_rows) + 1, review_id, restaurant_id, email,
+                                   f'/fake-uploads/bmit/reviews/{review_id}.jpg'))
+        conn.executemany("INSERT INTO photos (id, review_id, restaurant_id, user_email, url, status, created_at) "
+                         "VALUES (?, ?, ?, ?, ?, 'ready', '2025-01-01T00:00:00Z')", photo_rows)
+    pool.close_all()
+    return emails, account_ids
+
+
+def make_request(endpoint, rng, ctx):
+    """(method, path, body, token) for one request of endpoint."""
+    rid = rng.randint(1, ctx['restaurants'])
+    token = rng.choice(ctx['tokens'])
+    if endpoint == 'listing':
+        district = rng.choice(DISTRICTS)
+        path = f'/api/restaurants?limit=20&sort={rng.choice(SORTS)}' + (f'&district={district}' if district else '')
+        return 'GET', path, None, None
+    if endpoint == 'detail':
+        return 'GET', f'/api/restaurants/{rid}/detail', None, None
+    if endpoint == 'search':
+        return 'GET', f'/api/restaurants/search/{quote(rng.choice(QUERIES))}', None, None
+    if endpoint == 'reviews':
+        return 'GET', f'/api/restaurants/{rid}/reviews?limit=20', None, None
+    if endpoint == 'timeline':
+        return 'GET', '/api/me/reviews?limit=20', None, token
+    if endpoint == 'account':
+        return 'GET', f'/api/accounts/{rng.choice(ctx["account_ids"])}/reviews?limit=20', None, None
+    if endpoint == 'create':
+        return 'POST', f'/api/restaurants/{rid}/reviews', {"rating": rng.randint(1, 5), "comment": rng.choice(COMMENTS)}, token
+    raise ValueError(endpoint)
+
+
+def _summary(latencies, elapsed, errors):
+    latencies.sort()
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3) if latencies else None
+    return {"ops": round(len(latencies) / elapsed, 1) if elapsed else 0.0, "p50_ms": pick(0.5),
+            "p99_ms": pick(0.99), "requests": len(latencies), "errors": errors}
+
+
+def _env(size, db_path):
+    return dict(os.environ, DATABASE_PATH=db_path, RESTAURANT_COUNT=str(size), UPLOAD_BACKEND='fake',
+                AUTH_RATE_PER_IP='0', AUTH_RATE_PER_EMAIL='0', SLOW_REQUEST_MS='0')
+
+
+def run_client(ctx, requests_per_endpoint):
+    """Child process: drive the app through Flask's test client; prints results as JSON."""
+    import app as app_module
+    client = app_module.app.test_client()
+    ctx['tokens'] = [client.post('/auth/login', json={"email": e, "password": PASSWORD}).get_json()['access_token']
+                     for e in ctx['emails'][:16]]
+    rng = random.Random(11)
+    results = {}
+    for endpoint in ENDPOINTS:
+        latencies, errors = [], 0
+        # Warm caches the same way a running server would be
+        for _ in range(min(50, requests_per_endpoint)):
+            method, path, body, token = make_request(endpoint, rng, ctx)
+            client.open(path, method=method, json=body, headers={'Authorization': f'Bearer {token}'} if token else {})
+        t0 = time.perf_counter()
+        for _ in range(requests_per_endpoint):
+            method, path, body, token = make_request(endpoint, rng, ctx)
+            start = time.perf_counter()
+            resp = client.open(path, method=method, json=body,
+                               headers={'Authorization': f'Bearer {token}'} if token else {})
+            resp.get_data()
+            latencies.append(time.perf_counter() - start)
+            errors += resp.status_code >= 400
+        results[endpoint] = _summary(latencies, time.perf_counter() - t0, errors)
+    print(json.dumps(results))
+
+
+def run_http(ctx, size, db_path, workers, threads, seconds):
+    port = _free_port()
+    base = f'http://127.0.0.1:{port}'
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port)],
+                            cwd=BACKEND, env=_env(size, db_path), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        _wait_ready(base, timeout=300)
+        ctx['tokens'] = [_request(base, '/auth/login', 'POST', {"email": e, "password": PASSWORD})[1]['access_token']
+                         for e in ctx['emails'][:16]]
+        for endpoint in ENDPOINTS:
+            lock = threading.Lock()
+            latencies, errors = [], [0]
+            stop_at = time.time() + seconds
+
+            def client(seed):
+                rng = random.Random(seed)
+                local, failed = [], 0
+                while time.time() < stop_at:
+                    method, path, body, token = make_request(endpoint, rng, ctx)
+                    start = time.perf_counter()
+                    try:
+                        _request(base, path, method, body, token)
+                    except Exception:
+                        failed += 1
+                        continue
+                    local.append(time.perf_counter() - start)
+                with lock:
+                    latencies.extend(local)
+                    errors[0] += failed
+
+            pool = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+            t0 = time.perf_counter()
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+            results[endpoint] = _summary(latencies, time.perf_counter() - t0, errors[0])
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Regression messages for results that are worse than baseline by more than tolerance."""
+    problems = []
+    for key, now in sorted(results.items()):
+        before = baseline.get(key)
+        if not before or not before.get('p99_ms') or not now.get('p99_ms'):
+            continue
+        if now['p99_ms'] > before['p99_ms'] * (1 + tolerance):
+            problems.append(f"{key}: p99 {before['p99_ms']} -> {now['p99_ms']} ms")
+        if now['ops'] < before['ops'] * (1 - tolerance):
+            problems.append(f"{key}: throughput {before['ops']} -> {now['ops']} ops/s")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--modes', default='client,http')
+    parser.add_argument('--reviews-per-restaurant', type=int, default=5)
+    parser.add_argument('--photos-per-review', type=float, default=0.2)
+    parser.add_argument('--requests', type=int, default=500, help='client mode: requests per endpoint')
+    parser.add_argument('--threads', type=int, default=8, help='http mode: concurrent clients')
+    parser.add_argument('--seconds', type=float, default=5, help='http mode: seconds per endpoint')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='http mode: serve.py workers')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with open(args.child) as f:
+            ctx = json.load(f)
+        run_client(ctx, args.requests)
+        return
+
+    results = {}
+    print(f"{'run':<28} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for size in [int(s) for s in args.sizes.split(',')]:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'bench.sqlite3')
+            users = max(100, size // 2)
+            t0 = time.perf_counter()
+            emails, account_ids = build_database(db_path, size, users, args.reviews_per_restaurant, args.photos_per_review)
+            print(f'# {size} restaurants, {users} users, {size * args.reviews_per_restaurant} reviews '
+                  f'(built in {time.perf_counter() - t0:.1f}s)')
+            ctx = {"restaurants": size, "emails": emails, "account_ids": account_ids}
+            for mode in args.modes.split(','):
+                if mode == 'client':
+                    ctx_path = os.path.join(tmp, 'ctx.json')
+                    with open(ctx_path, 'w') as f:
+                        json.dump(ctx, f)
+                    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', ctx_path,
+                                          '--requests', str(args.requests)],
+                                         cwd=BACKEND, env=_env(size, db_path), capture_output=True, text=True, check=True)
+                    by_endpoint = json.loads(out.stdout.strip().splitlines()[-1])
+                else:
+                    by_endpoint = run_http(dict(ctx), size, db_path, args.workers, args.threads, args.seconds)
+                for endpoint, r in by_endpoint.items():
+                    key = f'{mode}/{size}/{endpoint}'
+                    results[key] = r
+                    print(f"{key:<28} {r['ops']:9.1f} {r['p50_ms'] or 0:9.2f} {r['p99_ms'] or 0:9.2f} {r['errors']:7d}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"meta": {"python": platform.python_version(), "cpus": os.cpu_count(),
+                                "created": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())},
+                       "results": results}, f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f'Baseline written to {args.baseline}')
+        return
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+        problems = compare(results, baseline, args.tolerance)
+        for p in problems:
+            print('REGRESSION', p)
+        if problems:
+            sys.exit(1)
+        print(f'No regressions beyond {args.tolerance:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
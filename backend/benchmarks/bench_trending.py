@@ -0,0 +1,79 @@
+"""Trending engine cost: record() throughput, memory per restaurant and top-K recompute time.
+
+Run from the backend folder:  python benchmarks/bench_trending.py [--restaurants 10000] [--events 1000000]
+
+Records --events reviews spread over the last 7 days across --restaurants
+restaurants (a few hot ones get a burst in the last hour) and reports:
+
+  record        events per second through Trending.record_review
+  memory        tracemalloc size of the counters after 10% and after 100% of
+                the events; it should not grow with the event count
+  recompute     time to rebuild the top-K snapshot (every window, overall and
+                per district), and a read from the snapshot afterwards
+  hot spots     whether the burst restaurants lead the 24h board
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from trending import Trending  # noqa: E402
+
+DISTRICTS = ['thrissur', 'ernakulam', 'kozhikode', 'malappuram', 'kannur', 'kollam', 'palakkad']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--restaurants', type=int, default=10_000)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    now = time.time()
+    hot = set(rng.sample(range(1, args.restaurants + 1), 5))
+    events = []
+    for _ in range(args.events):
+        if rng.random() < 0.002:
+            events.append((rng.choice(sorted(hot)), now - rng.uniform(0, 3600)))
+        else:
+            events.append((rng.randint(1, args.restaurants), now - rng.uniform(0, 7 * 86400)))
+    events.sort(key=lambda e: e[1])  # arrival order
+    reviews = [{"restaurant_id": rid, "rating": 4} for rid, _ in events]
+
+    tracemalloc.start()
+    trending = Trending(lambda rid: DISTRICTS[rid % len(DISTRICTS)], refresh=0)
+    tenth = len(events) // 10
+    early = 0
+    t0 = time.perf_counter()
+    for i, (review, (_, at)) in enumerate(zip(reviews, events)):
+        trending.record_review(review, at=at)
+        if i + 1 == tenth:
+            early = tracemalloc.get_traced_memory()[0]
+    seconds = time.perf_counter() - t0
+    late = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"cpus={os.cpu_count()} restaurants={args.restaurants} events={args.events} tracked={len(trending)}")
+    print(f"record: {args.events / seconds:,.0f} events/s ({seconds / args.events * 1e6:.2f} us each, tracemalloc on)")
+    print(f"memory: {early / 2 ** 20:.1f} MiB after {tenth:,} events, {late / 2 ** 20:.1f} MiB after {len(events):,} "
+          f"({late / max(1, len(trending)):.0f} B per restaurant)")
+
+    t0 = time.perf_counter()
+    trending.generation()
+    recompute = time.perf_counter() - t0
+    trending.refresh = 3600
+    t0 = time.perf_counter()
+    for _ in range(10_000):
+        top = trending.top('24h', '', 10)
+    read = (time.perf_counter() - t0) / 10_000
+    print(f"recompute: {recompute * 1000:.0f} ms, snapshot read: {read * 1e6:.2f} us")
+    leaders = {rid for rid, *_ in top[:len(hot)]}
+    print(f"hot spots leading 24h: {len(leaders & hot)}/{len(hot)}  top: {top[:3]}")
+
+
+if __name__ == '__main__':
+    main()
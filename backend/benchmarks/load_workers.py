@@ -0,0 +1,126 @@
+"""Load test for multi-worker mode: throughput vs worker count, plus id/write integrity.
+
+Run from the backend folder:  python benchmarks/load_workers.py [--workers 1,2,4] [--threads 16] [--seconds 10]
+
+For each worker count it starts serve.py on a fresh SQLite database, drives a
+read-heavy mix (listing pages, detail, reviews) with ~10% review creation
+from many client threads, then checks that every created review got a
+distinct id and that the database holds exactly the reviews that were
+acknowledged.
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _request(base, path, method='GET', body=None, token=None):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method)
+    req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status, json.loads(resp.read() or b'null')
+
+
+def _wait_ready(base, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _request(base, '/')
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError('server did not start')
+
+
+def run(workers, threads, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'load.sqlite3')
+        port = _free_port()
+        base = f'http://127.0.0.1:{port}'
+        env = dict(os.environ, DATABASE_PATH=db_path)
+        proc = subprocess.Popen(
+            [sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port)],
+            cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_ready(base)
+            _, body = _request(base, '/auth/signup', 'POST', {"email": "load@example.com", "password": "secret123"})
+            token = body['access_token']
+
+            lock = threading.Lock()
+            created_ids, counts = [], {"ok": 0, "err": 0}
+            stop_at = time.time() + seconds
+
+            def client():
+                rnd = random.Random()
+                while time.time() < stop_at:
+                    rid = rnd.randint(1, 100)
+                    try:
+                        if rnd.random() < 0.1:
+                            _, review = _request(base, f'/api/restaurants/{rid}/reviews', 'POST',
+                                                 {"rating": rnd.randint(1, 5), "comment": "load"}, token)
+                            with lock:
+                                created_ids.append(review['id'])
+                        else:
+                            path = rnd.choice([f'/api/restaurants?limit=20&sort=rating_desc',
+                                               f'/api/restaurants/{rid}', f'/api/restaurants/{rid}/reviews'])
+                            _request(base, path)
+                        with lock:
+                            counts["ok"] += 1
+                    except Exception:
+                        with lock:
+                            counts["err"] += 1
+
+            pool = [threading.Thread(target=client) for _ in range(threads)]
+            t0 = time.time()
+            for t in pool:
+                t.start()
+            for t in pool:
+                t.join()
+            elapsed = time.time() - t0
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM reviews").fetchone()
+        conn.close()
+        dupes = len(created_ids) - len(set(created_ids))
+        lost = len(created_ids) - stored[0]
+        print(f"workers={workers:<2} req/s={counts['ok'] / elapsed:8.1f}  errors={counts['err']:<4} "
+              f"reviews={len(created_ids):<5} duplicate_ids={dupes} lost_writes={lost}")
+        return dupes == 0 and lost == 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+    print(f"cpus={os.cpu_count()} threads={args.threads} seconds={args.seconds}")
+    ok = all([run(int(w), args.threads, args.seconds) for w in args.workers.split(',')])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
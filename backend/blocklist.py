@@ -0,0 +1,163 @@
+"""Revoked-token (JTI) blocklist that forgets tokens once they have expired.
+
+Every revocation is stored with the token's exp; after that moment the JWT
+layer rejects the token on its own, so the entry can go. Memory is bounded by
+the number of logouts within one token lifetime instead of growing forever.
+
+TokenBlocklist keeps {jti: exp} plus a heap ordered by exp in process memory.
+SqliteTokenBlocklist keeps the rows in the shared database (so every worker
+process sees a logout) and puts a BloomFilter in front: almost every request
+carries a token that was never revoked, and for those the filter answers "no"
+without touching SQLite. Only filter hits are confirmed with a query. Other
+workers' revocations reach the filter through change_log ('revoke' entries,
+see app._sync_shared_state), i.e. within SHARED_SYNC_INTERVAL. Expired rows are purged, and the filter rebuilt
+from what is left, every BLOCKLIST_PURGE_INTERVAL seconds.
+"""
+import hashlib
+import heapq
+import math
+import os
+import struct
+import threading
+import time
+
+# Used for tokens without an exp claim and for rows written before exp was stored
+DEFAULT_TTL = float(os.environ.get('BLOCKLIST_DEFAULT_TTL', str(12 * 3600)))
+PURGE_INTERVAL = float(os.environ.get('BLOCKLIST_PURGE_INTERVAL', '300'))
+BLOOM_CAPACITY = int(os.environ.get('BLOCKLIST_BLOOM_CAPACITY', '10000'))
+BLOOM_ERROR_RATE = 0.001
+
+
+def _expiry(expires_at):
+    return float(expires_at) if expires_at else time.time() + DEFAULT_TTL
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives, about error_rate false positives
+    while it holds at most capacity items."""
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        bits = -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        # Power-of-two size so a probe is a mask; each probe is 4 bytes of one blake2b digest (max 64)
+        self.size = 1 << max(3, math.ceil(math.log2(bits)))
+        self.hashes = min(16, max(1, round(bits / self.capacity * math.log(2))))
+        self.count = 0
+        self._mask = self.size - 1
+        self._unpack = struct.Struct(f'<{self.hashes}I').unpack
+        self._bits = bytearray(self.size // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * self.hashes).digest()
+        return [pos & self._mask for pos in self._unpack(digest)]
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        # Hot path (every authenticated request): inlined, and stops at the first clear bit
+        bits, mask = self._bits, self._mask
+        for pos in self._unpack(hashlib.blake2b(item.encode('utf-8'), digest_size=4 * self.hashes).digest()):
+            pos &= mask
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class TokenBlocklist:
+    """In-process blocklist; a dict lookup is already the fast path, so no filter in front."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expires = {}  # jti -> exp (unix seconds)
+        self._heap = []     # (exp, jti), soonest first
+
+    def __len__(self):
+        return len(self._expires)
+
+    def revoke(self, jti: str, expires_at=None):
+        exp = _expiry(expires_at)
+        with self._lock:
+            self._purge(time.time())
+            if jti not in self._expires:
+                self._expires[jti] = exp
+                heapq.heappush(self._heap, (exp, jti))
+
+    def is_revoked(self, jti: str) -> bool:
+        exp = self._expires.get(jti)
+        return exp is not None and exp > time.time()
+
+    def _purge(self, now: float):
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, jti = heapq.heappop(heap)
+            self._expires.pop(jti, None)
+
+    def purge(self):
+        with self._lock:
+            self._purge(time.time())
+
+
+class SqliteTokenBlocklist:
+    def __init__(self, pool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        conn = pool.connection()
+        with conn:
+            # Rows from before exp was recorded get one full token lifetime from now
+            conn.execute("UPDATE token_blocklist SET expires_at = ? WHERE expires_at IS NULL",
+                         (time.time() + DEFAULT_TTL,))
+        self._rebuild()
+
+    def _rebuild(self, blocking: bool = True):
+        """Purge expired rows and refill the filter from the rest (a Bloom filter can't forget)."""
+        # On the request path one thread rebuilds; the rest keep using the current filter
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            conn = self._pool.connection()
+            with conn:
+                conn.execute("DELETE FROM token_blocklist WHERE expires_at <= ?", (time.time(),))
+            jtis = [row[0] for row in conn.execute("SELECT jti FROM token_blocklist")]
+            bloom = BloomFilter(max(BLOOM_CAPACITY, 2 * len(jtis)))
+            for jti in jtis:
+                bloom.add(jti)
+            self._bloom = bloom
+            self._purged_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def _maybe_rebuild(self):
+        stale = time.monotonic() - self._purged_at >= PURGE_INTERVAL
+        if stale or self._bloom.count > self._bloom.capacity:
+            self._rebuild(blocking=False)
+
+    def revoke(self, jti: str, expires_at=None):
+        conn = self._pool.connection()
+        with conn:
+            cur = conn.execute("INSERT OR IGNORE INTO token_blocklist (jti, expires_at) VALUES (?, ?)",
+                               (jti, _expiry(expires_at)))
+            if cur.rowcount == 1:
+                conn.execute("INSERT INTO change_log (kind, ref_id) VALUES ('revoke', ?)", (cur.lastrowid,))
+        with self._lock:
+            self._bloom.add(jti)
+
+    def apply_change(self, ref_id):
+        """Add the jti behind a 'revoke' change_log entry (written by any worker) to the filter."""
+        row = self._pool.connection().execute(
+            "SELECT jti FROM token_blocklist WHERE rowid = ?", (ref_id,)).fetchone()
+        if row:
+            with self._lock:
+                self._bloom.add(row[0])
+
+    def is_revoked(self, jti: str) -> bool:
+        self._maybe_rebuild()
+        if jti not in self._bloom:
+            return False
+        row = self._pool.connection().execute(
+            "SELECT expires_at FROM token_blocklist WHERE jti = ?", (jti,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def purge(self):
+        self._rebuild()
@@ -0,0 +1,194 @@
+"""Presorted and filter indexes over the restaurant catalog.
+
+Backs paginated GET /api/restaurants: restaurants are kept in sorted key
+lists (rating, review count, name) that are updated in O(log n + shift) when
+a restaurant's rating changes, plus district/type/specialty token -> id sets
+for filtering. Pages are addressed by an opaque keyset cursor, so results stay
+stable while ratings move.
+"""
+import base64
+import bisect
+import json
+import re
+import threading
+from collections import defaultdict
+
+# sort param -> (index name, walk in descending order)
+SORTS = {
+    'rating_desc': ('rating', True),
+    'rating_asc': ('rating', False),
+    'reviews_desc': ('reviews', True),
+    'reviews_asc': ('reviews', False),
+    'name_asc': ('name', False),
+    'name_desc': ('name', True),
+}
+
+# index name -> allowed types of the first key element; the second is always the int restaurant id
+_KEY_TYPES = {
+    'rating': (int, float),
+    'reviews': (int,),
+    'name': (str,),
+}
+
+_word_re = re.compile(r"[a-z0-9]+")
+
+
+def district_of(restaurant: dict) -> str:
+    """District is the last comma-separated part of 'Area, District'."""
+    location = restaurant.get('location') or ''
+    return location.rsplit(',', 1)[-1].strip()
+
+
+def _tokens(text: str):
+    """Lowercased full string plus its individual words."""
+    text = (text or '').strip().lower()
+    if not text:
+        return set()
+    return {text, *_word_re.findall(text)}
+
+
+def encode_cursor(key) -> str:
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(key, list) or len(key) != 2:
+        raise ValueError('Invalid cursor')
+    return tuple(key)
+
+
+def _check_key(name: str, key):
+    """Raise ValueError unless a decoded cursor key has the shape of the name index's keys."""
+    value, rid = key
+    if (isinstance(value, bool) or not isinstance(value, _KEY_TYPES[name])
+            or isinstance(rid, bool) or not isinstance(rid, int)):
+        raise ValueError('Invalid cursor')
+
+
+class CatalogIndex:
+    def __init__(self, aggregates):
+        self._lock = threading.Lock()
+        self._aggregates = aggregates
+        self._keys = {name: {} for name in ('rating', 'reviews', 'name')}  # index -> rid -> key
+        self._sorted = {name: [] for name in ('rating', 'reviews', 'name')}
+        self._by_district = defaultdict(set)
+        self._by_type = defaultdict(set)
+        self._by_specialty = defaultdict(set)
+        self._restaurants = {}
+
+    def _keys_for(self, restaurant: dict):
+        rid = restaurant['id']
+        avg, count = self._aggregates.get(rid)
+        if avg is None:
+            avg = restaurant.get('rating') or 0
+        return {
+            'rating': (avg, rid),
+            'reviews': (count, rid),
+            'name': ((restaurant.get('name') or '').lower(), rid),
+        }
+
+    def rebuild(self, restaurants):
+        """Rebuild every index from the full catalog."""
+        keys = {name: {} for name in self._keys}
+        by_district, by_type, by_specialty = defaultdict(set), defaultdict(set), defaultdict(set)
+        for r in restaurants:
+            rid = r['id']
+            for name, key in self._keys_for(r).items():
+                keys[name][rid] = key
+            district = district_of(r).lower()
+            if district:
+                by_district[district].add(rid)
+            for tok in _tokens(r.get('type')):
+                by_type[tok].add(rid)
+            for spec in r.get('specialties') or []:
+                for tok in _tokens(str(spec)):
+                    by_specialty[tok].add(rid)
+        with self._lock:
+            self._keys = keys
+            self._sorted = {name: sorted(k.values()) for name, k in keys.items()}
+            self._by_district, self._by_type, self._by_specialty = by_district, by_type, by_specialty
+            self._restaurants = {r['id']: r for r in restaurants}
+
+    def update(self, restaurant_id):
+        """Re-position a restaurant in the sorted indexes after its rating/review count changed."""
+        with self._lock:
+            restaurant = self._restaurants.get(restaurant_id)
+            if restaurant is None:
+                return
+            for name, key in self._keys_for(restaurant).items():
+                old = self._keys[name].get(restaurant_id)
+                if old == key:
+                    continue
+                idx = self._sorted[name]
+                if old is not None:
+                    pos = bisect.bisect_left(idx, old)
+                    if pos < len(idx) and idx[pos] == old:
+                        idx.pop(pos)
+                bisect.insort(idx, key)
+                self._keys[name][restaurant_id] = key
+
+    def _candidates(self, district=None, types=None, specialties=None, ids=None):
+        """Intersect the filter sets (each param is an OR list, ids an id set); None means no filtering."""
+        result = None if ids is None else set(ids)
+        for values, index in ((district, self._by_district), (types, self._by_type), (specialties, self._by_specialty)):
+            if not values:
+                continue
+            matched = set()
+            for v in values:
+                matched |= index.get(v.strip().lower(), set())
+            result = matched if result is None else result & matched
+        return result
+
+    def matching(self, district=None, types=None, specialties=None):
+        """Ids matching the filters (same rules as page), or None when no filter is given."""
+        with self._lock:
+            result = self._candidates(district, types, specialties)
+        return None if result is None else set(result)
+
+    def page(self, sort='rating_desc', limit=20, cursor=None, district=None, types=None, specialties=None, ids=None):
+        """Return (restaurant_ids, next_cursor, total) for one page of results.
+        ids, if given, restricts the results to those restaurants (e.g. text search matches)."""
+        name, descending = SORTS[sort]
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            _check_key(name, after)
+        with self._lock:
+            candidates = self._candidates(district, types, specialties, ids)
+            idx = self._sorted[name]
+            if candidates is not None and len(candidates) * 4 < len(idx):
+                # Selective filter: sort just the matching keys instead of walking the full index
+                keys = self._keys[name]
+                idx = sorted(keys[rid] for rid in candidates if rid in keys)
+                candidates = None
+            total = len(idx) if candidates is None else len(candidates)
+
+            out = []
+            if descending:
+                pos = (bisect.bisect_left(idx, after) if after else len(idx)) - 1
+                step = -1
+            else:
+                pos = bisect.bisect_right(idx, after) if after else 0
+                step = 1
+            last = None
+            while 0 <= pos < len(idx) and len(out) < limit:
+                key = idx[pos]
+                pos += step
+                if candidates is not None and key[1] not in candidates:
+                    continue
+                out.append(key[1])
+                last = key
+            more = False
+            while 0 <= pos < len(idx):
+                if candidates is None or idx[pos][1] in candidates:
+                    more = True
+                    break
+                pos += step
+        next_cursor = encode_cursor(last) if (more and last is not None) else None
+        return out, next_cursor, total
@@ -0,0 +1,194 @@
+"""Streaming, validated loading of the restaurant catalog (data/restaurants.json).
+
+load_catalog(path) parses the top-level JSON array one record at a time
+(the file is read in CHUNK_SIZE pieces, never whole), checks every record
+against SCHEMA, rejects duplicate ids and hashes the raw bytes on the way.
+Any invalid record fails the whole file with CatalogError, so a bad edit can
+never replace a good catalog. Fields outside SCHEMA pass through untouched.
+
+CatalogWatcher polls the file's (mtime, size) and calls back when it changes;
+app.reload_catalog then compares hashes, so touching the file is harmless.
+"""
+import codecs
+import hashlib
+import json
+import os
+import threading
+import time
+
+CHUNK_SIZE = 1 << 16
+MAX_ERRORS = 20  # reported per failed load; counting stops being useful after a few
+
+# field -> (accepted types, required)
+SCHEMA = {
+    'id': (int, True),
+    'name': (str, True),
+    'location': (str, True),
+    'type': (str, False),
+    'rating': ((int, float), False),
+    'image': (str, False),
+    'description': (str, False),
+    'specialties': (list, False),
+    'phone': (str, False),
+    'address': (str, False),
+    'lat': ((int, float), False),  # optional coordinates; see geo_index.py
+    'lon': ((int, float), False),
+}
+
+
+class CatalogError(Exception):
+    def __init__(self, errors):
+        super().__init__(f'{len(errors)} problem(s) in catalog: ' + '; '.join(errors[:3]))
+        self.errors = errors
+
+
+def validate_record(record, index: int) -> list:
+    """Problems with one catalog entry, as 'record N: ...' strings (empty if valid)."""
+    if not isinstance(record, dict):
+        return [f'record {index}: expected an object, got {type(record).__name__}']
+    errors = []
+    for field, (types, required) in SCHEMA.items():
+        value = record.get(field)
+        if value is None:
+            if required:
+                errors.append(f'record {index}: missing {field}')
+            continue
+        # bool is an int subclass, but never a valid id or rating
+        if not isinstance(value, types) or isinstance(value, bool):
+            errors.append(f'record {index}: {field} has type {type(value).__name__}')
+        elif field in ('name', 'location') and not value.strip():
+            errors.append(f'record {index}: {field} is empty')
+        elif field == 'rating' and not 0 <= value <= 5:
+            errors.append(f'record {index}: rating {value} outside 0-5')
+        elif field == 'specialties' and not all(isinstance(s, str) for s in value):
+            errors.append(f'record {index}: specialties must be strings')
+        elif field == 'lat' and not -90 <= value <= 90:
+            errors.append(f'record {index}: lat {value} outside -90..90')
+        elif field == 'lon' and not -180 <= value <= 180:
+            errors.append(f'record {index}: lon {value} outside -180..180')
+    if (record.get('lat') is None) != (record.get('lon') is None):
+        errors.append(f'record {index}: lat and lon go together')
+    return errors
+
+
+def iter_json_array(f, chunk_size: int = CHUNK_SIZE, digest=None):
+    """Yield the elements of the JSON array in binary file f, reading chunk_size bytes at a time.
+    Every byte read is also fed to digest (a hashlib object) when given."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8-sig')()
+    buf, pos, eof = '', 0, False
+    state = 'start'  # start -> value|close -> separator -> value ... -> done
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if digest is not None:
+            digest.update(chunk)
+        eof = not chunk
+        buf = buf[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n':
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                break
+            more()
+            continue
+        ch = buf[pos]
+        if state == 'start':
+            if ch != '[':
+                raise ValueError('catalog must be a JSON array')
+            pos += 1
+            state = 'first'
+        elif state == 'separator':
+            if ch == ']':
+                pos += 1
+                state = 'done'
+            elif ch == ',':
+                pos += 1
+                state = 'value'
+            else:
+                raise ValueError(f'expected , or ] at offset {pos}')
+        elif state == 'first' and ch == ']':
+            pos += 1
+            state = 'done'
+        elif state in ('first', 'value'):
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more()  # value continues in the next chunk
+                continue
+            if end == len(buf) and not eof:
+                more()  # a number could still be cut short; parse again with more input
+                continue
+            yield value
+            pos = end
+            state = 'separator'
+        else:
+            raise ValueError(f'unexpected data after the array at offset {pos}')
+    if state != 'done':
+        raise ValueError('catalog array is not closed')
+
+
+def load_catalog(path: str, chunk_size: int = CHUNK_SIZE):
+    """Return (records, sha256 hex digest) for the catalog at path. Raises CatalogError."""
+    digest = hashlib.sha256()
+    records, errors, seen = [], [], set()
+    try:
+        with open(path, 'rb') as f:
+            for index, record in enumerate(iter_json_array(f, chunk_size, digest)):
+                problems = validate_record(record, index)
+                if not problems:
+                    if record['id'] in seen:
+                        problems = [f"record {index}: duplicate id {record['id']}"]
+                    seen.add(record['id'])
+                errors.extend(problems)
+                if len(errors) >= MAX_ERRORS:
+                    break
+                records.append(record)
+    except (OSError, ValueError) as ex:  # JSONDecodeError and UnicodeDecodeError are ValueErrors
+        errors.append(str(ex))
+    if not errors and not records:
+        errors.append('catalog is empty')
+    if errors:
+        raise CatalogError(errors[:MAX_ERRORS])
+    return records, digest.hexdigest()
+
+
+def file_signature(path: str):
+    """(mtime_ns, size) of path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class CatalogWatcher:
+    """Calls on_change() from a daemon thread whenever path's signature changes."""
+    def __init__(self, path: str, interval: float, on_change, signature=None):
+        self.path = path
+        self.interval = interval
+        self.on_change = on_change
+        self.signature = signature if signature is not None else file_signature(path)
+        self._thread = threading.Thread(target=self._run, name='catalog-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            signature = file_signature(self.path)
+            if signature is None or signature == self.signature:
+                continue
+            self.signature = signature
+            try:
+                self.on_change()
+            except Exception as ex:
+                print('Catalog reload failed:', ex)
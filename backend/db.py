@@ -0,0 +1,185 @@
+"""SQLite connection pool and schema.
+
+Set DATABASE_PATH (e.g. backend/data/bmit.sqlite3) to persist reviews, photos,
+accounts, auth users, the token blocklist and polls. Connections are opened per
+thread, in WAL mode so readers never block the single writer, and reuse
+sqlite3's per-connection prepared-statement cache. Connections are handed
+back to a small idle list when their thread exits, so per-request threads
+reuse them instead of reconnecting.
+"""
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL,
+    user_email TEXT,
+    user_name TEXT,
+    rating INTEGER NOT NULL,
+    comment TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_reviews_restaurant;
+DROP INDEX IF EXISTS idx_reviews_user_email;
+CREATE INDEX IF NOT EXISTS idx_reviews_restaurant_created ON reviews (restaurant_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reviews_user_created ON reviews (user_email, created_at, id);
+
+CREATE TABLE IF NOT EXISTS photos (
+    id INTEGER PRIMARY KEY,
+    review_id INTEGER NOT NULL,
+    restaurant_id INTEGER NOT NULL,
+    user_email TEXT,
+    url TEXT,
+    status TEXT NOT NULL DEFAULT 'ready',
+    created_at TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_photos_restaurant;
+CREATE INDEX IF NOT EXISTS idx_photos_restaurant_created ON photos (restaurant_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_photos_review ON photos (review_id);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    avatar_url TEXT,
+    created_at TEXT NOT NULL,
+    user_email TEXT,
+    avatar_sources TEXT
+);
+
+CREATE TABLE IF NOT EXISTS auth_users (
+    email TEXT PRIMARY KEY,
+    name TEXT,
+    password_hash TEXT,
+    auth_provider TEXT
+);
+
+CREATE TABLE IF NOT EXISTS token_blocklist (
+    jti TEXT PRIMARY KEY,
+    expires_at REAL
+);
+
+-- Id sequences handed out in blocks (see ids.py)
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+-- Commit-ordered log of writes; worker processes tail it to keep in-process indexes in sync
+CREATE TABLE IF NOT EXISTS change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    ref_id INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS polls (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    options TEXT NOT NULL,
+    starts_at TEXT NOT NULL,
+    ends_at TEXT NOT NULL,
+    created_by TEXT,
+    created_at TEXT NOT NULL
+);
+
+-- One row per vote; UNIQUE enforces one vote per account, id is the results roll-up cursor
+CREATE TABLE IF NOT EXISTS poll_votes (
+    id INTEGER PRIMARY KEY,
+    poll_id TEXT NOT NULL,
+    voter TEXT NOT NULL,
+    option TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (poll_id, voter)
+);
+"""
+
+# Columns added after their table first shipped: table -> [(column, definition)]
+MIGRATIONS = {
+    'photos': [('status', "TEXT NOT NULL DEFAULT 'ready'")],
+    'accounts': [('user_email', "TEXT"), ('avatar_sources', "TEXT")],
+    'token_blocklist': [('expires_at', "REAL")],
+}
+
+
+def _migrate(conn):
+    for table, columns in MIGRATIONS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column, definition in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+class _Lease:
+    """Thread-local holder that hands its connection back to the pool when the thread exits."""
+    def __init__(self, pool, conn):
+        self.pool = pool
+        self.conn = conn
+
+    def __del__(self):
+        self.pool._release(self.conn)
+
+
+class ConnectionPool:
+    def __init__(self, path: str, max_idle: int = 16):
+        self.path = path
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle = []
+        self._closed = False
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _release(self, conn):
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, reusing an idle one (or opening one) on first use."""
+        lease = getattr(self._local, 'lease', None)
+        if lease is None:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            lease = _Lease(self, conn or self._open())
+            self._local.lease = lease
+        return lease.conn
+
+    def close_all(self):
+        """Close idle connections; connections still leased close when their thread exits."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        self._local = threading.local()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Shared pool for DATABASE_PATH, or None when running purely in memory."""
+    global _pool
+    path = os.environ.get('DATABASE_PATH')
+    if not path:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(path)
+    return _pool
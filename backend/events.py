@@ -0,0 +1,231 @@
+"""Server-Sent Events change feed: a fan-out broadcaster and an asyncio stream server.
+
+Handlers publish small deltas (a new review and the restaurant's new
+average, a photo that finished uploading, fresh poll counts) with
+BROADCASTER.publish(), from any thread. Each event is encoded once and
+handed to the stream server's event loop, which copies it into the queue of
+every subscriber whose filters match.
+
+Streams are long-lived and mostly idle, so they are not served by the
+Werkzeug request threads: StreamServer is a small asyncio HTTP server in a
+daemon thread (STREAM_HOST:STREAM_PORT; the host defaults to the address the
+app itself is served on, the port to 5001), where an open stream costs a
+coroutine and a socket rather than a thread. GET /api/stream on the main app
+redirects there (or to STREAM_PUBLIC_URL); it answers 503 rather than
+redirect a remote client to a loopback-only stream server. Subscriber
+queues hold STREAM_QUEUE_SIZE events; a client
+that falls further behind (or whose socket stops draining for
+STREAM_WRITE_TIMEOUT seconds) is disconnected. EventSource reconnects on
+its own, and the page refetches whatever it missed. Comment lines every
+STREAM_HEARTBEAT seconds keep proxies from closing idle streams.
+"""
+import asyncio
+import collections
+import ipaddress
+import json
+import os
+import socket
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import Counter, Gauge
+
+STREAM_HOST = os.environ.get('STREAM_HOST')  # default: the address the app is served on
+STREAM_PORT = int(os.environ.get('STREAM_PORT', '5001'))  # 0 disables streaming
+STREAM_PUBLIC_URL = os.environ.get('STREAM_PUBLIC_URL')  # e.g. https://stream.example.com behind a proxy
+STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', '256'))
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', '10000'))
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', '15'))
+STREAM_WRITE_TIMEOUT = float(os.environ.get('STREAM_WRITE_TIMEOUT', '10'))
+
+SUBSCRIBERS = Gauge('stream_subscribers', 'Open /api/stream connections.')
+EVENTS = Counter('stream_events_total', 'Events published to the change feed.', ('type',))
+DROPPED = Counter('stream_dropped_total', 'Subscribers disconnected for falling behind.')
+
+def parse_filters(query: str) -> dict:
+    """{field: value} from ?restaurant_id=&district=&poll= (poll is short for poll_id)."""
+    params = parse_qs(query)
+    filters = {}
+    for name, field in (('restaurant_id', 'restaurant_id'), ('district', 'district'),
+                        ('poll', 'poll_id'), ('poll_id', 'poll_id')):
+        value = (params.get(name) or [''])[0].strip()
+        if value:
+            filters[field] = value.lower()
+    return filters
+
+
+class Subscriber:
+    def __init__(self, filters: dict, max_queue: int):
+        self.filters = filters
+        self.max_queue = max_queue
+        self.queue = collections.deque()
+        self.wake = asyncio.Event()
+        self.dropped = False
+
+    def matches(self, keys: dict) -> bool:
+        return all(keys.get(field) == value for field, value in self.filters.items())
+
+    def put(self, data: bytes):
+        if len(self.queue) >= self.max_queue:
+            self.dropped = True
+        else:
+            self.queue.append(data)
+        self.wake.set()
+
+
+class Broadcaster:
+    def __init__(self, max_queue: int = STREAM_QUEUE_SIZE):
+        self.max_queue = max_queue
+        self.subscribers = set()  # only touched on the event loop thread
+        self.loop = None
+        self._lock = threading.Lock()
+        self._inbox = []
+        self._seq = 0
+
+    def publish(self, type_: str, data: dict, **keys):
+        """Queue an event for subscribers whose filters match keys (restaurant_id, district, poll_id)."""
+        if self.loop is None or not self.subscribers:
+            return
+        keys = {k: str(v).lower() for k, v in keys.items() if v is not None}
+        with self._lock:
+            self._seq += 1
+            payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+            frame = f'id: {self._seq}\nevent: {type_}\ndata: {payload}\n\n'.encode('utf-8')
+            self._inbox.append((keys, frame))
+            first = len(self._inbox) == 1
+        EVENTS.inc(type=type_)
+        if first:
+            # One wakeup per burst; _deliver takes everything queued by then
+            self.loop.call_soon_threadsafe(self._deliver)
+
+    def _deliver(self):
+        with self._lock:
+            batch, self._inbox = self._inbox, []
+        for keys, frame in batch:
+            for sub in self.subscribers:
+                if sub.matches(keys):
+                    sub.put(frame)
+
+    def subscribe(self, filters: dict) -> Subscriber:
+        sub = Subscriber(filters, self.max_queue)
+        self.subscribers.add(sub)
+        SUBSCRIBERS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        if sub in self.subscribers:
+            self.subscribers.discard(sub)
+            SUBSCRIBERS.dec()
+
+
+BROADCASTER = Broadcaster()
+
+_HEADERS = (
+    b'HTTP/1.1 200 OK\r\n'
+    b'Content-Type: text/event-stream\r\n'
+    b'Cache-Control: no-cache\r\n'
+    b'Connection: keep-alive\r\n'
+    b'Access-Control-Allow-Origin: *\r\n'
+    b'X-Accel-Buffering: no\r\n\r\n'
+    b'retry: 3000\n\n'
+)
+
+
+def _error(status: str, message: str) -> bytes:
+    body = json.dumps({"error": message}).encode('utf-8')
+    return (f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+            f'Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n').encode('ascii') + body
+
+
+class StreamServer:
+    """Serves GET /api/stream from an asyncio loop in a daemon thread."""
+    def __init__(self, broadcaster: Broadcaster = BROADCASTER, max_subscribers: int = STREAM_MAX_SUBSCRIBERS,
+                 heartbeat: float = STREAM_HEARTBEAT, write_timeout: float = STREAM_WRITE_TIMEOUT):
+        self.broadcaster = broadcaster
+        self.max_subscribers = max_subscribers
+        self.heartbeat = heartbeat
+        self.write_timeout = write_timeout
+        self.host = None
+        self.port = None
+
+    def start(self, sock: socket.socket):
+        """Serve on a bound, listening socket (shared by serve.py workers, or our own)."""
+        self.host, self.port = sock.getsockname()[:2]
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            self.broadcaster.loop = loop
+
+            async def main():
+                await asyncio.start_server(self._handle, sock=sock, limit=8192, backlog=1024)
+                ready.set()
+                await asyncio.Event().wait()
+            loop.run_until_complete(main())
+
+        threading.Thread(target=run, name='event-stream', daemon=True).start()
+        ready.wait(5)
+        return self
+
+    async def _handle(self, reader, writer):
+        sub = None
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+                method, target, _ = head.split(b'\r\n', 1)[0].decode('latin-1').split(' ', 2)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                return
+            url = urlsplit(target)
+            if method != 'GET' or url.path != '/api/stream':
+                writer.write(_error('404 Not Found', 'Not found'))
+                return
+            if len(self.broadcaster.subscribers) >= self.max_subscribers:
+                writer.write(_error('503 Service Unavailable', 'Too many open streams'))
+                return
+            sub = self.broadcaster.subscribe(parse_filters(url.query))
+            writer.write(_HEADERS)
+            while not sub.dropped:
+                try:
+                    await asyncio.wait_for(sub.wake.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    writer.write(b': ping\n\n')
+                sub.wake.clear()
+                if sub.dropped:
+                    DROPPED.inc()
+                    break
+                while sub.queue:
+                    writer.write(sub.queue.popleft())
+                await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except asyncio.TimeoutError:
+            DROPPED.inc()  # socket stopped draining
+        except ConnectionError:
+            pass
+        finally:
+            if sub is not None:
+                self.broadcaster.unsubscribe(sub)
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+
+def is_loopback(host: str) -> bool:
+    """True for localhost and loopback addresses: a server bound there is unreachable from other machines."""
+    if (host or '').lower() == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def listen(host: str = None, port: int = STREAM_PORT) -> socket.socket:
+    host = host or STREAM_HOST or '127.0.0.1'
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if hasattr(socket, 'SO_REUSEPORT'):
+        # Workers of other pre-fork servers (gunicorn) each bind the port; the kernel balances them
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    return sock
@@ -0,0 +1,167 @@
+"""Uniform grid index over restaurant coordinates for "near me" queries.
+
+Catalog entries may carry lat/lon. Entries without them (the generated
+dataset, curated rows nobody has geocoded yet) are placed at their
+district's centroid and reported with location_precision 'district'
+instead of 'exact'; entries whose district is unknown are left out.
+
+Points are bucketed into square cells of GEO_CELL_DEG degrees (0.05 ~ 5.5 km).
+A radius query only visits the cells overlapping the circle's bounding box.
+A k-nearest query visits rings of cells around the query point and stops
+once the k-th best distance is closer than anything an unvisited ring could
+hold. Both cost roughly the points in the visited cells, not the catalog size.
+The index is rebuilt with the catalog and never mutated, so reads need no lock.
+"""
+import heapq
+import math
+import os
+
+from catalog_index import district_of
+
+GEO_CELL_DEG = float(os.environ.get('GEO_CELL_DEG', '0.05'))
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEG = math.pi * EARTH_RADIUS_KM / 180
+
+# District headquarters; used when an entry has no coordinates of its own
+DISTRICT_CENTROIDS = {
+    'thiruvananthapuram': (8.5241, 76.9366),
+    'kollam': (8.8932, 76.6141),
+    'pathanamthitta': (9.2648, 76.7870),
+    'alappuzha': (9.4981, 76.3388),
+    'kottayam': (9.5916, 76.5222),
+    'idukki': (9.8497, 76.9720),
+    'ernakulam': (9.9816, 76.2999),
+    'thrissur': (10.5276, 76.2144),
+    'palakkad': (10.7867, 76.6548),
+    'malappuram': (11.0510, 76.0711),
+    'kozhikode': (11.2588, 75.7804),
+    'wayanad': (11.6854, 76.1320),
+    'kannur': (11.8745, 75.3704),
+    'kasaragod': (12.4996, 74.9869),
+}
+for _alias, _district in (('trivandrum', 'thiruvananthapuram'), ('quilon', 'kollam'), ('alleppey', 'alappuzha'),
+                          ('kochi', 'ernakulam'), ('cochin', 'ernakulam'), ('trichur', 'thrissur'),
+                          ('palghat', 'palakkad'), ('calicut', 'kozhikode'), ('cannanore', 'kannur')):
+    DISTRICT_CENTROIDS[_alias] = DISTRICT_CENTROIDS[_district]
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def coordinates_of(restaurant: dict):
+    """(lat, lon, precision) for a catalog entry: its own lat/lon ('exact'), its district
+    centroid ('district'), or None."""
+    lat, lon = restaurant.get('lat'), restaurant.get('lon')
+    if isinstance(lat, (int, float)) and isinstance(lon, (int, float)) and -90 <= lat <= 90 and -180 <= lon <= 180:
+        return float(lat), float(lon), 'exact'
+    centroid = DISTRICT_CENTROIDS.get(district_of(restaurant).lower())
+    if centroid is None:
+        return None
+    return centroid[0], centroid[1], 'district'
+
+
+class GeoIndex:
+    def __init__(self, cell_deg: float = GEO_CELL_DEG):
+        self.cell = cell_deg
+        self._cells = {}  # (row, col) -> [(lat, lon, rid)]
+        self._points = {}  # rid -> (lat, lon, precision)
+        self._rows = self._cols = (0, -1)  # occupied (min, max) cell rows / columns
+
+    def _cell_of(self, lat, lon):
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def rebuild(self, restaurants):
+        cells, points = {}, {}
+        for r in restaurants:
+            point = coordinates_of(r)
+            if point is None:
+                continue
+            points[r['id']] = point
+            cells.setdefault(self._cell_of(point[0], point[1]), []).append((point[0], point[1], r['id']))
+        self._cells, self._points = cells, points
+        if cells:
+            self._rows = (min(k[0] for k in cells), max(k[0] for k in cells))
+            self._cols = (min(k[1] for k in cells), max(k[1] for k in cells))
+        else:
+            self._rows = self._cols = (0, -1)
+
+    def __len__(self):
+        return len(self._points)
+
+    def point(self, restaurant_id):
+        return self._points.get(restaurant_id)
+
+    def _scan(self, lat, lon, cells, candidates, out):
+        for key in cells:
+            for plat, plon, rid in self._cells.get(key, ()):
+                if candidates is None or rid in candidates:
+                    out.append((haversine_km(lat, lon, plat, plon), rid))
+
+    def within(self, lat, lon, radius_km, limit, candidates=None):
+        """Nearest first, up to limit: ([(distance_km, rid)], total within radius_km)."""
+        if candidates is not None and len(candidates) * 4 < len(self._points):
+            # Selective filter: measuring the few matches beats walking the cells
+            found = self._measure(lat, lon, candidates)
+        else:
+            dlat = radius_km / KM_PER_DEG
+            # Longitude degrees shrink toward the poles; widen the box by the circle's worst latitude
+            cos_lat = math.cos(math.radians(min(89.9, abs(lat) + dlat)))
+            dlon = min(180.0, radius_km / (KM_PER_DEG * cos_lat))
+            (r0, c0), (r1, c1) = self._cell_of(lat - dlat, lon - dlon), self._cell_of(lat + dlat, lon + dlon)
+            r0, r1 = max(r0, self._rows[0]), min(r1, self._rows[1])
+            c0, c1 = max(c0, self._cols[0]), min(c1, self._cols[1])
+            found = []
+            if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self._cells):
+                cells = [k for k in self._cells if r0 <= k[0] <= r1 and c0 <= k[1] <= c1]
+            else:
+                cells = [(r, c) for r in range(r0, r1 + 1) for c in range(c0, c1 + 1)]
+            self._scan(lat, lon, cells, candidates, found)
+        found = [hit for hit in found if hit[0] <= radius_km]
+        return heapq.nsmallest(limit, found), len(found)
+
+    def nearest(self, lat, lon, limit, candidates=None):
+        """The limit nearest points, nearest first: [(distance_km, rid)]."""
+        if not self._points:
+            return []
+        if candidates is not None and len(candidates) * 4 < len(self._points):
+            return heapq.nsmallest(limit, self._measure(lat, lon, candidates))
+        row, col = self._cell_of(lat, lon)
+        (r0, r1), (c0, c1) = self._rows, self._cols
+        # Rings closer than the occupied area are empty, and so is their part outside it
+        ring = max(0, r0 - row, row - r1, c0 - col, col - c1)
+        max_ring = max(abs(row - r0), abs(row - r1), abs(col - c0), abs(col - c1))
+        best = []  # max-heap of (-distance, -rid) holding the limit best so far
+        while ring <= max_ring:
+            cols = range(max(col - ring, c0), min(col + ring, c1) + 1)
+            cells = [(r, c) for r in {row - ring, row + ring} if r0 <= r <= r1 for c in cols]
+            cells += [(r, c) for c in {col - ring, col + ring} if c0 <= c <= c1 and ring
+                      for r in range(max(row - ring + 1, r0), min(row + ring - 1, r1) + 1)]
+            found = []
+            self._scan(lat, lon, cells, candidates, found)
+            for dist, rid in found:
+                if len(best) < limit:
+                    heapq.heappush(best, (-dist, -rid))
+                elif (dist, rid) < (-best[0][0], -best[0][1]):
+                    heapq.heapreplace(best, (-dist, -rid))
+            # Anything beyond this ring is at least `ring` whole cells away in latitude or longitude
+            if len(best) == limit and -best[0][0] <= self._ring_clearance(lat, ring):
+                break
+            ring += 1
+        return sorted((-d, -r) for d, r in best)
+
+    def _ring_clearance(self, lat, ring) -> float:
+        """Lower bound on the distance from (lat, _) to any point outside rings 0..ring."""
+        reach = ring * self.cell
+        cos_lat = math.cos(math.radians(min(89.9, abs(lat) + reach + self.cell)))
+        return reach * KM_PER_DEG * cos_lat
+
+    def _measure(self, lat, lon, ids):
+        out = []
+        for rid in ids:
+            point = self._points.get(rid)
+            if point is not None:
+                out.append((haversine_km(lat, lon, point[0], point[1]), rid))
+        return out
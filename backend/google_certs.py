@@ -0,0 +1,192 @@
+"""Google ID token verification against a cached copy of Google's signing certs.
+
+google.oauth2.id_token.verify_oauth2_token fetches the certs on every call
+(with whatever transport it is handed) and re-parses them for every token.
+GoogleTokenVerifier keeps one pooled urllib3 connection to the certs endpoint
+and caches the parsed verifiers for as long as the response's Cache-Control
+max-age allows, so a sign-in is normally a local signature check.
+
+Freshness:
+  fresh       served from cache; in the last CERTS_REFRESH_AHEAD of max-age a
+              background thread refetches, so the cache rarely expires at all.
+  expired     past max-age the request fetches synchronously (one thread
+              fetches, the rest wait for its result). Expired certs are never
+              served just because a refetch is in flight: Google may have
+              rotated a key out.
+  stale       only if that fetch fails are the old certs kept, for at most
+              GOOGLE_CERTS_STALE_GRACE seconds (10 minutes) past expiry
+              (stale-if-error); fetches are retried every CERTS_MIN_REFETCH s
+              meanwhile.
+A token signed with an unknown key id (Google rotated keys before our max-age
+ran out) triggers one synchronous refetch, at most every CERTS_MIN_REFETCH s.
+
+GOOGLE_CERTS_URL points the verifier elsewhere, e.g. at a local fake endpoint
+serving {kid: PEM} (see benchmarks/bench_google_login.py).
+"""
+import base64
+import json
+import os
+import re
+import threading
+import time
+
+import urllib3
+from google.auth import jwt as google_jwt
+from google.auth.crypt import RSAVerifier
+
+GOOGLE_CERTS_URL = os.environ.get('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+CERTS_STALE_GRACE = float(os.environ.get('GOOGLE_CERTS_STALE_GRACE', '600'))
+CERTS_DEFAULT_MAX_AGE = 3600  # when the response has no usable Cache-Control
+CERTS_REFRESH_AHEAD = 0.1     # fraction of max-age
+CERTS_MIN_REFETCH = 30.0
+CLOCK_SKEW = 10
+
+_MAX_AGE = re.compile(r'(?:^|,)\s*max-age\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+
+class CertsUnavailable(Exception):
+    """The signing certs could not be fetched and no usable cached copy exists."""
+
+
+def max_age_of(headers) -> int:
+    """Seconds the response may be cached: Cache-Control max-age minus Age."""
+    match = _MAX_AGE.search(headers.get('Cache-Control') or '')
+    if not match:
+        return CERTS_DEFAULT_MAX_AGE
+    try:
+        age = int(headers.get('Age') or 0)
+    except ValueError:
+        age = 0
+    return max(0, int(match.group(1)) - age)
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4))
+
+
+class _Certs:
+    __slots__ = ('verifiers', 'fetched_at', 'expires_at')
+
+    def __init__(self, verifiers, fetched_at, expires_at):
+        self.verifiers = verifiers  # kid -> RSAVerifier, parsed once per fetch
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+
+class CertCache:
+    def __init__(self, url: str = None, http=None, timeout: float = 5.0):
+        self.url = url or GOOGLE_CERTS_URL
+        self._http = http or urllib3.PoolManager(
+            num_pools=1, maxsize=4, retries=urllib3.Retry(2, backoff_factor=0.2),
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+        )
+        self._certs = None
+        self._fetch_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._next_refresh = 0.0
+        self.fetches = 0
+
+    def _fetch(self) -> _Certs:
+        try:
+            resp = self._http.request('GET', self.url)
+        except urllib3.exceptions.HTTPError as ex:
+            raise CertsUnavailable(f'Could not fetch certs from {self.url}: {ex}')
+        if resp.status != 200:
+            raise CertsUnavailable(f'Could not fetch certs from {self.url}: HTTP {resp.status}')
+        try:
+            verifiers = {kid: RSAVerifier.from_string(pem) for kid, pem in json.loads(resp.data).items()}
+        except (ValueError, TypeError, AttributeError) as ex:
+            raise CertsUnavailable(f'Unreadable certs from {self.url}: {ex}')
+        self.fetches += 1
+        now = time.monotonic()
+        return _Certs(verifiers, now, now + max_age_of(resp.headers))
+
+    def _refetch(self, older_than: float):
+        """Fetch unless another thread already did after older_than; returns the current certs."""
+        with self._fetch_lock:
+            certs = self._certs
+            if certs is not None and certs.fetched_at > older_than:
+                return certs
+            try:
+                self._certs = self._fetch()
+            except CertsUnavailable:
+                now = time.monotonic()
+                self._next_refresh = now + CERTS_MIN_REFETCH
+                # stale-if-error: keep serving what we have while it is within the grace period
+                if certs is None or now > certs.expires_at + CERTS_STALE_GRACE:
+                    raise
+                print('Keeping cached Google certs; refetch failed')
+            return self._certs
+
+    def _refresh_in_background(self):
+        started = time.monotonic()
+        if started < self._next_refresh or not self._refresh_lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self._refetch(started)
+            except CertsUnavailable as ex:
+                print('Background refresh of Google certs failed:', ex)
+            finally:
+                self._refresh_lock.release()
+        threading.Thread(target=run, name='google-certs-refresh', daemon=True).start()
+
+    def get(self) -> _Certs:
+        now = time.monotonic()
+        certs = self._certs
+        if certs is None:
+            return self._refetch(now)
+        if now > certs.expires_at:
+            if now < self._next_refresh and now <= certs.expires_at + CERTS_STALE_GRACE:
+                return certs  # the last fetch failed moments ago; don't retry it on every request
+            return self._refetch(now)
+        lifetime = certs.expires_at - certs.fetched_at
+        if now > certs.expires_at - lifetime * CERTS_REFRESH_AHEAD:
+            self._refresh_in_background()
+        return certs
+
+    def verifier(self, kid: str):
+        certs = self.get()
+        verifier = certs.verifiers.get(kid)
+        if verifier is None and time.monotonic() - certs.fetched_at > CERTS_MIN_REFETCH:
+            verifier = self._refetch(time.monotonic()).verifiers.get(kid)
+        return verifier
+
+
+class GoogleTokenVerifier:
+    def __init__(self, certs: CertCache = None, clock_skew: int = CLOCK_SKEW):
+        self.certs = certs or CertCache()
+        self.clock_skew = clock_skew
+
+    def verify(self, token: str, audience: str) -> dict:
+        """Claims of a valid Google ID token for audience; raises ValueError if the token is invalid
+        and CertsUnavailable if it can't be checked right now. Same checks as verify_oauth2_token."""
+        if isinstance(token, bytes):
+            token = token.decode('utf-8')
+        if token.count('.') != 2:
+            raise ValueError('Wrong number of segments in token')
+        signed_section, signature = token.rsplit('.', 1)
+        header = google_jwt.decode_header(token)
+        if header.get('alg') != 'RS256':
+            raise ValueError(f'Unsupported signature algorithm {header.get("alg")}')
+        verifier = self.certs.verifier(header.get('kid'))
+        if verifier is None:
+            raise ValueError(f'Certificate for key id {header.get("kid")} not found')
+        if not verifier.verify(signed_section, _b64decode(signature)):
+            raise ValueError('Could not verify token signature')
+
+        claims = google_jwt.decode(token, verify=False)
+        now = time.time()
+        if not isinstance(claims.get('iat'), (int, float)) or not isinstance(claims.get('exp'), (int, float)):
+            raise ValueError('Token is missing iat or exp')
+        if claims['iat'] > now + self.clock_skew:
+            raise ValueError('Token used too early')
+        if claims['exp'] < now - self.clock_skew:
+            raise ValueError('Token expired')
+        if claims.get('aud') != audience:
+            raise ValueError(f'Token has wrong audience {claims.get("aud")}')
+        if claims.get('iss') not in GOOGLE_ISSUERS:
+            raise ValueError(f'Wrong issuer {claims.get("iss")}')
+        return claims
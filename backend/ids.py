@@ -0,0 +1,39 @@
+"""Concurrency-safe integer id allocation.
+
+In memory, ids come from a locked counter. With a database pool, each process
+reserves blocks of ids from the `sequences` table in a single write
+transaction and hands them out locally, so any number of worker processes
+allocate unique ids without a round trip per id.
+"""
+import threading
+
+
+class IdAllocator:
+    def __init__(self, name: str, start: int = 1, pool=None, block_size: int = 64):
+        self.name = name
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._block_size = block_size
+        self._floor = start - 1  # every id handed out is greater than this
+        self._next = start
+        self._limit = start if pool is not None else None  # exclusive end of the reserved block
+
+    def _reserve(self):
+        conn = self._pool.connection()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES (?, ?)", (self.name, self._floor))
+            conn.execute(
+                "UPDATE sequences SET value = MAX(value, ?) + ? WHERE name = ?",
+                (self._floor, self._block_size, self.name),
+            )
+            hi = conn.execute("SELECT value FROM sequences WHERE name = ?", (self.name,)).fetchone()[0]
+        self._next = hi - self._block_size + 1
+        self._limit = hi + 1
+
+    def next(self) -> int:
+        with self._lock:
+            if self._limit is not None and self._next >= self._limit:
+                self._reserve()
+            value = self._next
+            self._next += 1
+            return value
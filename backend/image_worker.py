@@ -0,0 +1,28 @@
+"""Entry point of an image pool worker (see images._Pool).
+
+Reads (task name, args) frames from stdin, runs images.TASKS[name] and writes
+(True, result) or (False, exception) to stdout, until stdin closes. Started as
+a script of its own, so it imports images and Pillow and nothing of the app.
+"""
+import sys
+
+import images
+
+
+def main():
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    sys.stdout = sys.stderr  # stray prints must not corrupt the reply stream
+    while True:
+        try:
+            name, args = images.recv_frame(requests)
+        except (EOFError, KeyboardInterrupt):
+            return
+        try:
+            reply = (True, images.TASKS[name](*args))
+        except Exception as ex:
+            reply = (False, ex)
+        images.send_frame(replies, reply)
+
+
+if __name__ == '__main__':
+    main()
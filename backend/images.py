@@ -0,0 +1,194 @@
+"""Memory-bounded image processing for avatars and catalog thumbnails.
+
+Decoding is downscaled up front, so a 48MP phone photo never becomes a
+full-resolution bitmap: JPEGs use Image.draft (DCT scaling during decode) and
+other formats use Image.reduce. Uploads above IMAGE_MAX_PIXELS are rejected
+from the header alone, before any pixels are decoded. CPU work runs in a
+small process pool so large decodes don't hold request or upload threads.
+AVIF needs the optional pillow-avif-plugin package (AVIF_AVAILABLE).
+"""
+import io
+import os
+import pickle
+import queue
+import struct
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except Exception:
+    Image = None
+    ImageOps = None
+    PIL_AVAILABLE = False
+
+try:
+    import pillow_avif  # noqa: F401  (registers the AVIF codec with Pillow)
+    AVIF_AVAILABLE = PIL_AVAILABLE
+except Exception:
+    AVIF_AVAILABLE = False
+
+MAX_PIXELS = int(os.environ.get('IMAGE_MAX_PIXELS', str(64_000_000)))
+AVATAR_SIZES = (64, 256, 512)
+FORMATS = {'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+           'webp': ('WEBP', {'quality': 80, 'method': 4}),
+           'avif': ('AVIF', {'quality': 60, 'speed': 6})}
+
+
+class ImageRejected(ValueError):
+    pass
+
+
+def probe(data: bytes):
+    """Return (width, height, format) from the header; raises ImageRejected if unreadable or too large."""
+    if not PIL_AVAILABLE:
+        raise ImageRejected('Image processing unavailable')
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            fmt = img.format
+    except Exception:
+        raise ImageRejected('Not a supported image')
+    if width * height > MAX_PIXELS:
+        raise ImageRejected(f'Image too large ({width}x{height}); limit is {MAX_PIXELS // 1_000_000}MP')
+    return width, height, fmt
+
+
+def _open_scaled(data: bytes, target: int):
+    """Decode so the shorter side is still >= target, using DCT scaling or reduce() to skip full-size pixels."""
+    img = Image.open(io.BytesIO(data))
+    if img.width * img.height > MAX_PIXELS:
+        raise ImageRejected('Image too large')
+    if img.format == 'JPEG':
+        # draft keeps both sides >= the requested box, so asking for (target, target) preserves the short side
+        img.draft('RGB', (target, target))
+    img = ImageOps.exif_transpose(img)
+    factor = min(img.size) // target
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img.convert('RGB')
+
+
+def square_variants(data: bytes, sizes=AVATAR_SIZES, formats=('webp', 'jpeg')):
+    """Center-crop to 1:1 and encode each size in each format.
+    Returns {(size, format): bytes}; sizes larger than the source are capped at the source size.
+    """
+    img = _open_scaled(data, max(sizes))
+    w, h = img.size
+    side = min(w, h)
+    left = (w - side) // 2
+    top = (h - side) // 2
+    square = img.crop((left, top, left + side, top + side))
+    out = {}
+    for size in sorted(sizes, reverse=True):
+        if square.width > size:
+            square = square.resize((size, size), Image.LANCZOS)
+        for fmt in formats:
+            pil_format, options = FORMATS[fmt]
+            buf = io.BytesIO()
+            square.save(buf, format=pil_format, **options)
+            out[(size, fmt)] = buf.getvalue()
+    return out
+
+
+def width_variants(data: bytes, widths, formats=('webp', 'jpeg')):
+    """Resize to each width (keeping aspect ratio, never upscaling) and encode in each format.
+    Returns {(width, format): (bytes, height)}; widths above the source collapse to the source width.
+    """
+    img = _open_scaled(data, max(widths))
+    out = {}
+    for width in sorted({min(w, img.width) for w in widths}, reverse=True):
+        if img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        for fmt in formats:
+            pil_format, options = FORMATS[fmt]
+            buf = io.BytesIO()
+            img.save(buf, format=pil_format, **options)
+            out[(width, fmt)] = (buf.getvalue(), img.height)
+    return out
+
+
+# Process pool. Workers run image_worker.py as their own script, so unlike a multiprocessing pool
+# (spawn and forkserver both re-run the parent's __main__ in each child) they never import the
+# app's entry script: no second catalog load, file watchers or journal lock, and no guard needed.
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', '2'))
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'image_worker.py')
+_FRAME = struct.Struct('<I')
+# Functions a worker may be asked to run
+TASKS = {'square_variants': square_variants, 'width_variants': width_variants}
+
+
+def send_frame(stream, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_FRAME.pack(len(data)) + data)
+    stream.flush()
+
+
+def recv_frame(stream):
+    """The next pickled object on stream; raises EOFError when it closes."""
+    header = stream.read(_FRAME.size)
+    if len(header) < _FRAME.size:
+        raise EOFError
+    size, = _FRAME.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError
+    return pickle.loads(data)
+
+
+class _Pool:
+    """IMAGE_WORKERS worker processes, each fed by one thread; a worker that dies is restarted."""
+    def __init__(self, workers: int):
+        self._tasks = queue.Queue()
+        for i in range(workers):
+            threading.Thread(target=self._feed, name=f'image-worker-{i}', daemon=True).start()
+
+    def submit(self, name: str, *args) -> Future:
+        future = Future()
+        self._tasks.put((future, name, args))
+        return future
+
+    def _feed(self):
+        proc = None
+        while True:
+            future, name, args = self._tasks.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if proc is None or proc.poll() is not None:
+                    proc = subprocess.Popen([sys.executable, _WORKER_SCRIPT], stdin=subprocess.PIPE,
+                                            stdout=subprocess.PIPE, cwd=os.path.dirname(_WORKER_SCRIPT))
+                send_frame(proc.stdin, (name, args))
+                ok, value = recv_frame(proc.stdout)
+            except (OSError, EOFError) as ex:
+                if proc is not None:
+                    proc.kill()
+                    proc.wait()
+                    proc = None
+                future.set_exception(RuntimeError(f'Image worker failed: {ex!r}'))
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _Pool(IMAGE_WORKERS)
+    return _pool
+
+
+def square_variants_async(data: bytes, sizes=AVATAR_SIZES, formats=('webp', 'jpeg')):
+    """Run square_variants in the image process pool; returns a concurrent.futures.Future."""
+    return _get_pool().submit('square_variants', data, tuple(sizes), tuple(formats))
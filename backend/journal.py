@@ -0,0 +1,359 @@
+"""Write-ahead journal for the in-memory store, with group commit and snapshots.
+
+Set JOURNAL_DIR (and leave DATABASE_PATH unset) to keep reviews, photos,
+accounts and auth users across restarts without SQLite. Every write is
+applied in memory and appended to the current segment (journal-N.log) under
+one lock, so the journal order is the order writes were applied in. The
+writer then waits until its record is on disk. The first waiter writes and
+fsyncs everything queued so far, and the others wait for it (group commit):
+one fsync covers every write that arrived while the previous one was running.
+A caller that holds a lock of its own (app.py's _catalog_lock) queues with
+append() and waits after releasing it, or its writers would never overlap.
+
+Records are length-prefixed: 4-byte length, 4-byte CRC32, then the JSON
+[op, data] payload. Recovery stops at the first incomplete or corrupt record
+of the last segment (a write torn by a crash; it was never acknowledged) and
+truncates it. Damage anywhere else raises JournalError instead of losing data
+quietly.
+
+Every JOURNAL_SNAPSHOT_RECORDS records a background snapshot starts: under
+the write lock the journal rotates to a new segment and the state is copied
+shallowly, then it is written to snapshot-N.snap (fsync, rename) and the
+older segments are deleted. The copy is fuzzy: records mutated after the
+rotation may already show the change. Every op is an insert that skips
+existing ids or an overwrite, so replaying segment N and later over the
+snapshot converges on the same state. Startup loads the newest snapshot and
+replays only the segments after it.
+
+One process owns a journal directory at a time (serve.py needs DATABASE_PATH
+for more than one worker anyway). JOURNAL_FSYNC=0 skips fsync: records still
+reach the OS page cache, so they survive a process crash but not a power loss.
+"""
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard
+    fcntl = None
+
+from store import Store
+
+JOURNAL_DIR = os.environ.get('JOURNAL_DIR')
+JOURNAL_FSYNC = os.environ.get('JOURNAL_FSYNC', '1') != '0'
+JOURNAL_SNAPSHOT_RECORDS = int(os.environ.get('JOURNAL_SNAPSHOT_RECORDS', '100000'))
+SNAPSHOT_CHUNK = 10_000  # items per snapshot record
+
+_HEADER = struct.Struct('<II')  # payload length, crc32(payload)
+
+
+class JournalError(Exception):
+    pass
+
+
+def encode(op: str, data) -> bytes:
+    payload = json.dumps([op, data], separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str):
+    """Yield (op, data, end offset) for each intact record of path; stops at the first bad one."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, pos)
+        start, end = pos + _HEADER.size, pos + _HEADER.size + length
+        if end > len(data) or zlib.crc32(data[start:end]) != crc:
+            return
+        try:
+            op, item = json.loads(data[start:end])
+        except ValueError:
+            return
+        yield op, item, end
+        pos = end
+
+
+def _fsync_dir(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    def __init__(self, directory: str, fsync: bool = JOURNAL_FSYNC, snapshot_every: int = JOURNAL_SNAPSHOT_RECORDS):
+        self.directory = directory
+        self.fsync = fsync
+        self.snapshot_every = snapshot_every
+        self._handlers = {}  # op -> (replay(data), state(), load(items)); see register
+        self._order = threading.Lock()  # apply + append happen together under this
+        self._cond = threading.Condition()  # guards everything below
+        self._pending = []
+        self._next_lsn = 1
+        self._durable_lsn = 0
+        self._flushing = False
+        self._failed = None
+        self._file = None
+        self._segment = 0
+        self._since_snapshot = 0
+        self._snapshotting = False
+        self._lock_file = None
+        self.flushes = 0  # write+fsync rounds; records / flushes is the group commit batch size
+        os.makedirs(directory, exist_ok=True)
+
+    def register(self, op: str, replay, state=None, load=None):
+        """replay(data) re-applies one record of op; state() lists its items for snapshots
+        (called under the write lock, so keep it to shallow copies) and load(items) restores
+        them in bulk (default: replay each)."""
+        self._handlers[op] = (replay, state, load)
+
+    def _files(self, prefix, suffix):
+        out = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                try:
+                    out.append((int(name[len(prefix):-len(suffix)]), os.path.join(self.directory, name)))
+                except ValueError:
+                    pass
+        return sorted(out)
+
+    def _replay(self, op, data):
+        handler = self._handlers.get(op)
+        if handler is None:
+            raise JournalError(f'No handler for journal op {op!r}')
+        handler[0](data)
+
+    # Recovery
+    def recover(self) -> dict:
+        """Load the newest snapshot, replay the segments after it and open a new segment.
+        Returns {snapshot, snapshot_items, segments, records, truncated_bytes, seconds}."""
+        t0 = time.perf_counter()
+        self._lock_directory()
+        for name in os.listdir(self.directory):
+            if name.endswith('.snap.tmp'):
+                os.remove(os.path.join(self.directory, name))  # snapshot interrupted by a crash
+        snapshots = self._files('snapshot-', '.snap')
+        base, snapshot_items, records, truncated = 0, 0, 0, 0
+        if snapshots:
+            base, path = snapshots[-1]
+            saved, complete = {}, False
+            for op, items, _ in read_records(path):
+                if op == 'end':
+                    complete = True
+                    break
+                saved.setdefault(op, []).extend(items)
+            if not complete:
+                raise JournalError(f'Snapshot {path} is incomplete or corrupt')
+            for op, items in saved.items():
+                load = self._handlers.get(op, (None, None, None))[2]
+                if load is not None:
+                    load(items)
+                else:
+                    for item in items:
+                        self._replay(op, item)
+                snapshot_items += len(items)
+            del saved
+        segments = [(n, p) for n, p in self._files('journal-', '.log') if n >= base]
+        for i, (n, path) in enumerate(segments):
+            end = 0
+            for op, data, end in read_records(path):
+                self._replay(op, data)
+                records += 1
+            size = os.path.getsize(path)
+            if end < size:
+                if i != len(segments) - 1:
+                    raise JournalError(f'Segment {path} is corrupt at byte {end}')
+                with open(path, 'r+b') as f:
+                    f.truncate(end)
+                    f.flush()
+                    os.fsync(f.fileno())
+                truncated = size - end
+        self._since_snapshot = records
+        self._open_segment(max([base] + [n + 1 for n, _ in segments]))
+        return {
+            "snapshot": base if snapshots else None, "snapshot_items": snapshot_items,
+            "segments": len(segments), "records": records, "truncated_bytes": truncated, "seconds": round(time.perf_counter() - t0, 3),
+        }
+
+    def _lock_directory(self):
+        # Two processes appending to the same segment would interleave records
+        self._lock_file = open(os.path.join(self.directory, 'LOCK'), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise JournalError(f'{self.directory} is in use by another process')
+
+    def _open_segment(self, n: int):
+        if self._file is not None:
+            self._file.close()
+        self._segment = n
+        self._file = open(os.path.join(self.directory, f'journal-{n:08d}.log'), 'ab')
+        if self.fsync:
+            _fsync_dir(self.directory)
+
+    # Writing
+    def write(self, op: str, data, apply=None):
+        """Run apply() and journal (op, data) atomically with respect to other writes, then
+        return once the record is durable. If apply raises, nothing is journaled."""
+        self._wait_durable(self.append(op, data, apply))
+
+    def append(self, op: str, data, apply=None) -> int:
+        """The first half of write(): run apply() and queue the record, without waiting for the
+        fsync. Returns the record's position; pass it to _wait_durable(). Callers holding a lock
+        of their own should release it before waiting, or concurrent writes cannot share a flush."""
+        frame = encode(op, data)
+        with self._order:
+            if self._failed is not None:
+                raise JournalError('Journal is unusable after a write error') from self._failed
+            if apply is not None:
+                apply()
+            with self._cond:
+                self._pending.append(frame)
+                lsn = self._next_lsn
+                self._next_lsn += 1
+            self._since_snapshot += 1
+            snapshot_due = self.snapshot_every and self._since_snapshot >= self.snapshot_every and not self._snapshotting
+            if snapshot_due:
+                self._snapshotting = True
+        if snapshot_due:
+            # The snapshot waits for this record (and everything before it) under _order itself
+            threading.Thread(target=self._snapshot_quietly, name='journal-snapshot', daemon=True).start()
+        return lsn
+
+    def _wait_durable(self, lsn: int):
+        with self._cond:
+            while self._durable_lsn < lsn:
+                if self._failed is not None:
+                    raise JournalError('Journal write failed') from self._failed
+                if self._flushing:
+                    self._cond.wait()
+                    continue
+                # Leader: write out everything queued so far with one fsync
+                self._flushing = True
+                batch, self._pending = self._pending, []
+                upto = self._next_lsn - 1
+                self._cond.release()
+                try:
+                    self._file.write(b''.join(batch))
+                    self._file.flush()
+                    if self.fsync:
+                        os.fsync(self._file.fileno())
+                except Exception as ex:
+                    # After a failed fsync the page cache state is unknown; stop accepting writes
+                    self._failed = ex
+                    raise
+                finally:
+                    self._cond.acquire()
+                    self._flushing = False
+                    self._cond.notify_all()
+                self._durable_lsn = upto
+                self.flushes += 1
+
+    # Snapshots
+    def _snapshot_quietly(self):
+        try:
+            self.snapshot()
+        except Exception as ex:
+            print('Journal snapshot failed:', ex)
+        finally:
+            self._snapshotting = False
+
+    def snapshot(self) -> int:
+        """Write a snapshot of the current state and drop the segments it covers; returns its number."""
+        with self._order:
+            self._wait_durable(self._next_lsn - 1)
+            self._open_segment(self._segment + 1)
+            base = self._segment
+            self._since_snapshot = 0
+            state = [(op, handler[1]()) for op, handler in self._handlers.items() if handler[1]]
+        path = os.path.join(self.directory, f'snapshot-{base:08d}.snap')
+        with open(path + '.tmp', 'wb') as f:
+            count = 0
+            for op, items in state:
+                for i in range(0, len(items), SNAPSHOT_CHUNK):
+                    f.write(encode(op, items[i:i + SNAPSHOT_CHUNK]))
+                count += len(items)
+            f.write(encode('end', count))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+        _fsync_dir(self.directory)
+        for n, old in self._files('journal-', '.log') + self._files('snapshot-', '.snap'):
+            if n < base:
+                os.remove(old)
+        return base
+
+    def close(self):
+        with self._order:
+            self._wait_durable(self._next_lsn - 1)
+            with self._cond:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()  # releases the flock
+            self._lock_file = None
+
+
+class JournaledStore(Store):
+    """Store whose review, photo and account writes go through a Journal.
+    Call journal.recover() after constructing it to load the saved state."""
+    def __init__(self, journal: Journal, restaurants=None):
+        super().__init__(restaurants)
+        self.journal = journal
+        journal.register('review', self._replay_review, lambda: list(self.reviews), self.load_reviews)
+        journal.register('photo', self._replay_photo, lambda: [dict(p) for p in self.photos], self.load_photos)
+        journal.register('photo_update', lambda d: Store.update_photo(self, d["id"], d["url"], d["status"]))
+        journal.register('user', self._replay_user, lambda: [dict(u) for u in self.users])
+        journal.register('user_update', self._replay_user)
+
+    def _replay_review(self, review):
+        if review["id"] not in self._reviews_by_id:
+            Store.add_review(self, review)
+
+    def _replay_photo(self, photo):
+        if photo["id"] not in self._photos_by_id:
+            Store.add_photo(self, photo)
+
+    def _replay_user(self, user):
+        existing = self._users_by_id.get(user["id"])
+        if existing is None:
+            Store.add_user(self, user)
+        elif existing is not user:
+            existing.clear()
+            existing.update(user)
+
+    def add_review(self, review: dict):
+        self.journal.write('review', review, lambda: Store.add_review(self, review))
+
+    def queue_review(self, review: dict, before=None) -> int:
+        """add_review without waiting for the fsync: journal the review, run before() (if given),
+        then add it in memory. Returns the position to pass to wait_durable()."""
+        def apply():
+            if before is not None:
+                before()
+            Store.add_review(self, review)
+        return self.journal.append('review', review, apply)
+
+    def wait_durable(self, position: int):
+        self.journal._wait_durable(position)
+
+    def add_photo(self, photo: dict):
+        self.journal.write('photo', photo, lambda: Store.add_photo(self, photo))
+
+    def update_photo(self, photo_id, url, status):
+        self.journal.write('photo_update', {"id": photo_id, "url": url, "status": status},
+                           lambda: Store.update_photo(self, photo_id, url, status))
+
+    def add_user(self, user: dict):
+        self.journal.write('user', user, lambda: Store.add_user(self, user))
+
+    def update_user(self, user: dict):
+        self.journal.write('user_update', user, lambda: Store.update_user(self, user))
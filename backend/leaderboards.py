@@ -0,0 +1,163 @@
+"""Leaderboards partitioned by district and type.
+
+Every restaurant sits in four boards: all, its district, its type, and its
+district+type. Each board keeps one sorted key list per metric, so a
+leaderboard read is a slice of the last K keys and a new review only
+re-positions one restaurant in its four boards (bisect, O(log n + shift)).
+
+Metrics:
+  bayesian  (C * prior + rating_sum) / (C + review_count), where prior is the
+            restaurant's catalog rating (or the catalog mean) and C is
+            LEADERBOARD_PRIOR_WEIGHT; a couple of 5-star reviews can't outrank
+            a long track record.
+  score     80% average rating, 20% review count relative to the board's
+            busiest restaurant. The count is normalized by that maximum rounded
+            up to a power of two, so the board only re-sorts when it doubles.
+  rating    average rating (catalog rating until reviewed), then review count.
+  reviews   review count, then average rating.
+"""
+import bisect
+import os
+import threading
+
+from catalog_index import district_of
+
+METRICS = ('bayesian', 'score', 'rating', 'reviews')
+PRIOR_WEIGHT = float(os.environ.get('LEADERBOARD_PRIOR_WEIGHT', '10'))
+
+
+def _norm(max_count: int) -> int:
+    """Smallest power of two >= max_count (at least 1)."""
+    n = 1
+    while n < max_count:
+        n *= 2
+    return n
+
+
+class _Board:
+    __slots__ = ('keys', 'sorted', 'counts', 'norm')
+
+    def __init__(self):
+        self.keys = {metric: {} for metric in METRICS}  # metric -> rid -> key
+        self.sorted = {metric: [] for metric in METRICS}
+        self.counts = {}  # rid -> review count, for the score normalization
+        self.norm = 1
+
+
+class Leaderboards:
+    def __init__(self, aggregates, prior_weight: float = PRIOR_WEIGHT):
+        self._lock = threading.Lock()
+        self._aggregates = aggregates
+        self._prior_weight = prior_weight
+        self._boards = {}  # (district, type) -> _Board; '' means any
+        self._restaurants = {}
+        self._mean = 0.0
+        self.districts = []
+        self.types = []
+
+    @staticmethod
+    def _partitions(restaurant: dict):
+        district = district_of(restaurant).lower()
+        rtype = (restaurant.get('type') or '').strip().lower()
+        return {('', ''), (district, ''), ('', rtype), (district, rtype)}
+
+    def _values(self, restaurant: dict):
+        """(bayesian, avg, count) for one restaurant from the running aggregates."""
+        rid = restaurant['id']
+        total, count = self._aggregates.totals(rid)
+        prior = restaurant.get('rating')
+        if not isinstance(prior, (int, float)):
+            prior = self._mean
+        avg = round(total / count, 1) if count else prior
+        bayesian = (self._prior_weight * prior + total) / (self._prior_weight + count)
+        return bayesian, avg, count
+
+    @staticmethod
+    def _keys_for(rid, values, norm):
+        # Ascending keys; ties go to the lower id (negated so it sorts last)
+        bayesian, avg, count = values
+        score = 0.8 * avg / 5 + 0.2 * count / norm
+        return {
+            'bayesian': (round(bayesian, 4), count, -rid),
+            'score': (round(score, 4), count, -rid),
+            'rating': (avg, count, -rid),
+            'reviews': (count, avg, -rid),
+        }
+
+    @staticmethod
+    def _place(board: _Board, metric: str, rid, key):
+        old = board.keys[metric].get(rid)
+        if old == key:
+            return
+        idx = board.sorted[metric]
+        if old is not None:
+            pos = bisect.bisect_left(idx, old)
+            if pos < len(idx) and idx[pos] == old:
+                idx.pop(pos)
+        bisect.insort(idx, key)
+        board.keys[metric][rid] = key
+
+    @staticmethod
+    def _resort_score(board: _Board, values_by_rid):
+        board.keys['score'] = {
+            rid: Leaderboards._keys_for(rid, values, board.norm)['score'] for rid, values in values_by_rid.items()
+        }
+        board.sorted['score'] = sorted(board.keys['score'].values())
+
+    def rebuild(self, restaurants):
+        """Rebuild every board from the full catalog."""
+        ratings = [r['rating'] for r in restaurants if isinstance(r.get('rating'), (int, float))]
+        self._mean = sum(ratings) / len(ratings) if ratings else 0.0
+        values = {r['id']: self._values(r) for r in restaurants}
+        members = {}
+        for r in restaurants:
+            for part in self._partitions(r):
+                members.setdefault(part, []).append(r['id'])
+        boards = {}
+        for part, rids in members.items():
+            board = _Board()
+            board.counts = {rid: values[rid][2] for rid in rids}
+            board.norm = _norm(max(board.counts.values()))
+            for rid in rids:
+                for metric, key in self._keys_for(rid, values[rid], board.norm).items():
+                    board.keys[metric][rid] = key
+            board.sorted = {metric: sorted(keys.values()) for metric, keys in board.keys.items()}
+            boards[part] = board
+        with self._lock:
+            self._boards = boards
+            self._restaurants = {r['id']: r for r in restaurants}
+            self.districts = sorted({district_of(r) for r in restaurants if district_of(r)})
+            self.types = sorted({r['type'].strip() for r in restaurants if (r.get('type') or '').strip()})
+
+    def update(self, restaurant_id):
+        """Re-position a restaurant in its boards after its rating/review count changed."""
+        with self._lock:
+            restaurant = self._restaurants.get(restaurant_id)
+            if restaurant is None:
+                return
+            values = self._values(restaurant)
+            for part in self._partitions(restaurant):
+                board = self._boards[part]
+                board.counts[restaurant_id] = values[2]
+                if values[2] > board.norm:
+                    # Busiest restaurant doubled the normalization: every score in this board moves
+                    board.norm = _norm(values[2])
+                    self._resort_score(board, {
+                        rid: self._values(self._restaurants[rid]) for rid in board.counts
+                    })
+                for metric, key in self._keys_for(restaurant_id, values, board.norm).items():
+                    self._place(board, metric, restaurant_id, key)
+
+    def top(self, metric='bayesian', limit=10, district=None, rtype=None):
+        """Return (entries, total) for one board; entries are [(restaurant_id, value)] best first.
+        value is the metric's ranking value (bayesian average, blended score, avg rating or count).
+        """
+        part = ((district or '').strip().lower(), (rtype or '').strip().lower())
+        with self._lock:
+            board = self._boards.get(part)
+            if board is None:
+                return [], 0
+            idx = board.sorted[metric]
+            keys = idx[-limit:] if limit else []
+            total = len(idx)
+        return [(-key[2], key[0]) for key in reversed(keys)], total
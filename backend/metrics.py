@@ -0,0 +1,265 @@
+"""Request metrics in Prometheus text format, plus a slow-request profiler.
+
+init_app(app) times every request and serves GET /metrics:
+  http_requests_total{method,route,status}        requests answered
+  http_request_errors_total{method,route}         5xx responses and unhandled exceptions
+  http_request_duration_seconds{method,route}     latency histogram
+  http_request_size_bytes / http_response_size_bytes{method,route}
+  http_requests_in_flight                         requests currently being handled
+route is the URL rule ('/api/restaurants/<int:restaurant_id>'), so label
+cardinality stays bounded. Background work records into UPLOAD_SECONDS and
+IMAGE_SECONDS. Metrics are per process: with serve.py --workers N each scrape
+reads one worker, so scrape them individually (or run one worker).
+
+SLOW_REQUEST_MS turns on the profiler: a thread samples the stacks of the
+threads handling requests every PROFILE_SAMPLE_INTERVAL seconds, and a
+request slower than the threshold prints its most frequent stacks (and
+writes them in folded format, for flamegraph.pl/speedscope, to
+SLOW_REQUEST_DIR when set).
+"""
+import bisect
+import os
+import sys
+import threading
+import time
+
+from flask import Response, g, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', '0'))
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.005'))
+SLOW_REQUEST_DIR = os.environ.get('SLOW_REQUEST_DIR')
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values, extra='') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}  # label values -> value
+        REGISTRY.append(self)
+
+    def _key(self, labels) -> tuple:
+        return tuple(labels.get(n, '') for n in self.label_names)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f'{self.name}{_labels(self.label_names, key)} {_number(value)}'
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per-bucket counts (last one is +Inf), then sum
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[idx] += 1
+            state[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + ('+Inf',), state):
+                cumulative += n
+                le = f'le="{bound}"'
+                yield f'{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.label_names, key)} {_number(state[-1])}'
+            yield f'{self.name}_count{_labels(self.label_names, key)} {cumulative}'
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+REGISTRY = []
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests answered.', ('method', 'route', 'status'))
+ERRORS = Counter('http_request_errors_total', 'HTTP requests that ended in a 5xx or an exception.', ('method', 'route'))
+LATENCY = Histogram('http_request_duration_seconds', 'Time to handle a request.', ('method', 'route'))
+REQUEST_SIZE = Histogram('http_request_size_bytes', 'Request body size.', ('method', 'route'), SIZE_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size.', ('method', 'route'), SIZE_BUCKETS)
+IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled right now.')
+UPLOAD_SECONDS = Histogram('upload_duration_seconds', 'Time per upload attempt.', ('outcome',))
+IMAGE_SECONDS = Histogram('image_processing_seconds', 'Time to decode, resize and encode one image.', ('kind',))
+
+
+def render() -> str:
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+class SlowRequestProfiler:
+    """Samples the stacks of in-flight request threads; dumps them for requests over threshold_ms."""
+    def __init__(self, threshold_ms: float, interval: float = PROFILE_SAMPLE_INTERVAL, directory: str = None):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.directory = directory
+        self._active = {}  # thread ident -> {folded stack: samples}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def begin(self):
+        self._active[threading.get_ident()] = {}
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='slow-request-profiler', daemon=True)
+                    self._thread.start()
+
+    def end(self, label: str, seconds: float):
+        samples = self._active.pop(threading.get_ident(), None)
+        if samples and seconds * 1000 >= self.threshold_ms:
+            self._dump(label, seconds, samples)
+
+    @staticmethod
+    def _fold(frame) -> str:
+        stack = []
+        while frame is not None and len(stack) < 64:
+            code = frame.f_code
+            stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            if not self._active:
+                continue
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = self._fold(frame)
+                    samples[stack] = samples.get(stack, 0) + 1
+
+    def _dump(self, label: str, seconds: float, samples: dict):
+        total = sum(samples.values())
+        top = sorted(samples.items(), key=lambda kv: -kv[1])[:5]
+        print(f'Slow request {label}: {seconds * 1000:.0f} ms, {total} stack samples')
+        for stack, n in top:
+            print(f'  {n:4d}  ' + ' <- '.join(reversed(stack.split(';')[-6:])))
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            name = ''.join(c if c.isalnum() else '_' for c in label)[:80]
+            path = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{int(seconds * 1000)}ms-{name}.folded')
+            with open(path, 'w') as f:
+                f.writelines(f'{stack} {n}\n' for stack, n in samples.items())
+
+
+def init_app(app, profiler: SlowRequestProfiler = None):
+    """Time every request of app and serve /metrics. Call before registering other before_request hooks."""
+    if profiler is None and SLOW_REQUEST_MS > 0:
+        profiler = SlowRequestProfiler(SLOW_REQUEST_MS, directory=SLOW_REQUEST_DIR)
+    IN_FLIGHT.set(0)
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_start = time.perf_counter()
+        IN_FLIGHT.inc()
+        if profiler:
+            profiler.begin()
+
+    @app.after_request
+    def _metrics_response(response):
+        g.metrics_status = response.status_code
+        g.metrics_size = response.calculate_content_length()
+        return response
+
+    @app.teardown_request
+    def _metrics_finish(exc):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        IN_FLIGHT.dec()
+        method = request.method
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        status = g.pop('metrics_status', 500)
+        LATENCY.observe(seconds, method=method, route=route)
+        REQUESTS.inc(method=method, route=route, status=status)
+        if exc is not None or status >= 500:
+            ERRORS.inc(method=method, route=route)
+        if request.content_length:
+            REQUEST_SIZE.observe(request.content_length, method=method, route=route)
+        size = g.pop('metrics_size', None)
+        if size is not None:
+            RESPONSE_SIZE.observe(size, method=method, route=route)
+        if profiler:
+            profiler.end(f'{method} {request.path}', seconds)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
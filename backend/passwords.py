@@ -0,0 +1,84 @@
+"""Password hashing on a small dedicated pool instead of the request threads.
+
+scrypt/PBKDF2 are deliberately expensive (~150 ms of CPU at the default cost),
+so a burst of logins run inline would occupy every request thread and core.
+PasswordHasher runs them on PASSWORD_HASH_WORKERS threads (hashlib releases
+the GIL while hashing, so reads keep being served) and refuses new work with
+HashQueueFull once PASSWORD_HASH_MAX_PENDING hashes are queued or running.
+
+PASSWORD_HASH_METHOD is any werkzeug method string. Stored hashes carry their
+own method, so old ones keep verifying; after a successful login with an
+outdated method the password is rehashed in the background (rehash_later).
+PASSWORD_HASH_WORKERS=0 hashes inline on the calling thread.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '32'))
+
+
+class HashQueueFull(Exception):
+    pass
+
+
+class PasswordHasher:
+    def __init__(self, method: str = PASSWORD_HASH_METHOD, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.method = method
+        # (method, prefix as werkzeug writes it: 'scrypt' -> 'scrypt:32768:8:1'), learned from a hash
+        self._prefix = (None, None)
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash') if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def _submit(self, fn, *args) -> Future:
+        if self._executor is None:
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+        if not self._slots.acquire(blocking=False):
+            raise HashQueueFull()
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _hash(self, password: str) -> str:
+        hashed = generate_password_hash(password, self.method)
+        self._prefix = (self.method, hashed.split('$', 1)[0])
+        return hashed
+
+    def hash(self, password: str) -> str:
+        return self._submit(self._hash, password).result()
+
+    def check(self, stored_hash: str, password: str) -> bool:
+        if not stored_hash:
+            return False
+        return self._submit(check_password_hash, stored_hash, password).result()
+
+    def needs_rehash(self, stored_hash: str) -> bool:
+        """True if stored_hash was made with a different method/cost than the current one."""
+        method, prefix = self._prefix
+        current = prefix if method == self.method else self.method
+        return bool(stored_hash) and stored_hash.split('$', 1)[0] != current
+
+    def rehash_later(self, password: str, stored_hash: str, on_done):
+        """Hash password with the current method in the background and pass it to on_done
+        (unless it turns out to match stored_hash's method). Skipped when the pool is busy;
+        the next login tries again."""
+        try:
+            future = self._submit(self._hash, password)
+        except HashQueueFull:
+            return
+
+        def done(f):
+            try:
+                new_hash = f.result()
+                if new_hash.split('$', 1)[0] != stored_hash.split('$', 1)[0]:
+                    on_done(new_hash)
+            except Exception as ex:
+                print('Password rehash failed:', ex)
+        future.add_done_callback(done)
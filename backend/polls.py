@@ -0,0 +1,218 @@
+"""Community polls: weekly voting windows, one vote per account, rolled-up results.
+
+A poll is { id, title, options: [{key, label, restaurant_id?}], starts_at,
+ends_at, created_by, created_at }. Windows run Monday 00:00 to Monday 00:00
+India time (week_window), and votes are only accepted inside the window.
+
+Votes never touch a shared counter on the request path. PollStore spreads
+them over POLL_SHARDS shards picked by voter, each with its own lock, counts
+and voter set (so the one-vote check is shard-local too). SqlitePollStore
+inserts one row per vote (UNIQUE(poll_id, voter) enforces one vote across
+worker processes) and rolls up only the rows added since the last tally.
+PollResults folds either into a snapshot at most every POLL_ROLLUP_INTERVAL
+seconds; results are served from that snapshot.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from db import ConnectionPool
+
+POLL_SHARDS = int(os.environ.get('POLL_SHARDS', '16'))
+POLL_ROLLUP_INTERVAL = float(os.environ.get('POLL_ROLLUP_INTERVAL', '1.0'))
+POLL_TZ = timezone(timedelta(hours=5, minutes=30), 'IST')
+
+
+class AlreadyVoted(Exception):
+    pass
+
+
+def iso(dt: datetime) -> str:
+    """UTC timestamp in the 'YYYY-MM-DDTHH:MM:SSZ' form used for poll windows (sorts as text)."""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def week_window(now: datetime = None, offset: int = 0):
+    """(starts_at, ends_at, 'YYYY-Www') for the India-time week containing now, shifted by offset weeks."""
+    now = (now or datetime.now(timezone.utc)).astimezone(POLL_TZ)
+    monday = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    start = monday + timedelta(weeks=offset)
+    year, week, _ = start.isocalendar()
+    return iso(start), iso(start + timedelta(weeks=1)), f'{year}-W{week:02d}'
+
+
+def status_of(poll: dict, now: str = None) -> str:
+    """'upcoming', 'open' or 'closed' relative to now (an iso() string)."""
+    now = now or iso(datetime.now(timezone.utc))
+    if now < poll['starts_at']:
+        return 'upcoming'
+    return 'open' if now < poll['ends_at'] else 'closed'
+
+
+class _Shard:
+    __slots__ = ('lock', 'counts', 'voters')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}  # poll_id -> {option: count}
+        self.voters = {}  # poll_id -> {voter: option}
+
+
+class PollStore:
+    def __init__(self, shards: int = POLL_SHARDS):
+        self._lock = threading.Lock()
+        self._polls = {}
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+
+    def _shard(self, voter: str) -> _Shard:
+        return self._shards[hash(voter) % len(self._shards)]
+
+    def add_poll(self, poll: dict) -> bool:
+        """Insert a poll; returns False (and changes nothing) if the id already exists."""
+        with self._lock:
+            if poll['id'] in self._polls:
+                return False
+            self._polls[poll['id']] = poll
+            return True
+
+    def get_poll(self, poll_id):
+        return self._polls.get(poll_id)
+
+    def list_polls(self):
+        return sorted(self._polls.values(), key=lambda p: (p['ends_at'], p['id']))
+
+    def record_vote(self, poll_id, voter: str, option: str):
+        """Count one vote; raises AlreadyVoted if voter already voted in this poll."""
+        shard = self._shard(voter)
+        with shard.lock:
+            voters = shard.voters.setdefault(poll_id, {})
+            if voter in voters:
+                raise AlreadyVoted()
+            voters[voter] = option
+            counts = shard.counts.setdefault(poll_id, {})
+            counts[option] = counts.get(option, 0) + 1
+
+    def vote_of(self, poll_id, voter: str):
+        return self._shard(voter).voters.get(poll_id, {}).get(voter)
+
+    def tally(self):
+        """Sum the shards: {poll_id: {option: count}}."""
+        out = {}
+        for shard in self._shards:
+            with shard.lock:
+                items = [(pid, dict(counts)) for pid, counts in shard.counts.items()]
+            for pid, counts in items:
+                merged = out.setdefault(pid, {})
+                for option, n in counts.items():
+                    merged[option] = merged.get(option, 0) + n
+        return out
+
+
+_POLL_COLS = "id, title, options, starts_at, ends_at, created_by, created_at"
+
+
+class SqlitePollStore:
+    def __init__(self, pool: ConnectionPool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._rolled_id = 0
+        self._counts = {}
+
+    @staticmethod
+    def _poll(row):
+        if row is None:
+            return None
+        poll = dict(row)
+        poll['options'] = json.loads(poll['options'])
+        return poll
+
+    def add_poll(self, poll: dict) -> bool:
+        conn = self._pool.connection()
+        with conn:
+            cur = conn.execute(
+                f"INSERT OR IGNORE INTO polls ({_POLL_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (poll['id'], poll['title'], json.dumps(poll['options']), poll['starts_at'], poll['ends_at'],
+                 poll.get('created_by'), poll['created_at']),
+            )
+        return cur.rowcount == 1
+
+    def get_poll(self, poll_id):
+        return self._poll(self._pool.connection().execute(
+            f"SELECT {_POLL_COLS} FROM polls WHERE id = ?", (poll_id,)).fetchone())
+
+    def list_polls(self):
+        rows = self._pool.connection().execute(f"SELECT {_POLL_COLS} FROM polls ORDER BY ends_at, id")
+        return [self._poll(row) for row in rows]
+
+    def record_vote(self, poll_id, voter: str, option: str):
+        conn = self._pool.connection()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO poll_votes (poll_id, voter, option, created_at) VALUES (?, ?, ?, ?)",
+                    (poll_id, voter, option, iso(datetime.now(timezone.utc))),
+                )
+        except sqlite3.IntegrityError:
+            raise AlreadyVoted()
+
+    def vote_of(self, poll_id, voter: str):
+        row = self._pool.connection().execute(
+            "SELECT option FROM poll_votes WHERE poll_id = ? AND voter = ?", (poll_id, voter)).fetchone()
+        return row[0] if row else None
+
+    def tally(self):
+        """Fold votes inserted since the previous tally into the running counts (rowids only grow)."""
+        with self._lock:
+            rows = self._pool.connection().execute(
+                "SELECT poll_id, option, COUNT(*), MAX(id) FROM poll_votes WHERE id > ? GROUP BY poll_id, option",
+                (self._rolled_id,),
+            ).fetchall()
+            for poll_id, option, n, max_id in rows:
+                counts = self._counts.setdefault(poll_id, {})
+                counts[option] = counts.get(option, 0) + n
+                self._rolled_id = max(self._rolled_id, max_id)
+            return {pid: dict(counts) for pid, counts in self._counts.items()}
+
+
+class PollResults:
+    """Rolled-up vote counts, refreshed at most every interval seconds.
+    generation() changes only when the counts did, so it works as a response-cache version.
+    """
+    def __init__(self, polls, interval: float = POLL_ROLLUP_INTERVAL):
+        self._polls = polls
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._generation = 0
+        self._rolled_at = 0.0
+
+    def _rollup(self):
+        if time.monotonic() - self._rolled_at < self.interval:
+            return
+        # One thread rolls up; the rest keep serving the current snapshot
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            counts = self._polls.tally()
+            if counts != self._counts:
+                self._counts = counts
+                self._generation += 1
+            self._rolled_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def generation(self) -> int:
+        self._rollup()
+        return self._generation
+
+    def all_counts(self) -> dict:
+        """{poll_id: {option: count}} for every poll with votes."""
+        self._rollup()
+        return {pid: dict(c) for pid, c in self._counts.items()}
+
+    def counts(self, poll_id) -> dict:
+        self._rollup()
+        return dict(self._counts.get(poll_id, {}))
@@ -0,0 +1,50 @@
+"""Token-bucket admission control for expensive endpoints (login, signup).
+
+Each key (client IP, email) gets a bucket of `burst` tokens refilled at
+`rate` per second; a request takes one token or is turned away with the
+time until the next token, which the handler returns as a 429 Retry-After.
+Excess load is shed immediately instead of queueing behind the hashing pool.
+Buckets are per process; with several workers the effective limit is
+per-worker times the worker count.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [tokens, last refill (monotonic)]
+
+    def take(self, key) -> float:
+        """Take one token for key; returns 0 if admitted, else seconds until a token is available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now)
+                bucket = self._buckets[key] = [float(self.burst), now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def _prune(self, now: float):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = self.burst / self.rate
+        for key in [k for k, (_, last) in self._buckets.items() if now - last >= full_after]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            # Still full of active keys: forget the least recently used half
+            oldest = sorted(self._buckets, key=lambda k: self._buckets[k][1])[:len(self._buckets) // 2]
+            for key in oldest:
+                del self._buckets[key]
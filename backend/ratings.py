@@ -0,0 +1,69 @@
+"""Running per-restaurant rating aggregates.
+
+Keeps a sum, count and 1-5 star histogram for every restaurant_id so the
+listing and detail endpoints can read avg_rating/review_count in O(1)
+instead of rescanning every review.
+"""
+import threading
+
+
+class RatingAggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # restaurant_id -> [sum, count, histogram]; histogram[i] counts (i+1)-star reviews
+        self._by_restaurant = {}
+
+    def add(self, restaurant_id: int, rating: int):
+        """Record a new review rating for a restaurant."""
+        with self._lock:
+            entry = self._by_restaurant.get(restaurant_id)
+            if entry is None:
+                entry = [0, 0, [0, 0, 0, 0, 0]]
+                self._by_restaurant[restaurant_id] = entry
+            entry[0] += rating
+            entry[1] += 1
+            entry[2][rating - 1] += 1
+
+    def get(self, restaurant_id: int):
+        """Return (avg_rating, review_count); avg is None when there are no reviews."""
+        entry = self._by_restaurant.get(restaurant_id)
+        if not entry or not entry[1]:
+            return None, 0
+        return round(entry[0] / entry[1], 1), entry[1]
+
+    def totals(self, restaurant_id: int):
+        """Return the unrounded (rating_sum, review_count)."""
+        entry = self._by_restaurant.get(restaurant_id)
+        return (entry[0], entry[1]) if entry else (0, 0)
+
+    def histogram(self, restaurant_id: int):
+        """Return a {star: count} dict for 1..5."""
+        entry = self._by_restaurant.get(restaurant_id)
+        counts = entry[2] if entry else [0, 0, 0, 0, 0]
+        return {str(i + 1): c for i, c in enumerate(counts)}
+
+    def rebuild(self, reviews):
+        """Recompute every aggregate from scratch from a list of reviews."""
+        fresh = {}
+        for r in reviews:
+            entry = fresh.get(r["restaurant_id"])
+            if entry is None:
+                entry = [0, 0, [0, 0, 0, 0, 0]]
+                fresh[r["restaurant_id"]] = entry
+            entry[0] += r["rating"]
+            entry[1] += 1
+            entry[2][r["rating"] - 1] += 1
+        with self._lock:
+            self._by_restaurant = fresh
+
+    def verify(self, reviews):
+        """Compare the running aggregates against a full rescan of reviews.
+        Returns a list of restaurant_ids whose aggregates disagree (empty when consistent).
+        """
+        expected = RatingAggregates()
+        expected.rebuild(reviews)
+        ids = set(self._by_restaurant) | set(expected._by_restaurant)
+        return sorted(
+            rid for rid in ids
+            if self._by_restaurant.get(rid, [0, 0, [0] * 5]) != expected._by_restaurant.get(rid, [0, 0, [0] * 5])
+        )
@@ -0,0 +1,90 @@
+"""Versioned cache of pre-serialized JSON responses.
+
+Entries keep the encoded JSON bytes plus gzip (and brotli, if installed)
+variants and a strong ETag. An entry is rebuilt only when the caller's data
+version changes, and If-None-Match hits are answered with 304.
+"""
+import gzip
+import hashlib
+import threading
+
+from flask import Response, request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+
+class CachedPayload:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.gzip = gzip.compress(body, compresslevel=6)
+        self.br = brotli.compress(body) if brotli else None
+
+    def variant(self, accept_encoding: str):
+        """Pick (body, content_encoding, etag) for the client's Accept-Encoding: the coding with the
+        highest q-value (brotli on a tie), honouring q=0 and '*'; identity if neither is acceptable."""
+        accepted = parse_accept_header(accept_encoding or '')
+        best, best_q = (self.body, None, self.etag), 0
+        for body, encoding, suffix in ((self.br, 'br', '-br'), (self.gzip, 'gzip', '-gz')):
+            q = accepted.quality(encoding)
+            if body is not None and q > best_q:
+                best, best_q = (body, encoding, self.etag + suffix), q
+        return best
+
+    def etags(self):
+        tags = {self.etag, self.etag + '-gz'}
+        if self.br is not None:
+            tags.add(self.etag + '-br')
+        return tags
+
+
+def _family(key):
+    return key[0] if isinstance(key, tuple) else key
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256):
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (version, CachedPayload); key is a family name or (family, ...)
+        self.max_entries = max_entries
+
+    def get(self, key, version, build):
+        """Return the CachedPayload for key at version, calling build() -> bytes on a miss."""
+        hit = self._entries.get(key)
+        if hit is not None and hit[0] == version:
+            return hit[1]
+        payload = CachedPayload(build())
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Drop this key family's stale versions first, then the oldest entry. Families have
+                # their own version counters, so versions are only comparable within one family.
+                family = _family(key)
+                stale = [k for k, (v, _) in self._entries.items() if _family(k) == family and v != version]
+                for k in stale or [next(iter(self._entries))]:
+                    self._entries.pop(k, None)
+            self._entries[key] = (version, payload)
+        return payload
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def cached_json_response(payload: CachedPayload, status: int = 200) -> Response:
+    """Build a Flask response for a CachedPayload, honouring If-None-Match and Accept-Encoding."""
+    body, encoding, etag = payload.variant(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': f'"{etag}"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if request.if_none_match and any(request.if_none_match.contains(t) for t in payload.etags()):
+        return Response(status=304, headers=headers)
+    resp = Response(body, status=status, mimetype='application/json', headers=headers)
+    if encoding:
+        resp.headers['Content-Encoding'] = encoding
+    return resp
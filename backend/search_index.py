@@ -0,0 +1,242 @@
+"""Tokenized inverted index for restaurant search.
+
+Indexes name, type, location/district, specialties and review comments with
+per-field weights and ranks matches with BM25. Query terms are folded for
+common Malayalam transliteration variants (th/t, dh/d, zh/z, doubled vowels),
+mapped through a small alias table (Calicut -> Kozhikode, ...), expanded by
+prefix for typeahead and matched within edit distance 1-2 when there is no
+exact hit.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'specialties': 2.0,
+    'type': 1.5,
+    'location': 1.5,
+    'comments': 0.5,
+}
+
+# Old/English names -> current Malayalam transliterations (both sides are folded before use)
+ALIASES = {
+    'calicut': 'kozhikode',
+    'trivandrum': 'thiruvananthapuram',
+    'tvm': 'thiruvananthapuram',
+    'cochin': 'kochi',
+    'trichur': 'thrissur',
+    'alleppey': 'alappuzha',
+    'cannanore': 'kannur',
+    'quilon': 'kollam',
+    'palghat': 'palakkad',
+    'tellicherry': 'thalassery',
+    'kasargod': 'kasaragod',
+    'manthi': 'mandhi',
+    'mandi': 'mandhi',
+    'kuzhimanthi': 'kuzhimandhi',
+}
+
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+K1 = 1.2
+B = 0.75
+
+_word_re = re.compile(r"[a-z0-9]+")
+_fold_rules = (('zh', 'z'), ('th', 't'), ('dh', 'd'), ('kh', 'k'), ('ph', 'f'),
+               ('aa', 'a'), ('ee', 'i'), ('oo', 'u'), ('w', 'v'))
+
+
+def fold(word: str) -> str:
+    """Normalize transliteration variants so e.g. 'manthi'/'mandhi'/'mandi' land close together."""
+    for src, dst in _fold_rules:
+        word = word.replace(src, dst)
+    return word
+
+
+_folded_aliases = {fold(k): fold(v) for k, v in ALIASES.items()}
+
+
+def tokenize(text: str):
+    return [_folded_aliases.get(t, t) for t in (fold(w) for w in _word_re.findall((text or '').lower()))]
+
+
+def _deletes(term: str):
+    """All strings obtained by deleting one character (used for edit-distance lookups)."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class SearchIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)  # term -> {restaurant_id: weighted tf}
+        self._doc_len = {}                  # restaurant_id -> weighted length
+        self._total_len = 0.0
+        self._vocab = []                    # sorted terms, for prefix ranges
+        self._deletes = defaultdict(set)    # one-deletion variant -> terms
+        self._impact = {}                   # term -> (scores, ids by descending score), lazy
+        self._results = {}                  # (tokens, limit, prefix) -> results; cleared on any write
+
+    # Building / updating
+    def _add_text(self, rid, text, weight):
+        toks = tokenize(text)
+        for tok in toks:
+            if tok not in self._postings:
+                bisect.insort(self._vocab, tok)
+                self._deletes[tok].add(tok)
+                for d in _deletes(tok):
+                    self._deletes[d].add(tok)
+            post = self._postings[tok]
+            post[rid] = post.get(rid, 0.0) + weight
+            self._impact.pop(tok, None)
+        self._results.clear()
+        added = weight * len(toks)
+        self._doc_len[rid] = self._doc_len.get(rid, 0.0) + added
+        self._total_len += added
+
+    def add_restaurant(self, restaurant: dict):
+        rid = restaurant['id']
+        with self._lock:
+            self._doc_len.setdefault(rid, 0.0)
+            self._add_text(rid, restaurant.get('name'), FIELD_WEIGHTS['name'])
+            self._add_text(rid, restaurant.get('type'), FIELD_WEIGHTS['type'])
+            self._add_text(rid, restaurant.get('location') or restaurant.get('address'), FIELD_WEIGHTS['location'])
+            self._add_text(rid, ' '.join(str(s) for s in restaurant.get('specialties') or []), FIELD_WEIGHTS['specialties'])
+
+    def add_review(self, restaurant_id, comment: str):
+        if not comment:
+            return
+        with self._lock:
+            self._add_text(restaurant_id, comment, FIELD_WEIGHTS['comments'])
+
+    def rebuild(self, restaurants, reviews=()):
+        fresh = SearchIndex()
+        for r in restaurants:
+            fresh.add_restaurant(r)
+        for rv in reviews:
+            fresh.add_review(rv['restaurant_id'], rv.get('comment'))
+        with self._lock:
+            self._postings, self._doc_len, self._total_len = fresh._postings, fresh._doc_len, fresh._total_len
+            self._vocab, self._deletes, self._impact = fresh._vocab, fresh._deletes, {}
+            self._results = {}
+
+    # Querying
+    def _fuzzy(self, tok):
+        limit = 1 if len(tok) <= 5 else 2
+        found = set()
+        for variant in {tok} | _deletes(tok):
+            found |= self._deletes.get(variant, set())
+        return {t for t in found if t != tok and _edit_distance(tok, t, limit) <= limit}
+
+    def _expand(self, tok, prefix):
+        """Map a query token to {index term: weight}."""
+        terms = {}
+        if tok in self._postings:
+            terms[tok] = 1.0
+        if prefix:
+            i = bisect.bisect_left(self._vocab, tok)
+            while i < len(self._vocab) and self._vocab[i].startswith(tok):
+                terms.setdefault(self._vocab[i], PREFIX_WEIGHT)
+                i += 1
+        if not terms and len(tok) >= 4:
+            for t in self._fuzzy(tok):
+                terms[t] = FUZZY_WEIGHT
+        return terms
+
+    def _scores(self, term, n_docs, avg_len):
+        """BM25 contribution of term per restaurant, plus restaurant_ids in descending score order.
+        Cached until the term's postings change; avg_len drift in between only perturbs near-ties.
+        """
+        cached = self._impact.get(term)
+        if cached is None:
+            post = self._postings[term]
+            df = len(post)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores = {}
+            for rid, tf in post.items():
+                norm = K1 * (1 - B + B * self._doc_len.get(rid, 0.0) / avg_len)
+                scores[rid] = idf * tf * (K1 + 1) / (tf + norm)
+            cached = (scores, sorted(scores, key=scores.__getitem__, reverse=True))
+            self._impact[term] = cached
+        return cached
+
+    def _top_single(self, expansion, n_docs, avg_len, limit):
+        """k-way merge of impact-ordered postings: O(limit * log terms) for one (prefix-expanded) token."""
+        heap = []
+        for t, w in expansion.items():
+            scores, order = self._scores(t, n_docs, avg_len)
+            if order:
+                heap.append((-w * scores[order[0]], order[0], t, w, 0))
+        heapq.heapify(heap)
+        out, seen = [], set()
+        while heap and len(out) < limit:
+            neg, rid, t, w, i = heapq.heappop(heap)
+            if rid not in seen:
+                seen.add(rid)
+                out.append((rid, -neg))
+            scores, order = self._impact[t]
+            if i + 1 < len(order):
+                nxt = order[i + 1]
+                heapq.heappush(heap, (-w * scores[nxt], nxt, t, w, i + 1))
+        return out
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True):
+        """Return [(restaurant_id, score)] best-first. Every query token must match (AND);
+        the last token is treated as a prefix when prefix=True.
+        """
+        toks = tokenize(query)
+        if not toks:
+            return []
+        key = (tuple(toks), limit, prefix)
+        with self._lock:
+            hit = self._results.get(key)
+            if hit is not None:
+                return hit
+            n_docs = len(self._doc_len) or 1
+            avg_len = (self._total_len / n_docs) or 1.0
+            expansions = [self._expand(t, prefix and i == len(toks) - 1) for i, t in enumerate(toks)]
+            if any(not e for e in expansions):
+                result = []
+            elif len(expansions) == 1:
+                result = self._top_single(expansions[0], n_docs, avg_len, limit)
+            else:
+                # Drive the intersection from the rarest token's postings
+                tables = [[(w, self._scores(t, n_docs, avg_len)[0]) for t, w in e.items()] for e in expansions]
+                matched = []
+                for table in tables:
+                    ids = set()
+                    for _, scores in table:
+                        ids |= scores.keys()
+                    matched.append(ids)
+                matched.sort(key=len)
+                candidates = matched[0]
+                for ids in matched[1:]:
+                    candidates = candidates & ids
+                scored = []
+                for rid in candidates:
+                    total = 0.0
+                    for table in tables:
+                        total += max(w * scores[rid] for w, scores in table if rid in scores)
+                    scored.append((rid, total))
+                result = heapq.nsmallest(limit, scored, key=lambda x: (-x[1], x[0]))
+            if len(self._results) >= 2048:
+                self._results.clear()
+            self._results[key] = result
+        return result
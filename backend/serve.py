@@ -0,0 +1,81 @@
+"""Multi-worker server: N forked processes sharing one listening port.
+
+    DATABASE_PATH=data/bmit.sqlite3 python serve.py --workers 4 --port 5000
+
+Each worker imports the app after forking (so no SQLite connection crosses a
+fork) and serves from the shared socket with a threaded Werkzeug server.
+Shared state lives in the SQLite database: ids come from ids.IdAllocator
+blocks and workers converge through the change_log sync in app.py. Event
+streams (/api/stream, see events.py) are served from a second shared socket
+on --stream-port by an asyncio server inside every worker. Any
+pre-fork WSGI server (e.g. `gunicorn -w 4 app:app`) works the same way.
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+
+
+def _serve(fd: int, host: str, port: int):
+    from werkzeug.serving import make_server
+    from app import app
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--stream-port', type=int, default=int(os.environ.get('STREAM_PORT', '5001')),
+                        help='port for /api/stream (Server-Sent Events); 0 disables')
+    args = parser.parse_args(argv)
+
+    if args.workers > 1 and not os.environ.get('DATABASE_PATH'):
+        parser.error('DATABASE_PATH must be set so workers can share state')
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+    if args.stream_port:
+        # One listening socket for /api/stream too; every worker's stream server accepts from it
+        stream_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        stream_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        stream_sock.bind((args.host, args.stream_port))
+        stream_sock.listen(1024)
+        stream_sock.set_inheritable(True)
+        os.environ['STREAM_FD'] = str(stream_sock.fileno())
+    os.environ['STREAM_PORT'] = str(args.stream_port)
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                _serve(sock.fileno(), args.host, args.port)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    print(f'Serving on http://{args.host}:{args.port} with {args.workers} workers', flush=True)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in children:
+        os.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""SQLite-backed implementation of the Store interface.
+
+Reviews, photos and accounts live in SQLite (see db.py); the curated restaurant
+catalog stays in memory exactly as in store.Store. Every method returns plain
+dicts with the same keys as the in-memory store, so handlers are unchanged.
+
+Review and photo writes also append to change_log so other worker processes
+can apply them to their in-process indexes (see app._sync_shared_state).
+version is bumped by that sync rather than on write.
+"""
+import json
+import sqlite3
+import threading
+
+from db import ConnectionPool
+from store import sortable_time
+
+_REVIEW_COLS = "id, restaurant_id, user_email, user_name, rating, comment, created_at"
+_PHOTO_COLS = "id, review_id, restaurant_id, user_email, url, status, created_at"
+_ACCOUNT_COLS = "id, name, avatar_url, created_at, user_email, avatar_sources"
+
+_INSERT_REVIEW = f"INSERT INTO reviews ({_REVIEW_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_SELECT_REVIEW = f"SELECT {_REVIEW_COLS} FROM reviews WHERE id = ?"
+_SELECT_REVIEWS = f"SELECT {_REVIEW_COLS} FROM reviews ORDER BY id"
+# Per-restaurant/user lists and pages are ordered by (created_at, id), not id alone: ids come
+# from per-process blocks (ids.py), so with several workers they do not follow creation order
+_SELECT_REVIEWS_BY_RESTAURANT = (f"SELECT {_REVIEW_COLS} FROM reviews WHERE restaurant_id = ? "
+                                 "ORDER BY created_at, id")
+_SELECT_REVIEW_PAGE = (f"SELECT {_REVIEW_COLS} FROM reviews WHERE restaurant_id = ? AND (created_at, id) < (?, ?) "
+                       "ORDER BY created_at DESC, id DESC LIMIT ?")
+_SELECT_REVIEWS_BY_USER = f"SELECT {_REVIEW_COLS} FROM reviews WHERE user_email = ? ORDER BY created_at, id"
+_SELECT_USER_REVIEW_PAGE = (f"SELECT {_REVIEW_COLS} FROM reviews WHERE user_email = ? AND (created_at, id) < (?, ?) "
+                            "ORDER BY created_at DESC, id DESC LIMIT ?")
+
+_INSERT_PHOTO = f"INSERT INTO photos ({_PHOTO_COLS}) VALUES (?, ?, ?, ?, ?, ?, ?)"
+_UPDATE_PHOTO = "UPDATE photos SET url = ?, status = ? WHERE id = ?"
+_SELECT_PHOTO = f"SELECT {_PHOTO_COLS} FROM photos WHERE id = ?"
+_SELECT_PHOTOS = f"SELECT {_PHOTO_COLS} FROM photos ORDER BY id"
+_SELECT_PHOTOS_BY_RESTAURANT = f"SELECT {_PHOTO_COLS} FROM photos WHERE restaurant_id = ? ORDER BY created_at, id"
+_SELECT_PHOTOS_BY_REVIEW = f"SELECT {_PHOTO_COLS} FROM photos WHERE review_id = ? ORDER BY id"
+_SELECT_PHOTO_PAGE = (f"SELECT {_PHOTO_COLS} FROM photos WHERE restaurant_id = ? AND (created_at, id) < (?, ?) "
+                      "AND status = 'ready' ORDER BY created_at DESC, id DESC LIMIT ?")
+_SELECT_READY_PHOTOS_FOR_REVIEWS = (f"SELECT {_PHOTO_COLS} FROM photos WHERE status = 'ready' "
+                                    "AND review_id IN (SELECT value FROM json_each(?)) ORDER BY id")
+
+_INSERT_ACCOUNT = f"INSERT INTO accounts ({_ACCOUNT_COLS}) VALUES (?, ?, ?, ?, ?, ?)"
+_UPDATE_ACCOUNT = "UPDATE accounts SET name = ?, avatar_url = ?, user_email = ?, avatar_sources = ? WHERE id = ?"
+_SELECT_ACCOUNT = f"SELECT {_ACCOUNT_COLS} FROM accounts WHERE id = ?"
+_SELECT_ACCOUNTS = f"SELECT {_ACCOUNT_COLS} FROM accounts ORDER BY rowid"
+
+_INSERT_CHANGE = "INSERT INTO change_log (kind, ref_id) VALUES (?, ?)"
+_SELECT_CHANGES = "SELECT seq, kind, ref_id FROM change_log WHERE seq > ? ORDER BY seq LIMIT ?"
+_SELECT_REVIEWS_THROUGH = (
+    f"SELECT {_REVIEW_COLS} FROM reviews WHERE id NOT IN "
+    "(SELECT ref_id FROM change_log WHERE kind = 'review' AND seq > ?) ORDER BY id"
+)
+_SELECT_LAST_CHANGE = "SELECT COALESCE(MAX(seq), 0) FROM change_log"
+
+
+def _photo_change(status: str) -> str:
+    """change_log kind for a photo write: 'photo_ready' marks the one write that made it ready,
+    so workers count each photo once however many times its row changes."""
+    return 'photo_ready' if status == 'ready' else 'photo'
+
+
+def _account(row):
+    """Account dict from its row; avatar_sources is stored as JSON and left out when unset."""
+    if row is None:
+        return None
+    sources = row.pop("avatar_sources")
+    if sources is not None:
+        row["avatar_sources"] = json.loads(sources)
+    return row
+
+
+def _sources_param(user: dict):
+    sources = user.get("avatar_sources")
+    return json.dumps(sources) if sources is not None else None
+
+
+def _before_params(before):
+    """(created_at, id) bound for the page queries; no cursor means after every row."""
+    if before is None:
+        return '9999', 2 ** 63 - 1
+    return sortable_time(before[0]), before[1]
+
+
+class SqliteStore:
+    def __init__(self, pool: ConnectionPool, restaurants=None):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self.version = 0
+        self.restaurants = []
+        self._restaurants_by_id = {}
+        self._retired = {}  # dropped by the last set_restaurants
+        if restaurants:
+            self.set_restaurants(restaurants)
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self._pool.connection().execute(sql, params)]
+
+    def _row(self, sql, params=()):
+        row = self._pool.connection().execute(sql, params).fetchone()
+        return dict(row) if row else None
+
+    def _write(self, sql, params, change=None):
+        """Run one write, plus its change_log entry in the same transaction when change=(kind, ref_id)."""
+        conn = self._pool.connection()
+        with conn:
+            conn.execute(sql, params)
+            if change:
+                conn.execute(_INSERT_CHANGE, change)
+
+    # Change feed (shared-state mode)
+    def snapshot(self):
+        """Return (reviews, last_change_seq) read from one consistent database snapshot."""
+        conn = self._pool.connection()
+        conn.execute("BEGIN")
+        try:
+            reviews = [dict(row) for row in conn.execute(_SELECT_REVIEWS)]
+            last_seq = conn.execute(_SELECT_LAST_CHANGE).fetchone()[0]
+        finally:
+            conn.execute("COMMIT")
+        return reviews, last_seq
+
+    def reviews_through(self, seq: int):
+        """Reviews as of change_log seq: every review except those logged after it."""
+        return self._rows(_SELECT_REVIEWS_THROUGH, (seq,))
+
+    def changes_since(self, seq: int, limit: int = 1000):
+        """Writes committed after seq, in commit order: [(seq, kind, ref_id)]."""
+        return [tuple(row) for row in self._pool.connection().execute(_SELECT_CHANGES, (seq, limit))]
+
+    # Restaurants (in memory, same as Store)
+    def set_restaurants(self, restaurants):
+        """Swap in a new catalog; see Store.set_restaurants."""
+        restaurants = list(restaurants)
+        by_id = {r["id"]: r for r in restaurants}
+        with self._lock:
+            self._retired = {rid: r for rid, r in self._restaurants_by_id.items() if rid not in by_id}
+            self.restaurants = restaurants
+            self._restaurants_by_id = by_id
+            self.version += 1
+
+    def get_restaurant(self, restaurant_id):
+        restaurant = self._restaurants_by_id.get(restaurant_id)
+        return restaurant if restaurant is not None else self._retired.get(restaurant_id)
+
+    def has_restaurant(self, restaurant_id) -> bool:
+        return restaurant_id in self._restaurants_by_id
+
+    # Reviews
+    @property
+    def reviews(self):
+        return self._rows(_SELECT_REVIEWS)
+
+    def add_review(self, review: dict):
+        self._write(_INSERT_REVIEW, (
+            review["id"], review["restaurant_id"], review.get("user_email"), review.get("user_name"),
+            review["rating"], review.get("comment") or "", review["created_at"],
+        ), change=("review", review["id"]))
+
+    def get_review(self, review_id):
+        return self._row(_SELECT_REVIEW, (review_id,))
+
+    def reviews_for_restaurant(self, restaurant_id):
+        return self._rows(_SELECT_REVIEWS_BY_RESTAURANT, (restaurant_id,))
+
+    def review_page(self, restaurant_id, before=None, limit=20):
+        return self._rows(_SELECT_REVIEW_PAGE, (restaurant_id, *_before_params(before), limit))
+
+    def reviews_for_user(self, user_email):
+        return self._rows(_SELECT_REVIEWS_BY_USER, (user_email,))
+
+    def user_review_page(self, user_email, before=None, limit=20):
+        return self._rows(_SELECT_USER_REVIEW_PAGE, (user_email, *_before_params(before), limit))
+
+    # Photos
+    @property
+    def photos(self):
+        return self._rows(_SELECT_PHOTOS)
+
+    def add_photo(self, photo: dict):
+        self._write(_INSERT_PHOTO, (
+            photo["id"], photo["review_id"], photo["restaurant_id"], photo.get("user_email"),
+            photo.get("url"), photo.get("status") or "ready", photo["created_at"],
+        ), change=(_photo_change(photo.get("status") or "ready"), photo["id"]))
+
+    def update_photo(self, photo_id, url, status):
+        self._write(_UPDATE_PHOTO, (url, status, photo_id), change=(_photo_change(status), photo_id))
+
+    def get_photo(self, photo_id):
+        return self._row(_SELECT_PHOTO, (photo_id,))
+
+    def photos_for_restaurant(self, restaurant_id):
+        return self._rows(_SELECT_PHOTOS_BY_RESTAURANT, (restaurant_id,))
+
+    def photos_for_review(self, review_id):
+        return self._rows(_SELECT_PHOTOS_BY_REVIEW, (review_id,))
+
+    def photo_page(self, restaurant_id, before=None, limit=24):
+        return self._rows(_SELECT_PHOTO_PAGE, (restaurant_id, *_before_params(before), -1 if limit is None else limit))
+
+    def ready_photos_for_reviews(self, review_ids):
+        out = {rid: [] for rid in review_ids}
+        if review_ids:
+            for photo in self._rows(_SELECT_READY_PHOTOS_FOR_REVIEWS, (json.dumps(list(review_ids)),)):
+                out[photo["review_id"]].append(photo)
+        return out
+
+    # Users (simple accounts)
+    @property
+    def users(self):
+        return [_account(row) for row in self._rows(_SELECT_ACCOUNTS)]
+
+    def add_user(self, user: dict):
+        """Insert an account; raises ValueError if the id is already taken."""
+        try:
+            self._write(_INSERT_ACCOUNT, (
+                user["id"], user["name"], user.get("avatar_url"), user["created_at"], user.get("user_email"),
+                _sources_param(user),
+            ))
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Duplicate user id {user['id']}")
+
+    def update_user(self, user: dict):
+        self._write(_UPDATE_ACCOUNT, (user["name"], user.get("avatar_url"), user.get("user_email"),
+                                      _sources_param(user), user["id"]))
+
+    def get_user(self, user_id):
+        return _account(self._row(_SELECT_ACCOUNT, (user_id,)))
+
+    def has_user(self, user_id) -> bool:
+        return self.get_user(user_id) is not None
@@ -0,0 +1,203 @@
+"""Indexed in-memory data layer.
+
+Owns the restaurants, reviews, photos and users lists and keeps hash indexes
+next to them so handlers can look records up in O(1) (by id) or O(k)
+(per restaurant / per user) instead of walking whole lists.
+"""
+import bisect
+import threading
+from collections import defaultdict
+
+
+def sortable_time(created_at) -> str:
+    """created_at in a form that sorts as text: 'YYYY-MM-DDTHH:MM:SS.ffffffZ'.
+    Older records were written without the fraction when it was zero."""
+    created_at = created_at or ''
+    if created_at.endswith('Z') and '.' not in created_at:
+        return created_at[:-1] + '.000000Z'
+    return created_at
+
+
+def _key(record):
+    # Ids come from per-process blocks (ids.py), so with several workers they do not follow
+    # creation order; lists and keyset cursors are ordered by (created_at, id) instead
+    return sortable_time(record.get("created_at")), record["id"]
+
+
+def _before_key(before):
+    return sortable_time(before[0]), before[1]
+
+
+class Store:
+    def __init__(self, restaurants=None):
+        self._lock = threading.Lock()
+        # Bumped whenever restaurants or reviews change; used to invalidate cached responses
+        self.version = 0
+        self.restaurants = []
+        self.reviews = []
+        self.photos = []
+        self.users = []
+        self._restaurants_by_id = {}
+        self._retired = {}  # dropped by the last set_restaurants
+        self._reviews_by_id = {}
+        self._reviews_by_restaurant = defaultdict(list)
+        self._reviews_by_user = defaultdict(list)
+        self._photos_by_restaurant = defaultdict(list)
+        self._photos_by_review = defaultdict(list)
+        self._photos_by_id = {}
+        self._users_by_id = {}
+        if restaurants:
+            self.set_restaurants(restaurants)
+
+    # Restaurants
+    def set_restaurants(self, restaurants):
+        """Replace the restaurant catalog and rebuild its id index.
+        The new list and index are built first and swapped in whole, so readers see either
+        catalog, never a mix. Restaurants that were dropped stay readable via get_restaurant
+        until the next replacement, for requests that picked their ids from the old indexes."""
+        restaurants = list(restaurants)
+        by_id = {r["id"]: r for r in restaurants}
+        with self._lock:
+            self._retired = {rid: r for rid, r in self._restaurants_by_id.items() if rid not in by_id}
+            self.restaurants = restaurants
+            self._restaurants_by_id = by_id
+            self.version += 1
+
+    def get_restaurant(self, restaurant_id):
+        restaurant = self._restaurants_by_id.get(restaurant_id)
+        return restaurant if restaurant is not None else self._retired.get(restaurant_id)
+
+    def has_restaurant(self, restaurant_id) -> bool:
+        return restaurant_id in self._restaurants_by_id
+
+    # Reviews
+    def add_review(self, review: dict):
+        with self._lock:
+            self.reviews.append(review)
+            self._reviews_by_id[review["id"]] = review
+            # Per-restaurant/user lists stay sorted by (created_at, id) even if writers race
+            bisect.insort(self._reviews_by_restaurant[review["restaurant_id"]], review, key=_key)
+            bisect.insort(self._reviews_by_user[review.get("user_email")], review, key=_key)
+            self.version += 1
+
+    def load_reviews(self, reviews):
+        """Bulk add_review (restoring saved state): one sort per list instead of an insort per review."""
+        with self._lock:
+            touched = set()
+            for review in reviews:
+                if review["id"] in self._reviews_by_id:
+                    continue
+                self.reviews.append(review)
+                self._reviews_by_id[review["id"]] = review
+                by_restaurant = self._reviews_by_restaurant[review["restaurant_id"]]
+                by_user = self._reviews_by_user[review.get("user_email")]
+                by_restaurant.append(review)
+                by_user.append(review)
+                touched.add(id(by_restaurant))
+                touched.add(id(by_user))
+            for group in (self._reviews_by_restaurant, self._reviews_by_user):
+                for items in group.values():
+                    if id(items) in touched:
+                        items.sort(key=_key)
+            self.version += 1
+
+    def get_review(self, review_id):
+        return self._reviews_by_id.get(review_id)
+
+    def reviews_for_restaurant(self, restaurant_id):
+        """Reviews for a restaurant in insertion (created_at) order."""
+        return list(self._reviews_by_restaurant.get(restaurant_id, ()))
+
+    def review_page(self, restaurant_id, before=None, limit=20):
+        """Up to limit reviews for a restaurant ordered before the (created_at, id) key before, newest first."""
+        reviews = self._reviews_by_restaurant.get(restaurant_id, ())
+        end = bisect.bisect_left(reviews, _before_key(before), key=_key) if before is not None else len(reviews)
+        return reviews[max(0, end - limit):end][::-1]
+
+    def reviews_for_user(self, user_email):
+        """Reviews written by an email identity in insertion (created_at) order."""
+        return list(self._reviews_by_user.get(user_email, ()))
+
+    def user_review_page(self, user_email, before=None, limit=20):
+        """Up to limit reviews by an email identity ordered before the (created_at, id) key before, newest first."""
+        reviews = self._reviews_by_user.get(user_email, ())
+        end = bisect.bisect_left(reviews, _before_key(before), key=_key) if before is not None else len(reviews)
+        return reviews[max(0, end - limit):end][::-1]
+
+    # Photos
+    def add_photo(self, photo: dict):
+        with self._lock:
+            self.photos.append(photo)
+            bisect.insort(self._photos_by_restaurant[photo["restaurant_id"]], photo, key=_key)
+            self._photos_by_review[photo["review_id"]].append(photo)
+            self._photos_by_id[photo["id"]] = photo
+
+    def load_photos(self, photos):
+        """Bulk add_photo (restoring saved state)."""
+        with self._lock:
+            for photo in photos:
+                if photo["id"] in self._photos_by_id:
+                    continue
+                self.photos.append(photo)
+                self._photos_by_restaurant[photo["restaurant_id"]].append(photo)
+                self._photos_by_review[photo["review_id"]].append(photo)
+                self._photos_by_id[photo["id"]] = photo
+            for items in self._photos_by_restaurant.values():
+                items.sort(key=_key)
+
+    def update_photo(self, photo_id, url, status):
+        """Record the outcome of a background upload (status: pending|ready|failed)."""
+        with self._lock:
+            photo = self._photos_by_id.get(photo_id)
+            if photo is not None:
+                photo["url"] = url
+                photo["status"] = status
+
+    def get_photo(self, photo_id):
+        return self._photos_by_id.get(photo_id)
+
+    def photos_for_restaurant(self, restaurant_id):
+        """Photos for a restaurant in insertion (created_at) order."""
+        return list(self._photos_by_restaurant.get(restaurant_id, ()))
+
+    def photos_for_review(self, review_id):
+        return list(self._photos_by_review.get(review_id, ()))
+
+    def photo_page(self, restaurant_id, before=None, limit=24):
+        """Up to limit (None: all) ready photos for a restaurant ordered before the (created_at, id)
+        key before, newest first."""
+        photos = self._photos_by_restaurant.get(restaurant_id, ())
+        pos = bisect.bisect_left(photos, _before_key(before), key=_key) if before is not None else len(photos)
+        out = []
+        while pos > 0 and (limit is None or len(out) < limit):
+            pos -= 1
+            if photos[pos].get("status", "ready") == "ready":
+                out.append(photos[pos])
+        return out
+
+    def ready_photos_for_reviews(self, review_ids):
+        """{review_id: [ready photos in id order]} for the given reviews."""
+        return {
+            rid: [p for p in self._photos_by_review.get(rid, ()) if p.get("status", "ready") == "ready"]
+            for rid in review_ids
+        }
+
+    # Users (simple accounts)
+    def add_user(self, user: dict):
+        """Insert an account; raises ValueError if the id is already taken."""
+        with self._lock:
+            if user["id"] in self._users_by_id:
+                raise ValueError(f"Duplicate user id {user['id']}")
+            self.users.append(user)
+            self._users_by_id[user["id"]] = user
+
+    def update_user(self, user: dict):
+        """Persist changes to a user dict (in memory the indexed dict is already the live record)."""
+        with self._lock:
+            self._users_by_id[user["id"]] = user
+
+    def get_user(self, user_id):
+        return self._users_by_id.get(user_id)
+
+    def has_user(self, user_id) -> bool:
+        return user_id in self._users_by_id
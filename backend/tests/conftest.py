@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tests import the backend modules the way the app does (flat, from the backend folder)
+sys.path.insert(0, BACKEND)
+
+_SHARED_PRELUDE = """
+import io, json, os, sys
+sys.path.insert(0, {backend!r})
+import app
+from flask_jwt_extended import create_access_token
+client = app.app.test_client()
+with app.app.app_context():
+    auth = {{"Authorization": "Bearer " + create_access_token(identity="shared@example.com")}}
+"""
+
+
+@pytest.fixture
+def shared_app(tmp_path):
+    """Run a script against the app in shared-state mode (DATABASE_PATH, fake uploads) in a fresh
+    process; the script sees app, client and auth, and prints one JSON value as its last line."""
+    def run(script):
+        env = dict(os.environ, DATABASE_PATH=str(tmp_path / 'mandhi.db'), UPLOAD_BACKEND='fake',
+                   JWT_SECRET_KEY='test-jwt-secret-of-at-least-32-bytes', CATALOG_POLL_INTERVAL='0')
+        env.pop('JOURNAL_DIR', None)
+        source = _SHARED_PRELUDE.format(backend=BACKEND) + textwrap.dedent(script)
+        out = subprocess.run([sys.executable, '-c', source], env=env, cwd=BACKEND,
+                             capture_output=True, text=True, timeout=120)
+        assert out.returncode == 0, out.stderr
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    return run
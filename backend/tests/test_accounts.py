@@ -0,0 +1,70 @@
+"""Account linking and the privacy of the email identity in public payloads."""
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture(scope='module')
+def client():
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-of-at-least-32-bytes')
+    import app as app_module
+    return app_module.app.test_client()
+
+
+def _auth(client, email):
+    with client.application.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity=email)}"}
+
+
+def test_patch_cannot_claim_an_unlinked_account(client):
+    account = client.post('/api/accounts', json={"name": "Anon"}).get_json()
+    client.post('/api/restaurants/1/reviews', json={"rating": 5, "comment": "Mine"},
+                headers=_auth(client, 'intruder@example.com'))
+
+    resp = client.patch(f"/api/accounts/{account['id']}", json={"name": "Renamed"},
+                        headers=_auth(client, 'intruder@example.com'))
+    assert resp.status_code == 200 and resp.get_json()["name"] == "Renamed"
+    assert client.get(f"/api/accounts/{account['id']}/reviews").get_json() == []
+
+
+def test_account_created_with_a_jwt_is_linked(client):
+    headers = _auth(client, 'owner@example.com')
+    account = client.post('/api/accounts', json={"name": "Owner"}, headers=headers).get_json()
+    client.post('/api/restaurants/2/reviews', json={"rating": 4, "comment": "Good"}, headers=headers)
+    reviews = client.get(f"/api/accounts/{account['id']}/reviews").get_json()
+    assert [r["comment"] for r in reviews] == ["Good"]
+
+
+def test_review_payloads_hide_the_email(client):
+    created = client.post('/api/restaurants/3/reviews', json={"rating": 3, "comment": "Fine"},
+                          headers=_auth(client, 'private@example.com'))
+    assert created.status_code == 201 and "user_email" not in created.get_json()
+    listings = [
+        client.get('/api/restaurants/3/reviews').get_json(),
+        client.get('/api/restaurants/3/reviews?limit=5').get_json()["items"],
+        client.get('/api/restaurants/3/detail').get_json()["reviews"]["items"],
+        client.get('/api/restaurants?ids=3&include=reviews').get_json()["items"][0]["reviews"]["items"],
+    ]
+    for reviews in listings:
+        assert reviews and all("user_email" not in r for r in reviews)
+
+
+def test_avatar_upload_stores_every_variant(shared_app):
+    pytest.importorskip('PIL')
+    result = shared_app('''
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new('RGB', (900, 600), 'orange').save(buf, format='JPEG')
+        account = client.post('/api/accounts', data={"name": "Pic", "avatar": (io.BytesIO(buf.getvalue()), 'a.jpg')},
+                              content_type='multipart/form-data').get_json()
+        assert app.upload_queue.wait_idle(60)
+        job = client.get(f"/api/uploads/{account['avatar_upload']['job_id']}").get_json()
+        print(json.dumps({"job": job["status"], "account": client.get(f"/api/accounts/{account['id']}").get_json()}))
+    ''')
+    assert result["job"] == "ready"
+    account = result["account"]
+    webp, jpeg = account["avatar_sources"]
+    assert webp["type"] == "image/webp" and jpeg["type"] == "image/jpeg"
+    assert [entry.split()[1] for entry in webp["srcset"].split(', ')] == ['64w', '256w', '512w']
+    assert account["avatar_url"] == jpeg["srcset"].split(', ')[-1].split()[0]
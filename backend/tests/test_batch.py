@@ -0,0 +1,30 @@
+"""POST /api/restaurants/batch input validation: malformed bodies are 400s, never 500s."""
+import pytest
+
+
+@pytest.fixture(scope='module')
+def client():
+    import app as app_module
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    "ids",
+    {"ids": [True]},
+    {"ids": [1.9]},
+    {"ids": [[1]]},
+    {"ids": [1], "reviews_limit": 2.5},
+    {"ids": [1], "include": [{"reviews": 1}]},
+    {"ids": [1], "include": ["votes"]},
+])
+def test_malformed_body_is_rejected(client, body):
+    assert client.post('/api/restaurants/batch', json=body).status_code == 400
+
+
+def test_ids_resolve_in_request_order(client):
+    resp = client.post('/api/restaurants/batch', json={"ids": [3, 1, 3, 999999], "include": ["reviews"]})
+    body = resp.get_json()
+    assert resp.status_code == 200
+    assert [r["id"] for r in body["items"]] == [3, 1] and body["missing"] == [999999]
+    assert client.get('/api/restaurants?ids=1,x').status_code == 400
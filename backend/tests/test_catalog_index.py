@@ -0,0 +1,44 @@
+"""Catalog page cursors: well-formed JSON with the wrong shape for the sort is a ValueError (400)."""
+import pytest
+
+from catalog_index import CatalogIndex, encode_cursor
+from ratings import RatingAggregates
+
+RESTAURANTS = [{"id": i, "name": f"Mandi {i}", "location": "Pala, Kottayam", "rating": i % 5} for i in range(1, 31)]
+
+
+def _index():
+    index = CatalogIndex(RatingAggregates())
+    index.rebuild(RESTAURANTS)
+    return index
+
+
+@pytest.mark.parametrize('sort, key', [
+    ('rating_desc', ["x", 1]),
+    ('rating_desc', [None, None]),
+    ('rating_desc', [[1], 2]),
+    ('reviews_asc', [1.5, 2]),
+    ('name_asc', [1, 2]),
+    ('name_asc', ["mandi 1", True]),
+    ('rating_asc', [True, 1]),
+])
+def test_mistyped_cursor_is_rejected(sort, key):
+    with pytest.raises(ValueError):
+        _index().page(sort=sort, cursor=encode_cursor(key))
+
+
+def test_cursor_walks_every_restaurant_once():
+    index = _index()
+    for sort in ('rating_desc', 'reviews_asc', 'name_desc'):
+        seen, cursor = [], None
+        while True:
+            ids, cursor, total = index.page(sort=sort, limit=7, cursor=cursor)
+            seen += ids
+            if cursor is None:
+                break
+        assert sorted(seen) == list(range(1, 31)) and total == 30
+
+
+def test_ids_restrict_pages_and_total():
+    ids, cursor, total = _index().page(sort='name_asc', limit=2, ids={3, 4, 5, 99}, district=['kottayam'])
+    assert ids == [3, 4] and cursor is not None and total == 3
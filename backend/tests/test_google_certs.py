@@ -0,0 +1,104 @@
+"""google_certs freshness against a local fake of Google's certs endpoint."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import rsa
+from google.auth import crypt, jwt
+
+import google_certs
+from google_certs import CertCache, CertsUnavailable, GoogleTokenVerifier
+
+AUDIENCE = 'test-client-id.apps.googleusercontent.com'
+
+
+class FakeCerts:
+    """Serves {kid: PEM} with Cache-Control max-age; down=True answers 503."""
+    def __init__(self):
+        self.keys = {}
+        self.down = False
+        self.hits = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.hits += 1
+                if fake.down:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(fake.keys).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Cache-Control', 'public, max-age=3600')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/oauth2/v1/certs'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def rotate(self, kid):
+        """Replace the published keys with a new one; returns a signer for it."""
+        public, private = rsa.newkeys(1024)
+        self.keys = {kid: public.save_pkcs1().decode('utf-8')}
+        return crypt.RSASigner.from_string(private.save_pkcs1().decode('utf-8'), key_id=kid)
+
+
+def _token(signer):
+    now = int(time.time())
+    return jwt.encode(signer, {'iss': 'https://accounts.google.com', 'aud': AUDIENCE, 'sub': '1',
+                               'iat': now, 'exp': now + 3600}).decode('utf-8')
+
+
+@pytest.fixture
+def fake():
+    fake = FakeCerts()
+    yield fake
+    fake.server.shutdown()
+
+
+def _expire(verifier, seconds_ago):
+    verifier.certs._certs.expires_at = time.monotonic() - seconds_ago
+
+
+def test_certs_are_fetched_once_while_fresh(fake):
+    signer = fake.rotate('k1')
+    verifier = GoogleTokenVerifier(CertCache(fake.url))
+    for _ in range(20):
+        assert verifier.verify(_token(signer), AUDIENCE)['sub'] == '1'
+    assert fake.hits == 1
+
+
+def test_expired_certs_are_refetched_before_use(fake):
+    old = fake.rotate('k1')
+    verifier = GoogleTokenVerifier(CertCache(fake.url))
+    verifier.verify(_token(old), AUDIENCE)
+    new = fake.rotate('k2')
+    _expire(verifier, 1)
+    # The rotated-out key is gone as soon as the cache expires, not a grace period later
+    with pytest.raises(ValueError):
+        verifier.verify(_token(old), AUDIENCE)
+    assert verifier.verify(_token(new), AUDIENCE)['sub'] == '1'
+
+
+def test_stale_certs_only_while_the_endpoint_fails(fake):
+    signer = fake.rotate('k1')
+    verifier = GoogleTokenVerifier(CertCache(fake.url))
+    verifier.verify(_token(signer), AUDIENCE)
+    fake.down = True
+    _expire(verifier, 1)
+    assert verifier.verify(_token(signer), AUDIENCE)['sub'] == '1'
+    hits = fake.hits
+    verifier.verify(_token(signer), AUDIENCE)
+    assert fake.hits == hits  # backs off instead of refetching per request
+
+    verifier.certs._next_refresh = 0.0
+    _expire(verifier, google_certs.CERTS_STALE_GRACE + 1)
+    with pytest.raises(CertsUnavailable):
+        verifier.verify(_token(signer), AUDIENCE)
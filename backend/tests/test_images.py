@@ -0,0 +1,45 @@
+"""The image process pool must not re-run the entry script in its workers."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('PIL')
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Deliberately no __main__ guard, like app.py's module-level startup
+SCRIPT = """
+import io, sys
+sys.path.insert(0, {backend!r})
+print('startup', flush=True)
+from PIL import Image
+import images
+buf = io.BytesIO()
+Image.new('RGB', (120, 80), 'orange').save(buf, format='PNG')
+futures = [images.square_variants_async(buf.getvalue(), sizes=(32,), formats=('jpeg',)) for _ in range(4)]
+print('variants', [sorted(f.result(timeout=60)) for f in futures][0], flush=True)
+"""
+
+
+def test_workers_do_not_import_main(tmp_path):
+    script = tmp_path / 'entry.py'
+    script.write_text(SCRIPT.format(backend=BACKEND))
+    env = dict(os.environ, IMAGE_WORKERS='2')
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120, env=env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.count('startup') == 1, result.stdout
+    assert "variants [(32, 'jpeg')]" in result.stdout
+
+
+def test_square_variants_crop():
+    from PIL import Image
+    import io
+    import images
+
+    buf = io.BytesIO()
+    Image.new('RGB', (300, 200), 'white').save(buf, format='JPEG')
+    out = images.square_variants(buf.getvalue(), sizes=(64, 256), formats=('jpeg',))
+    assert Image.open(io.BytesIO(out[(64, 'jpeg')])).size == (64, 64)
+    assert Image.open(io.BytesIO(out[(256, 'jpeg')])).size == (200, 200)  # never upscaled
@@ -0,0 +1,189 @@
+"""Crash consistency of journal.py: torn tails, snapshot + tail replay, corrupt segments, SIGKILL."""
+import os
+import signal
+import subprocess
+import threading
+import sys
+import time
+
+import pytest
+
+from journal import Journal, JournalError, JournaledStore, encode
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESTAURANTS = [{"id": i, "name": f"Mandi {i}", "location": "Pala, Kottayam"} for i in range(1, 11)]
+
+
+def _review(i):
+    return {"id": i, "restaurant_id": i % 10 + 1, "user_email": "a@example.com", "user_name": "a",
+            "rating": i % 5 + 1, "comment": f"Review {i}", "created_at": "2026-01-01T00:00:00Z"}
+
+
+def _open(directory, **kwargs):
+    journal = Journal(str(directory), fsync=False, snapshot_every=0, **kwargs)
+    store = JournaledStore(journal, RESTAURANTS)
+    return journal, store, journal.recover()
+
+
+def _segments(directory):
+    return sorted(n for n in os.listdir(directory) if n.startswith('journal-'))
+
+
+def test_reopen_replays_every_write(tmp_path):
+    journal, store, _ = _open(tmp_path)
+    for i in range(1, 51):
+        store.add_review(_review(i))
+    journal.close()
+
+    journal, store, report = _open(tmp_path)
+    assert report["records"] == 50 and report["truncated_bytes"] == 0
+    assert [r["id"] for r in store.reviews] == list(range(1, 51))
+    journal.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    journal, store, _ = _open(tmp_path)
+    for i in range(1, 6):
+        store.add_review(_review(i))
+    journal.close()
+    frame = encode('review', _review(99))
+    with open(tmp_path / _segments(tmp_path)[-1], 'ab') as f:
+        f.write(frame[:len(frame) // 2])
+
+    journal, store, report = _open(tmp_path)
+    assert report["truncated_bytes"] == len(frame) // 2
+    assert store.get_review(99) is None
+    assert len(store.reviews) == 5
+    # The segment is clean again: new writes after the truncation survive the next reopen
+    store.add_review(_review(6))
+    journal.close()
+    journal, store, report = _open(tmp_path)
+    assert report["truncated_bytes"] == 0 and len(store.reviews) == 6
+    journal.close()
+
+
+def test_snapshot_plus_tail(tmp_path):
+    journal, store, _ = _open(tmp_path)
+    for i in range(1, 101):
+        store.add_review(_review(i))
+    base = journal.snapshot()
+    for i in range(101, 111):
+        store.add_review(_review(i))
+    journal.close()
+    # Segments the snapshot covers are gone
+    assert all(int(n[len('journal-'):-len('.log')]) >= base for n in _segments(tmp_path))
+
+    journal, store, report = _open(tmp_path)
+    assert report["snapshot"] == base
+    assert report["snapshot_items"] == 100 and report["records"] == 10
+    assert sorted(r["id"] for r in store.reviews) == list(range(1, 111))
+    assert all(store.get_review(i) == _review(i) for i in range(1, 111))
+    journal.close()
+
+
+def test_corrupt_middle_segment_raises(tmp_path):
+    journal, store, _ = _open(tmp_path)
+    store.add_review(_review(1))
+    journal.close()
+    journal, store, _ = _open(tmp_path)  # every recover() opens a new segment
+    store.add_review(_review(2))
+    journal.close()
+    first = tmp_path / _segments(tmp_path)[0]
+    data = bytearray(first.read_bytes())
+    data[-3] ^= 0xFF  # flip a payload byte: the CRC no longer matches
+    first.write_bytes(bytes(data))
+
+    with pytest.raises(JournalError):
+        _open(tmp_path)
+
+
+def test_directory_lock(tmp_path):
+    journal, _, _ = _open(tmp_path)
+    with pytest.raises(JournalError):
+        _open(tmp_path)
+    journal.close()
+    journal, _, _ = _open(tmp_path)
+    journal.close()
+
+
+_CHILD = """
+import sys, threading
+sys.path.insert(0, {backend!r})
+from tests.test_journal import _review, RESTAURANTS
+from journal import Journal, JournaledStore
+journal = Journal({directory!r}, snapshot_every=200)
+store = JournaledStore(journal, RESTAURANTS)
+journal.recover()
+ids = iter(range(max((r["id"] for r in store.reviews), default=0) + 1, 10 ** 9))
+lock = threading.Lock()
+def writer():
+    while True:
+        with lock:
+            i = next(ids)
+        store.add_review(_review(i))
+        with lock:
+            sys.stdout.write(f"{{i}}\\n")
+            sys.stdout.flush()
+for _ in range(4):
+    threading.Thread(target=writer, daemon=True).start()
+threading.Event().wait()
+"""
+
+
+def test_acknowledged_writes_survive_sigkill(tmp_path):
+    acked = set()
+    for kill_after in (0.3, 0.6, 0.9):
+        child = subprocess.Popen([sys.executable, '-c', _CHILD.format(backend=BACKEND, directory=str(tmp_path))],
+                                 stdout=subprocess.PIPE, text=True)
+        deadline = time.time() + 30
+        # Wait for the child to start writing, then kill it mid-stream
+        first = child.stdout.readline()
+        assert first, 'journal child produced no writes'
+        acked.add(int(first))
+        time.sleep(kill_after)
+        child.send_signal(signal.SIGKILL)
+        acked.update(int(line) for line in child.stdout)
+        child.wait(timeout=max(1, deadline - time.time()))
+
+        journal, store, _ = _open(tmp_path)
+        found = {r["id"]: r for r in store.reviews}
+        assert len(found) == len(store.reviews), 'duplicate reviews after recovery'
+        assert acked <= found.keys(), f'lost acknowledged reviews: {sorted(acked - found.keys())[:5]}'
+        assert all(r == _review(i) for i, r in found.items())
+        journal.close()
+
+
+def test_writers_waiting_outside_their_lock_share_flushes(tmp_path, monkeypatch):
+    journal = Journal(str(tmp_path), fsync=True, snapshot_every=0)
+    store = JournaledStore(journal, RESTAURANTS)
+    journal.recover()
+    real_fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: (time.sleep(0.005), real_fsync(fd)))
+    outer = threading.RLock()  # stands in for app._catalog_lock
+    ids = iter(range(1, 201))
+    ids_lock = threading.Lock()
+
+    def writer():
+        for _ in range(25):
+            with ids_lock:
+                i = next(ids)
+            with outer:
+                position = store.queue_review(_review(i))
+            store.wait_durable(position)
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(store.reviews) == 200 and journal.flushes < 100
+    journal.close()
+
+
+def test_refused_write_runs_nothing(tmp_path):
+    journal, store, _ = _open(tmp_path)
+    journal._failed = OSError('disk gone')
+    indexed = []
+    with pytest.raises(JournalError):
+        store.queue_review(_review(1), before=lambda: indexed.append(1))
+    assert indexed == [] and store.reviews == []
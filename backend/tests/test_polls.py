@@ -0,0 +1,44 @@
+"""POST /api/polls and votes: malformed JSON bodies are 400s, never 500s."""
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture(scope='module')
+def client():
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-of-at-least-32-bytes')
+    import app as app_module
+    return app_module.app.test_client()
+
+
+@pytest.fixture(scope='module')
+def auth(client):
+    with client.application.app_context():
+        return {"Authorization": f"Bearer {create_access_token(identity='pollster@example.com')}"}
+
+
+@pytest.mark.parametrize('body', [
+    ["title", "options"],
+    {"title": 5, "options": ["A", "B"]},
+    {"title": ["Best"], "options": ["A", "B"]},
+    {"title": "Best", "options": [5, "B"]},
+    {"title": "Best", "options": [{"label": 5}, "B"]},
+    {"title": "Best", "options": [{"label": "A", "restaurant_id": [1]}, "B"]},
+    {"title": "Best", "options": [{"label": "A", "restaurant_id": {"id": 1}}, "B"]},
+    {"title": "Best", "options": [{"label": "A", "restaurant_id": True}, "B"]},
+    {"title": "Best", "options": [{"label": "A", "restaurant_id": 999999}, "B"]},
+])
+def test_malformed_poll_is_rejected(client, auth, body):
+    assert client.post('/api/polls', json=body, headers=auth).status_code == 400
+
+
+def test_poll_with_restaurant_options(client, auth):
+    resp = client.post('/api/polls', headers=auth, json={
+        "title": "  Best in town ", "options": [{"restaurant_id": 1}, {"label": "Other", "restaurant_id": 2}, "None"]})
+    assert resp.status_code == 201
+    poll = resp.get_json()
+    assert poll["title"] == "Best in town" and [o["key"] for o in poll["options"]] == ["1", "2", "3"]
+    assert poll["options"][1] == {"key": "2", "label": "Other", "restaurant_id": 2}
+    assert client.post(f"/api/polls/{poll['id']}/vote", json=["1"], headers=auth).status_code == 400
+    assert client.post(f"/api/polls/{poll['id']}/vote", json={"option": "1"}, headers=auth).status_code == 201
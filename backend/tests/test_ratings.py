@@ -0,0 +1,49 @@
+"""Running rating aggregates stay equal to a full rescan of the reviews."""
+import os
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from ratings import RatingAggregates
+
+
+def test_verify_flags_a_drifted_restaurant():
+    reviews = [{"restaurant_id": rid, "rating": r} for rid, r in ((1, 5), (1, 3), (2, 4))]
+    aggregates = RatingAggregates()
+    aggregates.rebuild(reviews)
+    assert aggregates.verify(reviews) == []
+    aggregates.add(2, 1)
+    assert aggregates.verify(reviews) == [2]
+
+
+@pytest.fixture(scope='module')
+def app_module():
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-of-at-least-32-bytes')
+    import app as app_module
+    return app_module
+
+
+def test_create_review_keeps_aggregates_consistent(app_module):
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='rater@example.com')}"}
+
+    def post(worker):
+        local = app_module.app.test_client()
+        for i in range(25):
+            rid = (worker * 25 + i) % 5 + 1
+            resp = local.post(f'/api/restaurants/{rid}/reviews', json={"rating": i % 5 + 1}, headers=headers)
+            assert resp.status_code == 201
+
+    threads = [threading.Thread(target=post, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert app_module.rating_aggregates.verify(app_module.store.reviews) == []
+    detail = client.get('/api/restaurants/1/detail').get_json()["restaurant"]
+    ratings = [r["rating"] for r in app_module.store.reviews if r["restaurant_id"] == 1]
+    assert detail["review_count"] == len(ratings)
+    assert detail["avg_rating"] == round(sum(ratings) / len(ratings), 1)
@@ -0,0 +1,38 @@
+"""Accept-Encoding negotiation and eviction in the versioned response cache."""
+import pytest
+
+import response_cache
+from response_cache import CachedPayload, ResponseCache
+
+
+@pytest.mark.parametrize('header, encoding', [
+    (None, None),
+    ('gzip', 'gzip'),
+    ('GZIP, deflate', 'gzip'),
+    ('gzip;q=0', None),
+    ('gzip;q=0, *', None),
+    ('*;q=0.5', 'gzip'),
+    ('identity', None),
+])
+def test_gzip_negotiation(monkeypatch, header, encoding):
+    monkeypatch.setattr(response_cache, 'brotli', None)
+    assert CachedPayload(b'{}').variant(header)[1] == encoding
+
+
+def test_brotli_follows_q_values():
+    pytest.importorskip('brotli')
+    payload = CachedPayload(b'{}')
+    assert payload.variant('gzip, br')[1] == 'br'
+    assert payload.variant('br;q=0.5, gzip')[1] == 'gzip'
+    assert payload.variant('br;q=0, gzip;q=0.1')[1] == 'gzip'
+
+
+def test_eviction_only_drops_stale_entries_of_the_same_family():
+    cache = ResponseCache(max_entries=3)
+    cache.get(('restaurants', b''), 1, lambda: b'r1')
+    cache.get(('poll', 7, 'open'), (2, 5), lambda: b'p')
+    cache.get(('trending', b''), 9, lambda: b't')
+    # A newer restaurants version only evicts the stale restaurants entry, not other families
+    cache.get(('restaurants', b'page=2'), 2, lambda: b'r2')
+    assert sorted(k[0] for k in cache._entries) == ['poll', 'restaurants', 'trending']
+    assert ('restaurants', b'') not in cache._entries
@@ -0,0 +1,57 @@
+"""Review and photo pages follow created_at, not id: ids come from per-process blocks (ids.py)."""
+import pytest
+
+from db import ConnectionPool
+from sqlite_store import SqliteStore
+from store import Store
+
+RESTAURANTS = [{"id": 1, "name": "Mandi 1", "location": "Pala, Kottayam"}]
+# Two workers holding blocks 1.. and 65..: creation order interleaves their ids
+IDS = [1, 65, 2, 66, 3, 67, 4, 68]
+
+
+def _created_at(i):
+    return f"2026-01-01T00:00:{i:02d}.000000Z"
+
+
+def _store(kind, tmp_path):
+    if kind == 'sqlite':
+        return SqliteStore(ConnectionPool(str(tmp_path / 'mandhi.db')), RESTAURANTS)
+    return Store(RESTAURANTS)
+
+
+def _fill(store):
+    for i, rid in enumerate(IDS):
+        store.add_review({"id": rid, "restaurant_id": 1, "user_email": "a@example.com", "user_name": "a",
+                          "rating": 5, "comment": "", "created_at": _created_at(i)})
+        store.add_photo({"id": rid, "review_id": rid, "restaurant_id": 1, "user_email": "a@example.com",
+                         "url": f"/p/{rid}", "status": "ready", "created_at": _created_at(i)})
+
+
+def _walk(page, limit=3):
+    seen, before = [], None
+    while True:
+        rows = page(before, limit)
+        seen += [r["id"] for r in rows]
+        if len(rows) < limit:
+            return seen
+        before = (rows[-1]["created_at"], rows[-1]["id"])
+
+
+@pytest.mark.parametrize('kind', ['memory', 'sqlite'])
+def test_pages_are_newest_first_by_created_at(tmp_path, kind):
+    store = _store(kind, tmp_path)
+    _fill(store)
+    newest_first = IDS[::-1]
+    assert _walk(lambda before, limit: store.review_page(1, before, limit)) == newest_first
+    assert _walk(lambda before, limit: store.user_review_page("a@example.com", before, limit)) == newest_first
+    assert _walk(lambda before, limit: store.photo_page(1, before, limit)) == newest_first
+    assert [r["id"] for r in store.reviews_for_restaurant(1)] == IDS
+
+
+def test_cursor_without_microseconds_sorts_with_the_rest(tmp_path):
+    store = Store(RESTAURANTS)
+    _fill(store)
+    # Older records were written as 'YYYY-MM-DDTHH:MM:SSZ'
+    rows = store.review_page(1, ("2026-01-01T00:00:05Z", 67), 10)
+    assert [r["id"] for r in rows] == [3, 66, 2, 65, 1]
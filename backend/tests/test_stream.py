@@ -0,0 +1,71 @@
+"""Where /api/stream redirects: never to a stream server the client cannot reach."""
+import socket
+
+import pytest
+
+from events import is_loopback
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    import app as app_module
+    monkeypatch.delenv('STREAM_FD', raising=False)
+    monkeypatch.setattr(app_module, '_stream_server', None)
+    monkeypatch.setattr(app_module, 'STREAM_HOST', None)
+    monkeypatch.setattr(app_module, 'STREAM_PUBLIC_URL', None)
+    monkeypatch.setattr(app_module, 'STREAM_PORT', _free_port())
+    return app_module
+
+
+def test_loopback_stream_is_not_offered_to_remote_hosts(app_module):
+    client = app_module.app.test_client()
+    resp = client.get('/api/stream', base_url='http://mandhi.example.com')
+    assert resp.status_code == 503
+    assert client.get('/api/stream?restaurant_id=1', base_url='http://localhost:5000').status_code == 307
+
+
+def test_stream_binds_where_the_app_is_served(app_module):
+    client = app_module.app.test_client()
+    resp = client.get('/api/stream', base_url='http://mandhi.example.com',
+                      environ_overrides={'SERVER_NAME': '0.0.0.0'})
+    assert resp.status_code == 307
+    assert resp.headers['Location'] == f'http://mandhi.example.com:{app_module.STREAM_PORT}/api/stream'
+    assert app_module._stream_server.host == '0.0.0.0'
+
+
+def test_public_url_wins(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'STREAM_PUBLIC_URL', 'https://stream.example.com/')
+    resp = app_module.app.test_client().get('/api/stream?poll=weekly', base_url='http://mandhi.example.com')
+    assert resp.headers['Location'] == 'https://stream.example.com/api/stream?poll=weekly'
+
+
+def test_is_loopback():
+    assert is_loopback('127.0.0.1') and is_loopback('::1') and is_loopback('localhost')
+    assert not is_loopback('0.0.0.0') and not is_loopback('10.0.0.5') and not is_loopback('example.com')
+
+
+def test_shared_mode_publishes_one_event_per_ready_photo(shared_app):
+    result = shared_app("""
+from PIL import Image
+from events import BROADCASTER
+published = []
+BROADCASTER.subscribers.add(object())  # _publish_* skip work while nobody listens
+BROADCASTER.publish = lambda type_, data, **keys: published.append([type_, data])
+image = io.BytesIO()
+Image.new('RGB', (64, 64), 'red').save(image, 'JPEG')
+resp = client.post('/api/restaurants/4/reviews', headers=auth, content_type='multipart/form-data',
+                   data={"rating": "4", "photos": (io.BytesIO(image.getvalue()), 'a.jpg')})
+assert resp.status_code == 201, resp.get_data(as_text=True)
+assert app.upload_queue.wait_idle()
+app._sync_shared_state(force=True)
+app._sync_shared_state(force=True)
+print(json.dumps(published))
+""")
+    assert [type_ for type_, _ in result] == ['review', 'photo']
+    assert result[1][1]["restaurant_id"] == 4 and result[1][1]["photo"]["url"]
@@ -0,0 +1,32 @@
+"""Trending counts each review and ready photo once, in memory and in shared (DATABASE_PATH) mode."""
+from trending import Trending
+
+_POST_REVIEW_WITH_PHOTO = """
+from PIL import Image
+image = io.BytesIO()
+Image.new('RGB', (64, 64), 'red').save(image, 'JPEG')
+resp = client.post('/api/restaurants/3/reviews', headers=auth, content_type='multipart/form-data',
+                   data={"rating": "5", "photos": (io.BytesIO(image.getvalue()), 'a.jpg')})
+assert resp.status_code == 201, resp.get_data(as_text=True)
+assert app.upload_queue.wait_idle()
+app._sync_shared_state(force=True)
+"""
+
+
+def test_counts_within_windows():
+    trending = Trending(lambda rid: 'kottayam', refresh=0)
+    trending.record_review({"restaurant_id": 1, "rating": 5})
+    trending.record_photo({"restaurant_id": 1})
+    trending.record_review({"restaurant_id": 2, "rating": 1})
+    top = trending.top('24h')
+    assert [(rid, reviews, photos) for rid, _, reviews, photos in top] == [(1, 1, 1), (2, 1, 0)]
+    assert len(trending.top('7d', 'Kottayam')) == 2
+
+
+def test_shared_mode_counts_a_ready_photo_once(shared_app):
+    result = shared_app(_POST_REVIEW_WITH_PHOTO + """
+changes = [list(c) for c in app.store.changes_since(0)]
+print(json.dumps({"changes": changes, "top": app.trending.top('24h')}))
+""")
+    assert [kind for _, kind, _ in result["changes"]] == ['review', 'photo', 'photo_ready']
+    assert [(rid, reviews, photos) for rid, _, reviews, photos in result["top"]] == [(3, 1, 1)]
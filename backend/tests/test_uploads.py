@@ -0,0 +1,117 @@
+"""UploadQueue with FakeUploader: job states, retries, callback failures and the 503 when full."""
+import io
+import os
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from uploads import FakeUploader, UploadQueue, UploadQueueFull
+
+
+def _queue(uploader, **kwargs):
+    kwargs.setdefault('backoff', 0)
+    return UploadQueue(uploader, workers=1, **kwargs)
+
+
+def test_pending_then_ready():
+    release = threading.Event()
+    done = []
+    q = _queue(FakeUploader())
+    job_id = q.submit(lambda: release.wait(5) and b'jpeg', 'photos', on_done=done.append)
+    assert q.status(job_id)["status"] == "pending" and q.pending() == 1
+    release.set()
+    assert q.wait_idle()
+    job = q.status(job_id)
+    assert job["status"] == "ready" and job["attempts"] == 1 and done == [job["url"]]
+
+
+def test_retries_then_ready():
+    q = _queue(FakeUploader(fail_first=1))
+    job_id = q.submit(b'jpeg', 'photos')
+    assert q.wait_idle()
+    assert q.status(job_id)["status"] == "ready" and q.status(job_id)["attempts"] == 2
+
+
+def test_several_files_in_one_job():
+    uploader = FakeUploader(fail_first=1)
+    done = []
+    q = _queue(uploader)
+    job_id = q.submit(lambda: {'64.webp': b'a', '64.jpeg': b'b'}, 'avatars', on_done=done.append)
+    assert q.wait_idle()
+    job = q.status(job_id)
+    assert job["status"] == "ready" and done == [job["url"]] and sorted(job["url"]) == ['64.jpeg', '64.webp']
+    assert sorted(uploader.files[url[len('/fake-uploads/'):]] for url in job["url"].values()) == [b'a', b'b']
+
+
+def test_retries_then_failed():
+    failed = []
+    q = _queue(FakeUploader(fail_first=5), max_attempts=3)
+    job_id = q.submit(b'jpeg', 'photos', on_done=lambda url: pytest.fail('uploaded'), on_fail=failed.append)
+    assert q.wait_idle()
+    job = q.status(job_id)
+    assert job["status"] == "failed" and job["attempts"] == 3 and failed == ['fake upload failure']
+
+
+def test_failing_on_done_marks_the_job_failed():
+    failed = []
+
+    def on_done(url):
+        raise RuntimeError('store unavailable')
+    q = _queue(FakeUploader())
+    job_id = q.submit(b'jpeg', 'photos', on_done=on_done, on_fail=failed.append)
+    assert q.wait_idle()
+    assert q.status(job_id)["status"] == "failed" and len(failed) == 1 and 'store unavailable' in failed[0]
+
+
+def test_submit_beyond_max_pending_raises():
+    release = threading.Event()
+    q = _queue(FakeUploader(), max_pending=1)
+    q.submit(lambda: release.wait(5) and b'jpeg', 'photos')
+    with pytest.raises(UploadQueueFull):
+        q.submit(b'jpeg', 'photos')
+    release.set()
+    assert q.wait_idle()
+
+
+def test_full_queue_answers_503(monkeypatch):
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-of-at-least-32-bytes')
+    import app as app_module
+    release = threading.Event()
+    q = _queue(FakeUploader(), max_pending=1)
+    q.submit(lambda: release.wait(5) and b'jpeg', 'photos')
+    monkeypatch.setattr(app_module, 'upload_queue', q)
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='full@example.com')}"}
+    resp = client.post('/api/restaurants/1/reviews', headers=headers, content_type='multipart/form-data',
+                       data={"rating": "4", "photos": (io.BytesIO(b'jpeg'), 'a.jpg')})
+    release.set()
+    assert resp.status_code == 503 and resp.headers["Retry-After"] == "5"
+    assert q.wait_idle()
+
+
+def test_review_photos_keep_their_reserved_slots(monkeypatch):
+    os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-of-at-least-32-bytes')
+    import app as app_module
+    q = _queue(FakeUploader(), max_pending=1)
+    monkeypatch.setattr(app_module, 'upload_queue', q)
+    raced = []
+    apply_review = app_module._apply_review
+
+    def racing_apply(review):
+        # Another request tries to take the last slot while this review is being committed
+        with pytest.raises(UploadQueueFull):
+            q.submit(b'jpeg', 'photos')
+        raced.append(review["id"])
+        apply_review(review)
+    monkeypatch.setattr(app_module, '_apply_review', racing_apply)
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='race@example.com')}"}
+    resp = client.post('/api/restaurants/1/reviews', headers=headers, content_type='multipart/form-data',
+                       data={"rating": "4", "photos": (io.BytesIO(b'jpeg'), 'a.jpg')})
+    assert resp.status_code == 201 and raced == [resp.get_json()["id"]]
+    photos = resp.get_json()["photos"]
+    assert len(photos) == 1 and photos[0]["job_id"]
+    assert q.wait_idle() and q.status(photos[0]["job_id"])["status"] == "ready"
@@ -0,0 +1,135 @@
+"""Resized, content-hashed variants of the local mandhi photos.
+
+    python thumbnails.py            # build ahead of time (also runs at app startup)
+
+Every image in frontend/public/images/mandhi is decoded once and written to
+THUMBNAIL_CACHE_DIR as <hash>-<width>.<ext> for each width in WIDTHS and each
+available format (AVIF when pillow-avif-plugin is installed, WebP, JPEG).
+The hash covers the source bytes and the encoder settings, so a URL never
+changes meaning and can be cached as immutable. manifest.json remembers each
+source's size/mtime; unchanged sources are not decoded again.
+"""
+import hashlib
+import json
+import os
+
+import images
+from metrics import IMAGE_SECONDS
+
+SOURCE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'frontend', 'public', 'images', 'mandhi'))
+CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'thumbnails')
+URL_PREFIX = '/assets/mandhi'
+WIDTHS = (320, 640, 1024)
+DEFAULT_WIDTH = 640
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+MIME = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+# Bump when WIDTHS or encoder settings change so every hash (and URL) changes with them
+VARIANT_VERSION = 1
+
+
+def _formats():
+    return (('avif',) if images.AVIF_AVAILABLE else ()) + ('webp', 'jpeg')
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _build_one(data: bytes, formats):
+    digest = hashlib.sha256(data + repr((VARIANT_VERSION, WIDTHS, formats, images.FORMATS)).encode()).hexdigest()[:16]
+    variants = []
+    with IMAGE_SECONDS.time(kind='thumbnail'):
+        built = images.width_variants(data, WIDTHS, formats)
+    for (width, fmt), (body, height) in sorted(built.items()):
+        ext = 'jpg' if fmt == 'jpeg' else fmt
+        file_name = f'{digest}-{width}.{ext}'
+        path = os.path.join(CACHE_DIR, file_name)
+        if not os.path.exists(path):
+            _write_atomic(path, body)
+        variants.append({"file": file_name, "width": width, "height": height, "format": fmt})
+    return {"hash": digest, "variants": variants}
+
+
+def build(source_dir: str = SOURCE_DIR) -> dict:
+    """Bring the cache up to date with source_dir; returns the manifest {name: entry}.
+    Sources that cannot be decoded (e.g. AVIF without the plugin) get an entry with no variants.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest_path = os.path.join(CACHE_DIR, 'manifest.json')
+    try:
+        with open(manifest_path) as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = {}
+    formats = _formats()
+    manifest = {}
+    for name in sorted(os.listdir(source_dir)):
+        if not name.lower().endswith(EXTENSIONS):
+            continue
+        path = os.path.join(source_dir, name)
+        st = os.stat(path)
+        prev = old.get(name)
+        if (prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns
+                and prev.get("formats") == list(formats) and prev.get("version") == VARIANT_VERSION
+                and all(os.path.exists(os.path.join(CACHE_DIR, v["file"])) for v in prev["variants"])):
+            manifest[name] = prev
+            continue
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "formats": list(formats),
+                 "version": VARIANT_VERSION, "hash": None, "variants": []}
+        if images.PIL_AVAILABLE and (images.AVIF_AVAILABLE or not name.lower().endswith('.avif')):
+            try:
+                with open(path, 'rb') as f:
+                    entry.update(_build_one(f.read(), formats))
+            except Exception as ex:
+                print(f'Could not build thumbnails for {name}:', ex)
+        manifest[name] = entry
+    _write_atomic(manifest_path, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+    keep = {v["file"] for e in manifest.values() for v in e["variants"]} | {'manifest.json'}
+    for name in os.listdir(CACHE_DIR):
+        if name not in keep and not name.endswith('.tmp'):
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
+    return manifest
+
+
+def image_set(name: str, entry: dict) -> dict:
+    """Public description of one source: { name, src, width?, height?, sources: [{type, srcset}] }.
+    src is the DEFAULT_WIDTH JPEG (or the original file when no variants exist); sources are ordered
+    best format first so they drop straight into <picture><source ...>.
+    """
+    variants = entry.get("variants") or []
+    if not variants:
+        return {"name": name, "src": f"/images/mandhi/{name}", "sources": []}
+    sources = []
+    for fmt in ('avif', 'webp', 'jpeg'):
+        of_fmt = [v for v in variants if v["format"] == fmt]
+        if of_fmt:
+            sources.append({"type": MIME[fmt],
+                            "srcset": ', '.join(f'{URL_PREFIX}/{v["file"]} {v["width"]}w' for v in of_fmt)})
+    jpegs = [v for v in variants if v["format"] == 'jpeg'] or variants
+    default = min(jpegs, key=lambda v: (abs(v["width"] - DEFAULT_WIDTH), -v["width"]))
+    return {"name": name, "src": f'{URL_PREFIX}/{default["file"]}',
+            "width": default["width"], "height": default["height"], "sources": sources}
+
+
+def load_image_sets(source_dir: str = SOURCE_DIR):
+    """Build (if needed) and return the image sets for every local mandhi photo, in name order."""
+    if not os.path.isdir(source_dir):
+        return []
+    manifest = build(source_dir)
+    undecoded = [n for n, e in manifest.items() if not e["variants"]]
+    if undecoded:
+        print(f'{len(undecoded)} mandhi image(s) served without variants (install pillow-avif-plugin for AVIF):',
+              ', '.join(undecoded))
+    return [image_set(name, manifest[name]) for name in sorted(manifest)]
+
+
+if __name__ == '__main__':
+    for s in load_image_sets():
+        print(s["name"], '->', s["src"], f'({sum(len(x["srcset"].split(",")) for x in s["sources"])} variants)')
@@ -0,0 +1,206 @@
+"""Trending restaurants from time-decayed, sliding-window review and photo activity.
+
+Every restaurant with recent activity has one fixed-size _Counters: 24
+hourly and 7 daily ring-buffer buckets (review and photo counts), plus one
+exponentially decayed score per window. A bucket slot remembers which hour
+or day it holds and is reset when a later one reuses it. record() is O(1),
+and a restaurant's memory stays the same however many reviews it gets.
+Counters that have decayed to nothing are pruned at the next recompute.
+
+Scores decay with a half-life of TRENDING_HALF_LIFE_24H (6 h) for the 24h
+window and TRENDING_HALF_LIFE_7D (2 days) for 7d. A review adds 0.5 +
+rating / 10, so 1 star adds 0.6 and 5 stars adds 1.0. A photo that finished
+uploading adds TRENDING_PHOTO_WEIGHT. A burst of recent activity therefore
+outranks a long but quiet history. Events may arrive out of order (startup
+replay, other workers' writes), so an event older than the last update is
+decayed before it is added.
+
+Reads come from a snapshot of the top TRENDING_TOP_K per window, overall and
+per district. The snapshot is recomputed at most every TRENDING_REFRESH
+seconds, by whichever reader first finds it stale. generation() changes only
+when the snapshot does, so it can be used as a response-cache version.
+"""
+import heapq
+import os
+import threading
+import time
+from array import array
+from datetime import datetime
+
+TRENDING_REFRESH = float(os.environ.get('TRENDING_REFRESH', '30'))
+TRENDING_TOP_K = int(os.environ.get('TRENDING_TOP_K', '50'))
+TRENDING_HALF_LIFE_24H = float(os.environ.get('TRENDING_HALF_LIFE_24H', str(6 * 3600)))
+TRENDING_HALF_LIFE_7D = float(os.environ.get('TRENDING_HALF_LIFE_7D', str(2 * 86400)))
+TRENDING_PHOTO_WEIGHT = float(os.environ.get('TRENDING_PHOTO_WEIGHT', '0.5'))
+
+# window -> (bucket seconds, bucket count, decay half-life seconds)
+WINDOWS = {
+    '24h': (3600, 24, TRENDING_HALF_LIFE_24H),
+    '7d': (86400, 7, TRENDING_HALF_LIFE_7D),
+}
+_HALF_LIVES = [half_life for _, _, half_life in WINDOWS.values()]
+_MIN_SCORE = 1e-3  # below this (and with empty buckets) a restaurant is no longer trending
+
+
+def timestamp_of(created_at) -> float:
+    """Unix time of a 'YYYY-MM-DDTHH:MM:SS[.ffffff]Z' created_at (now if missing or malformed)."""
+    try:
+        return datetime.fromisoformat(str(created_at).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return time.time()
+
+
+class _Ring:
+    __slots__ = ('size', 'ids', 'reviews', 'photos')
+
+    def __init__(self, size: int, count: int):
+        self.size = size
+        # Flat machine-int arrays: the size is fixed at creation, whatever the counts grow to
+        self.ids = array('q', [-1] * count)  # which bucket (t // size) each slot holds
+        self.reviews = array('q', [0] * count)
+        self.photos = array('q', [0] * count)
+
+    def add(self, t: float, reviews: int, photos: int):
+        bucket = int(t // self.size)
+        slot = bucket % len(self.ids)
+        if self.ids[slot] != bucket:
+            if self.ids[slot] > bucket:
+                return  # a newer bucket took the slot; this one has left the window
+            self.ids[slot] = bucket
+            self.reviews[slot] = self.photos[slot] = 0
+        self.reviews[slot] += reviews
+        self.photos[slot] += photos
+
+    def totals(self, now: float):
+        """(reviews, photos) in the buckets still inside the window at now."""
+        oldest = int(now // self.size) - len(self.ids)
+        reviews = photos = 0
+        for i, bucket in enumerate(self.ids):
+            if bucket > oldest:
+                reviews += self.reviews[i]
+                photos += self.photos[i]
+        return reviews, photos
+
+
+class _Counters:
+    __slots__ = ('rings', 'scores', 'updated')
+
+    def __init__(self):
+        self.rings = [_Ring(size, count) for size, count, _ in WINDOWS.values()]
+        self.scores = array('d', [0.0] * len(WINDOWS))
+        self.updated = 0.0
+
+    def decayed(self, i: int, now: float) -> float:
+        half_life = _HALF_LIVES[i]
+        return self.scores[i] * 0.5 ** (max(0.0, now - self.updated) / half_life)
+
+
+class Trending:
+    def __init__(self, district_of_id, refresh: float = TRENDING_REFRESH, top_k: int = TRENDING_TOP_K):
+        """district_of_id(restaurant_id) -> lowercase district, or None to leave the restaurant out."""
+        self._district_of_id = district_of_id
+        self.refresh = refresh
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        self._recompute_lock = threading.Lock()
+        self._counters = {}  # restaurant_id -> _Counters
+        self._snapshot = {}  # (window, district or '') -> [(rid, score, reviews, photos)]
+        self._generation = 0
+        self._computed_at = 0.0  # monotonic
+        self.generated_at = None  # wall clock of the current snapshot
+
+    def record(self, restaurant_id, weight: float, reviews: int = 0, photos: int = 0, at: float = None):
+        now = time.time()
+        t = min(now, at) if at is not None else now
+        with self._lock:
+            c = self._counters.get(restaurant_id)
+            if c is None:
+                c = self._counters[restaurant_id] = _Counters()
+            if t >= c.updated:
+                for i in range(len(c.scores)):
+                    c.scores[i] = c.decayed(i, t) + weight
+                c.updated = t
+            else:
+                for i, half_life in enumerate(_HALF_LIVES):
+                    c.scores[i] += weight * 0.5 ** ((c.updated - t) / half_life)
+            for ring in c.rings:
+                ring.add(t, reviews, photos)
+
+    def record_review(self, review: dict, at: float = None):
+        weight = 0.5 + (review.get("rating") or 0) / 10
+        self.record(review["restaurant_id"], weight, reviews=1,
+                    at=at if at is not None else timestamp_of(review.get("created_at")))
+
+    def record_photo(self, photo: dict, at: float = None):
+        self.record(photo["restaurant_id"], TRENDING_PHOTO_WEIGHT, photos=1, at=at)
+
+    def rebuild(self, reviews, photos=()):
+        """Replay existing reviews and ready photos by their created_at (older ones decay away)."""
+        horizon = time.time() - max(size * count for size, count, _ in WINDOWS.values())
+        for review in reviews:
+            t = timestamp_of(review.get("created_at"))
+            if t > horizon:
+                self.record_review(review, at=t)
+        for photo in photos:
+            if photo.get("status") == "ready":
+                t = timestamp_of(photo.get("created_at"))
+                if t > horizon:
+                    self.record_photo(photo, at=t)
+        self._computed_at = 0.0
+
+    def _recompute(self):
+        if time.monotonic() - self._computed_at < self.refresh:
+            return
+        # One thread recomputes; the rest keep serving the current snapshot
+        if not self._recompute_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            rows = {name: [] for name in WINDOWS}
+            idle = []
+            # Read without the write lock: a counter updated mid-read is off by one event until next time
+            for rid, c in list(self._counters.items()):
+                totals = [ring.totals(now) for ring in c.rings]
+                scores = [c.decayed(i, now) for i in range(len(c.scores))]
+                if max(scores) < _MIN_SCORE and not any(sum(t) for t in totals):
+                    idle.append((rid, c.updated))
+                    continue
+                for i, name in enumerate(WINDOWS):
+                    if totals[i][0] or totals[i][1]:
+                        rows[name].append((scores[i], rid, totals[i]))
+            with self._lock:
+                for rid, updated in idle:
+                    if self._counters.get(rid) is not None and self._counters[rid].updated == updated:
+                        del self._counters[rid]
+            snapshot = {}
+            for name, entries in rows.items():
+                by_district = {}
+                for entry in entries:
+                    district = self._district_of_id(entry[1])
+                    if district is None:
+                        continue
+                    by_district.setdefault(district, []).append(entry)
+                snapshot[(name, '')] = heapq.nlargest(self.top_k, (e for es in by_district.values() for e in es))
+                for district, es in by_district.items():
+                    snapshot[(name, district)] = heapq.nlargest(self.top_k, es)
+            snapshot = {key: [(rid, round(score, 3), t[0], t[1]) for score, rid, t in entries]
+                        for key, entries in snapshot.items()}
+            if snapshot != self._snapshot:
+                self._snapshot = snapshot
+                self._generation += 1
+            self.generated_at = now
+            self._computed_at = time.monotonic()
+        finally:
+            self._recompute_lock.release()
+
+    def generation(self) -> int:
+        self._recompute()
+        return self._generation
+
+    def top(self, window: str, district: str = '', limit: int = 10):
+        """[(restaurant_id, score, reviews, photos)] best first, from the latest snapshot."""
+        self._recompute()
+        return self._snapshot.get((window, (district or '').strip().lower()), [])[:limit]
+
+    def __len__(self):
+        return len(self._counters)
@@ -0,0 +1,196 @@
+"""Background upload pipeline for review photos and avatars.
+
+Handlers read the file bytes, submit a job and return immediately; a small
+pool of worker threads pushes the bytes to the uploader with retries and
+exponential backoff, then calls the job's on_done/on_fail callback. The queue
+is bounded: when it is full, submit raises UploadQueueFull and the endpoint
+answers 503 instead of piling up work.
+
+UPLOAD_BACKEND=fake swaps Cloudinary for FakeUploader, which keeps bytes in
+memory (or under FAKE_UPLOAD_DIR) and can inject latency and failures.
+"""
+import io
+import os
+import queue
+import threading
+import time
+import uuid
+
+from metrics import UPLOAD_SECONDS
+
+
+class UploadQueueFull(Exception):
+    pass
+
+
+class CloudinaryUploader:
+    def __init__(self, cloudinary_module):
+        self._cloudinary = cloudinary_module
+
+    def __call__(self, data: bytes, folder: str) -> str:
+        up = self._cloudinary.uploader.upload(io.BytesIO(data), folder=folder, resource_type='image')
+        return up.get('secure_url') or up.get('url')
+
+
+class FakeUploader:
+    """Local stand-in for Cloudinary. fail_first=N makes the next N upload calls fail."""
+    def __init__(self, directory=None, delay: float = 0.0, fail_first: int = 0):
+        self.directory = directory
+        self.delay = delay
+        self.fail_first = fail_first
+        self.files = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, data: bytes, folder: str) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise IOError('fake upload failure')
+        name = f"{uuid.uuid4().hex}.jpg"
+        if self.directory:
+            path = os.path.join(self.directory, folder)
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, name), 'wb') as f:
+                f.write(data)
+        else:
+            with self._lock:
+                self.files[f"{folder}/{name}"] = data
+        return f"/fake-uploads/{folder}/{name}"
+
+
+class UploadQueue:
+    def __init__(self, uploader, workers: int = 4, max_pending: int = 256,
+                 max_attempts: int = 3, backoff: float = 0.5, keep_finished: int = 10_000):
+        self._uploader = uploader
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._jobs = {}  # job_id -> status dict (bounded to keep_finished entries)
+        self._keep_finished = keep_finished
+        self._threads = [threading.Thread(target=self._worker, daemon=True, name=f'upload-{i}') for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def reserve(self, count: int):
+        """Hold count queue slots for a later submit_many(..., reserved=True), so a handler can
+        check capacity before committing other work; raises UploadQueueFull if they do not fit.
+        Slots that end up unused must be handed back with release()."""
+        with self._lock:
+            if self._pending + count > self.max_pending:
+                raise UploadQueueFull()
+            self._pending += count
+
+    def release(self, count: int):
+        with self._lock:
+            self._pending -= count
+
+    def submit_many(self, jobs, reserved: bool = False):
+        """Queue several (data, folder, on_done, on_fail) jobs all-or-nothing; returns their job ids.
+        Raises UploadQueueFull if they do not all fit, unless their slots were reserved.
+        """
+        with self._lock:
+            if not reserved:
+                if self._pending + len(jobs) > self.max_pending:
+                    raise UploadQueueFull()
+                self._pending += len(jobs)
+            ids = []
+            for _ in jobs:
+                job_id = uuid.uuid4().hex
+                self._jobs[job_id] = {"job_id": job_id, "status": "pending", "attempts": 0, "url": None, "error": None}
+                ids.append(job_id)
+            while len(self._jobs) > self._keep_finished:
+                oldest = next(iter(self._jobs))
+                if self._jobs[oldest]["status"] == "pending":
+                    break
+                del self._jobs[oldest]
+        for job_id, job in zip(ids, jobs):
+            self._queue.put((job_id,) + tuple(job))
+        return ids
+
+    def submit(self, data, folder: str, on_done=None, on_fail=None) -> str:
+        """Queue one upload. data is bytes, a {key: bytes} dict of files uploaded together (the job's
+        url is then {key: url}), or a zero-argument callable returning either."""
+        return self.submit_many([(data, folder, on_done, on_fail)])[0]
+
+    def status(self, job_id):
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def pending(self) -> int:
+        return self._pending
+
+    def _fail(self, job, on_fail, error: str):
+        job.update(status="failed", error=error)
+        if on_fail:
+            try:
+                on_fail(error)
+            except Exception as ex:
+                print('Upload failure callback failed:', ex)
+
+    def _upload(self, job, data: bytes, folder: str):
+        """Upload with retries and backoff; returns the url, or None once every attempt failed."""
+        for attempt in range(1, self.max_attempts + 1):
+            job["attempts"] = attempt
+            started = time.perf_counter()
+            try:
+                url = self._uploader(data, folder)
+            except Exception as ex:
+                UPLOAD_SECONDS.observe(time.perf_counter() - started, outcome='error')
+                job["error"] = str(ex)
+                print(f'Upload attempt {attempt} failed:', ex)
+                if attempt < self.max_attempts:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                continue
+            UPLOAD_SECONDS.observe(time.perf_counter() - started, outcome='ok')
+            return url
+        return None
+
+    def _worker(self):
+        while True:
+            job_id, data, folder, on_done, on_fail = self._queue.get()
+            job = self._jobs[job_id]
+            try:
+                if callable(data):
+                    # Deferred preparation (e.g. image processing) runs once, off the request thread
+                    try:
+                        data = data()
+                    except Exception as ex:
+                        self._fail(job, on_fail, str(ex))
+                        continue
+                if isinstance(data, dict):
+                    # Several files (e.g. image variants): each is retried on its own, url is {key: url}
+                    url = {}
+                    for key, item in data.items():
+                        url[key] = self._upload(job, item, folder)
+                        if url[key] is None:
+                            url = None
+                            break
+                else:
+                    url = self._upload(job, data, folder)
+                if url is None:
+                    self._fail(job, on_fail, job["error"])
+                    continue
+                # A job is ready only once its result is recorded; if that fails, it failed
+                try:
+                    if on_done:
+                        on_done(url)
+                except Exception as ex:
+                    print('Upload callback failed:', ex)
+                    self._fail(job, on_fail, f'callback failed: {ex}')
+                    continue
+                job.update(status="ready", url=url, error=None)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+    def wait_idle(self, timeout: float = 10.0) -> bool:
+        """Block until no jobs are pending (for tests and graceful shutdown)."""
+        deadline = time.monotonic() + timeout
+        while self._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._pending
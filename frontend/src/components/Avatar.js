@@ -0,0 +1,17 @@
+import React from 'react';
+
+// Square avatar: the backend's WebP/JPEG variants (avatar_sources srcsets) when present,
+// else avatar_url, else a generated initials image. size is the rendered width in CSS pixels.
+export default function Avatar({ user, name, size, className }) {
+  const sources = user.avatar_url ? (user.avatar_sources || []) : [];
+  const src = user.avatar_url
+    || `https://ui-avatars.com/api/?name=${encodeURIComponent(name)}&background=f59e0b&color=fff&size=${size * 2}&rounded=true`;
+  return (
+    <picture>
+      {sources.map((s) => (
+        <source key={s.type} type={s.type} srcSet={s.srcset} sizes={`${size}px`} />
+      ))}
+      <img src={src} alt={name} width={size} height={size} className={className} decoding="async" />
+    </picture>
+  );
+}
@@ -1,6 +1,7 @@
 import React, { useState } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
+import Avatar from './Avatar';
 // Theme toggle is now handled inside HomePage hero; no need to import here
 
 const Header = () => {
@@ -45,11 +46,7 @@ const Header = () => {
                 <li>
                   <Link to="/profile" className="flex items-center gap-3 px-2 py-1 rounded-md hover:bg-white/10 hover:text-white transition-colors">
                     <span className="hidden sm:inline text-white/90 font-medium">Hi, {user.name || user.email}</span>
-                    <img
-                      src={user.avatar_url || `https://ui-avatars.com/api/?name=${encodeURIComponent(user.name || user.email)}&background=f59e0b&color=fff&size=64&rounded=true`}
-                      alt="avatar"
-                      className="w-8 h-8 rounded-full ring-2 ring-white/40"
-                    />
+                    <Avatar user={user} name={user.name || user.email} size={32} className="w-8 h-8 rounded-full ring-2 ring-white/40" />
                   </Link>
                 </li>
                 <li>
@@ -102,11 +99,7 @@ const Header = () => {
                 <>
                   <li>
                     <Link to="/profile" className="flex items-center gap-2 py-1 rounded-md px-2 hover:bg-white/20 transition-colors text-xs" onClick={() => setOpen(false)}>
-                      <img
-                        src={user.avatar_url || `https://ui-avatars.com/api/?name=${encodeURIComponent(user.name || user.email)}&background=f59e0b&color=fff&size=64&rounded=true`}
-                        alt="avatar"
-                        className="w-6 h-6 rounded-full ring-2 ring-white/40"
-                      />
+                      <Avatar user={user} name={user.name || user.email} size={24} className="w-6 h-6 rounded-full ring-2 ring-white/40" />
                       <span className="font-medium">{user.name || user.email}</span>
                     </Link>
                   </li>
@@ -1,6 +1,9 @@
 import React, { useEffect, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 
+// Matches the listing grid: 1 column, 2 from sm, 3 from lg
+const CARD_SIZES = '(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
 const RestaurantCard = ({ restaurant, imageSrc }) => {
   const navigate = useNavigate();
   const avg = restaurant.avg_rating ?? restaurant.rating;
@@ -15,6 +18,8 @@ const RestaurantCard = ({ restaurant, imageSrc }) => {
   useEffect(() => {
     setImgSrc(imageSrc || restaurant.image || DEFAULT_THUMB);
   }, [imageSrc, restaurant.image]);
+  // Width variants from the backend (AVIF/WebP/JPEG srcsets); dropped once the image falls back
+  const sources = !imageSrc && imgSrc === restaurant.image ? (restaurant.image_sources || []) : [];
 
   return (
     <button
@@ -22,13 +27,19 @@ const RestaurantCard = ({ restaurant, imageSrc }) => {
       className="text-left bg-white dark:bg-[#2f3031] rounded-xl overflow-hidden shadow hover:shadow-md dark:shadow-none ring-1 ring-black/5 dark:ring-[#555] transition-all hover:-translate-y-0.5"
     >
       <div className="relative">
-        <img
-          src={imgSrc}
-          alt={restaurant.name}
-          className="w-full h-48 object-cover bg-slate-100 dark:bg-[#262728]"
-          loading="lazy"
-          onError={() => setImgSrc(DEFAULT_THUMB)}
-        />
+        <picture>
+          {sources.map((s) => (
+            <source key={s.type} type={s.type} srcSet={s.srcset} sizes={CARD_SIZES} />
+          ))}
+          <img
+            src={imgSrc}
+            alt={restaurant.name}
+            className="w-full h-48 object-cover bg-slate-100 dark:bg-[#262728]"
+            loading="lazy"
+            decoding="async"
+            onError={() => setImgSrc(DEFAULT_THUMB)}
+          />
+        </picture>
         <div className="absolute top-2 right-2 bg-black/70 text-white text-sm px-2 py-1 rounded-full">
           ⭐ {avg}{count ? ` (${count})` : ''}
         </div>
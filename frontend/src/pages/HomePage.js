@@ -5,10 +5,15 @@ import RestaurantCard from '../components/RestaurantCard';
 import { useSearchParams } from 'react-router-dom';
 import { useTheme } from '../context/ThemeContext';
 
+const PAGE_SIZE = 24;
+
 const HomePage = () => {
   const { theme, toggleTheme } = useTheme();
   const [searchParams, setSearchParams] = useSearchParams();
   const [restaurants, setRestaurants] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [query, setQuery] = useState(searchParams.get('q') || '');
@@ -26,13 +31,39 @@ const HomePage = () => {
   const filtersRef = useRef(null);
   const sortRef = useRef(null);
 
+  const activeMeats = useMemo(
+    () => Object.entries(types).filter(([, v]) => v).map(([k]) => k.toLowerCase()),
+    [types]
+  );
+  const meatsKey = activeMeats.join(',');
+
+  // Wait for a pause in typing before asking the server for a new result set
+  const [searchTerm, setSearchTerm] = useState(query.trim());
+  useEffect(() => {
+    const timer = setTimeout(() => setSearchTerm(query.trim()), 250);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  // Text search, sorting and meat filtering happen server-side; only the requested page is downloaded
+  const fetchPage = (cursor) => {
+    const params = { limit: PAGE_SIZE, sort: sortBy };
+    if (meatsKey) params.specialty = meatsKey;
+    if (searchTerm) params.q = searchTerm;
+    if (cursor) params.cursor = cursor;
+    return axios.get('/api/restaurants', { params });
+  };
+
   useEffect(() => {
     let isMounted = true;
+    setLoading(true);
+    setError('');
     (async () => {
       try {
-        const res = await axios.get('/api/restaurants');
+        const res = await fetchPage(null);
         if (isMounted) {
-          setRestaurants(res.data || []);
+          setRestaurants(res.data?.items || []);
+          setTotal(res.data?.total || 0);
+          setNextCursor(res.data?.next_cursor || null);
         }
       } catch (e) {
         console.error(e);
@@ -42,7 +73,22 @@ const HomePage = () => {
       }
     })();
     return () => { isMounted = false; };
-  }, []);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [sortBy, meatsKey, searchTerm]);
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetchPage(nextCursor);
+      setRestaurants((prev) => [...prev, ...(res.data?.items || [])]);
+      setNextCursor(res.data?.next_cursor || null);
+    } catch (e) {
+      console.error(e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   // Close dropdowns on outside click or Escape key
   useEffect(() => {
@@ -69,50 +115,6 @@ const HomePage = () => {
     };
   }, []);
 
-  const activeMeats = useMemo(
-    () => Object.entries(types).filter(([, v]) => v).map(([k]) => k.toLowerCase()),
-    [types]
-  );
-
-  const filtered = useMemo(() => restaurants.filter((r) => {
-    const q = query.trim().toLowerCase();
-    const name = (r.name || '').toLowerCase();
-    const city = (r.location || '').toLowerCase();
-    const specialties = Array.isArray(r.specialties) ? r.specialties.join(' ').toLowerCase() : '';
-    const matchesQuery = q === '' || name.includes(q) || city.includes(q) || specialties.includes(q);
-
-    if (activeMeats.length === 0) return matchesQuery;
-    // meat filter: check specialties contain the meat keyword
-    const specArr = Array.isArray(r.specialties) ? r.specialties : [];
-    const specText = specArr.map((s) => String(s).toLowerCase());
-    const meatMatch = activeMeats.some((meat) => specText.some((s) => s.includes(meat)));
-    return matchesQuery && meatMatch;
-  }), [restaurants, query, activeMeats]);
-
-  const sorted = useMemo(() => {
-    const copy = [...filtered];
-    switch (sortBy) {
-      case 'rating_desc':
-        copy.sort((a, b) => (b.avg_rating ?? b.rating ?? 0) - (a.avg_rating ?? a.rating ?? 0));
-        break;
-      case 'rating_asc':
-        copy.sort((a, b) => (a.avg_rating ?? a.rating ?? 0) - (b.avg_rating ?? b.rating ?? 0));
-        break;
-      case 'reviews_desc':
-        copy.sort((a, b) => (b.review_count ?? 0) - (a.review_count ?? 0));
-        break;
-      case 'name_asc':
-        copy.sort((a, b) => (a.name || '').localeCompare(b.name || ''));
-        break;
-      case 'name_desc':
-        copy.sort((a, b) => (b.name || '').localeCompare(a.name || ''));
-        break;
-      default:
-        break;
-    }
-    return copy;
-  }, [filtered, sortBy]);
-
   // Keep URL in sync with query/filters/sort
   useEffect(() => {
     const params = new URLSearchParams();
@@ -269,7 +271,7 @@ const HomePage = () => {
 
         {/* Results meta */}
         {!loading && !error && (
-          <div className="mt-4 text-sm text-slate-600 dark:text-gray-300">Showing {filtered.length} of {restaurants.length} places</div>
+          <div className="mt-4 text-sm text-slate-600 dark:text-gray-300">Showing {restaurants.length} of {total} places</div>
         )}
 
         {loading && (
@@ -280,11 +282,23 @@ const HomePage = () => {
         )}
         {!loading && !error && (
           <div className="mt-6 grid gap-6 sm:grid-cols-2 lg:grid-cols-3">
-            {sorted.map((r) => (
+            {restaurants.map((r) => (
               <RestaurantCard key={r.id} restaurant={r} />
             ))}
           </div>
         )}
+        {!loading && !error && nextCursor && (
+          <div className="mt-8 flex justify-center">
+            <button
+              type="button"
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="px-4 py-2 rounded-md border border-slate-300 text-slate-700 hover:bg-slate-50 dark:border-neutral-600 dark:text-white dark:hover:bg-white/10"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </section>
     </div>
   );
@@ -2,58 +2,40 @@ import React, { useEffect, useMemo, useState } from 'react';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 
-// Use the same source as HomePage: GET /api/restaurants
+// Rankings come from GET /api/leaderboards (ranked on the server per district/type board)
 
 export default function Leaderboards() {
   const [city, setCity] = useState('all');
-  const [meat, setMeat] = useState('all');
-  const [sort, setSort] = useState('score');
-  const [raw, setRaw] = useState([]); // fetched restaurants
+  const [type, setType] = useState('all');
+  const [sort, setSort] = useState('bayesian');
+  const [data, setData] = useState({ items: [], districts: [], types: [] });
 
-  // Load restaurants from the same API as HomePage
   useEffect(() => {
     let mounted = true;
     (async () => {
       try {
-        const res = await axios.get('/api/restaurants');
-        if (mounted) setRaw(res.data || []);
+        const params = { metric: sort, limit: 10 };
+        if (city !== 'all') params.district = city;
+        if (type !== 'all') params.type = type;
+        const res = await axios.get('/api/leaderboards', { params });
+        if (mounted) setData(res.data || { items: [], districts: [], types: [] });
       } catch (e) {
-        if (mounted) setRaw([]);
+        if (mounted) setData((d) => ({ ...d, items: [] }));
       }
     })();
     return () => { mounted = false; };
-  }, []);
+  }, [city, type, sort]);
 
-  // Normalize into the shape Leaderboards expects
-  const SOURCE = useMemo(() => (raw || []).map((r, idx) => ({
+  const list = useMemo(() => (data.items || []).map((r) => ({
     id: r.id,
     name: r.name,
-    city: r.location,            // show the same location string
-    type: r.type,                // e.g., Hyderabadi Cuisine
+    city: r.location,
+    type: r.type,
     avg_rating: r.avg_rating ?? r.rating ?? 0,
     review_count: r.review_count ?? 0,
     image: r.image,
-    // score computed later
-  })), [raw]);
-
-  const list = useMemo(() => {
-    const filtered = SOURCE.filter((r) => (
-      (city === 'all' || r.city.toLowerCase() === city) &&
-      (meat === 'all' || r.type.toLowerCase() === meat)
-    ));
-    // Weighted score: 80% rating, 20% normalized review count
-    const maxReviews = Math.max(1, ...filtered.map((r) => r.review_count));
-    const withScore = filtered.map((r) => ({
-      ...r,
-      score: Math.round(((r.avg_rating / 5) * 0.8 + (r.review_count / maxReviews) * 0.2) * 1000) / 1000,
-    }));
-    const sorted = [...withScore].sort((a, b) => {
-      if (sort === 'reviews') return b.review_count - a.review_count;
-      if (sort === 'rating') return b.avg_rating - a.avg_rating;
-      return b.score - a.score;
-    });
-    return sorted.slice(0, 10);
-  }, [city, meat, sort, SOURCE]);
+    value: r.value,
+  })), [data]);
 
   const Medal = ({ rank }) => {
     const styles = [
@@ -77,21 +59,19 @@ export default function Leaderboards() {
         <div className="bg-white dark:bg-[#2f3031] rounded-xl shadow dark:shadow-none ring-1 ring-slate-200 dark:ring-[#555] p-6">
           <div className="flex flex-wrap items-center gap-3">
             <select className="input-base w-full sm:w-auto" value={city} onChange={(e) => setCity(e.target.value)}>
-              <option value="all">All Cities</option>
-              <option value="kottayam">Kottayam</option>
-              <option value="erattupetta">Erattupetta</option>
-              <option value="pala">Pala</option>
-              <option value="thalayolaparambu">Thalayolaparambu</option>
-              <option value="kuravilangadu">Kuravilangadu</option>
-              <option value="athirampuzha">Athirampuzha</option>
+              <option value="all">All Districts</option>
+              {(data.districts || []).map((d) => (
+                <option key={d} value={d}>{d}</option>
+              ))}
             </select>
-            <select className="input-base w-full sm:w-auto" value={meat} onChange={(e) => setMeat(e.target.value)}>
+            <select className="input-base w-full sm:w-auto" value={type} onChange={(e) => setType(e.target.value)}>
               <option value="all">All Types</option>
-              <option value="chicken">Chicken</option>
-              <option value="mutton">Mutton</option>
-              <option value="beef">Beef</option>
+              {(data.types || []).map((t) => (
+                <option key={t} value={t}>{t}</option>
+              ))}
             </select>
             <select className="input-base w-full sm:w-auto" value={sort} onChange={(e) => setSort(e.target.value)}>
+              <option value="bayesian">Sort: Bayesian average</option>
               <option value="score">Sort: Weighted score</option>
               <option value="rating">Sort: Rating</option>
               <option value="reviews">Sort: Reviews</option>
@@ -114,7 +94,9 @@ export default function Leaderboards() {
                       ⭐ {r.avg_rating.toFixed(1)}
                     </div>
                     <div className="text-slate-500 dark:text-gray-300">{r.review_count} reviews</div>
-                    <div className="ml-auto text-slate-700 dark:text-white font-semibold">Score {r.score.toFixed(3)}</div>
+                    {(sort === 'bayesian' || sort === 'score') && (
+                      <div className="ml-auto text-slate-700 dark:text-white font-semibold">Score {r.value.toFixed(sort === 'score' ? 3 : 2)}</div>
+                    )}
                   </div>
                 </div>
               </div>
@@ -1,30 +1,130 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { Link } from 'react-router-dom';
+import api from '../services/api';
+import { useAuth } from '../context/AuthContext';
 
-const SAMPLE_POLL = {
-  id: 'poll-weekly-kottayam-chicken',
-  title: 'Best Chicken Mandhi in Kottayam (Weekly)',
-  options: [
-    { key: 'khaleef', label: 'Khaleef Mandi' },
-    { key: 'albaike', label: 'Al Baike Mandhi Hub' },
-    { key: 'ajwa', label: 'Ajwa Food Park' },
-  ],
-  // sample votes
-  results: { khaleef: 132, albaike: 87, ajwa: 114 },
-  ends_in: '3 days',
-};
+// Time left until an ISO timestamp, e.g. "3 days" / "5 hours"
+function endsIn(iso) {
+  const ms = new Date(iso).getTime() - Date.now();
+  if (ms <= 0) return 'now';
+  const hours = Math.floor(ms / 3600000);
+  if (hours >= 24) {
+    const days = Math.floor(hours / 24);
+    return `${days} day${days === 1 ? '' : 's'}`;
+  }
+  return hours > 0 ? `${hours} hour${hours === 1 ? '' : 's'}` : 'less than an hour';
+}
 
-export default function Polls() {
+function PollCard({ poll }) {
+  const { user } = useAuth();
   const [selected, setSelected] = useState(null);
-  const [voted, setVoted] = useState(false);
+  const [voted, setVoted] = useState(null); // option key once voted
+  const [results, setResults] = useState({});
+  const [error, setError] = useState('');
+
+  useEffect(() => {
+    let mounted = true;
+    (async () => {
+      try {
+        const [detail, res] = await Promise.all([
+          api.get(`/api/polls/${poll.id}`),
+          api.get(`/api/polls/${poll.id}/results`),
+        ]);
+        if (!mounted) return;
+        if (detail.data?.my_vote) {
+          setVoted(detail.data.my_vote);
+          setSelected(detail.data.my_vote);
+        }
+        setResults(res.data?.results || {});
+      } catch (e) {
+        if (mounted) setResults({});
+      }
+    })();
+    return () => { mounted = false; };
+  }, [poll.id]);
 
   const totals = useMemo(() => {
-    const total = Object.values(SAMPLE_POLL.results).reduce((a, b) => a + b, 0) + (voted && selected ? 1 : 0);
-    const byKey = { ...SAMPLE_POLL.results };
-    if (voted && selected) byKey[selected] = (byKey[selected] || 0) + 1;
-    const perc = Object.fromEntries(Object.entries(byKey).map(([k, v]) => [k, Math.round((v / total) * 100)]));
+    const byKey = { ...results };
+    const total = Object.values(byKey).reduce((a, b) => a + b, 0);
+    const perc = Object.fromEntries(Object.entries(byKey).map(([k, v]) => [k, total ? Math.round((v / total) * 100) : 0]));
     return { total, byKey, perc };
-  }, [selected, voted]);
+  }, [results]);
+
+  const submit = async () => {
+    setError('');
+    try {
+      await api.post(`/api/polls/${poll.id}/vote`, { option: selected });
+      setVoted(selected);
+      // Results are a periodic snapshot; count our own vote right away
+      setResults((r) => ({ ...r, [selected]: (r[selected] || 0) + 1 }));
+    } catch (e) {
+      setError(e.response?.data?.error || 'Could not submit your vote');
+    }
+  };
+
+  return (
+    <div className="bg-white dark:bg-[#2f3031] rounded-xl shadow dark:shadow-none ring-1 ring-slate-200 dark:ring-[#555] p-6">
+      <div className="flex items-start justify-between gap-4">
+        <div>
+          <div className="text-xl font-bold text-slate-800 dark:text-white">{poll.title}</div>
+          <div className="text-slate-500 dark:text-gray-300 text-sm mt-1">Ends in {endsIn(poll.ends_at)}</div>
+        </div>
+        <div className="text-xs text-slate-500 dark:text-gray-300">{totals.total} votes</div>
+      </div>
+
+      <div className="mt-6 grid gap-3">
+        {poll.options.map((opt) => (
+          <button
+            key={opt.key}
+            onClick={() => setSelected(opt.key)}
+            className={`text-left p-3 rounded-lg border transition relative overflow-hidden ${selected === opt.key ? 'border-amber-300 bg-amber-50 dark:border-amber-400 dark:bg-amber-500/15' : 'border-slate-200 hover:bg-slate-50 dark:border-[#555] dark:hover:bg-white/10'}`}
+            disabled={!!voted}
+          >
+            <div className="flex items-center justify-between">
+              <span className="font-medium text-slate-800 dark:text-white">{opt.label}</span>
+              <span className="text-sm text-slate-500 dark:text-gray-300">{totals.perc[opt.key] || 0}%</span>
+            </div>
+            <div className="mt-2 h-2 bg-slate-200 dark:bg-[#4a4b4c] rounded-full">
+              <div className="h-2 bg-amber-500 rounded-full" style={{ width: `${totals.perc[opt.key] || 0}%` }} />
+            </div>
+          </button>
+        ))}
+      </div>
+
+      <div className="mt-4 flex items-center gap-3">
+        {voted ? (
+          <div className="text-amber-700 dark:text-amber-300 text-sm font-medium">Thanks for voting! Results refresh every few seconds.</div>
+        ) : user ? (
+          <button className="btn-primary" disabled={!selected} onClick={submit}>
+            Submit vote
+          </button>
+        ) : (
+          <Link to="/login" className="text-amber-600 hover:text-amber-700 font-medium text-sm">Log in to vote</Link>
+        )}
+        {error && <div className="text-xs text-red-600">{error}</div>}
+      </div>
+    </div>
+  );
+}
+
+export default function Polls() {
+  const [polls, setPolls] = useState([]);
+  const [loading, setLoading] = useState(true);
+
+  useEffect(() => {
+    let mounted = true;
+    (async () => {
+      try {
+        const res = await api.get('/api/polls');
+        if (mounted) setPolls(res.data || []);
+      } catch (e) {
+        if (mounted) setPolls([]);
+      } finally {
+        if (mounted) setLoading(false);
+      }
+    })();
+    return () => { mounted = false; };
+  }, []);
 
   return (
     <div>
@@ -34,53 +134,16 @@ export default function Polls() {
           <p className="mt-1.5 text-white/90 max-w-2xl">Vote on the best Mandhi by city or type. No login required to view results.</p>
         </div>
       </section>
-      <section className="container-app py-10">
-        <div className="bg-white dark:bg-[#2f3031] rounded-xl shadow dark:shadow-none ring-1 ring-slate-200 dark:ring-[#555] p-6">
-          <div className="flex items-start justify-between gap-4">
-            <div>
-              <div className="text-xl font-bold text-slate-800 dark:text-white">{SAMPLE_POLL.title}</div>
-              <div className="text-slate-500 dark:text-gray-300 text-sm mt-1">Ends in {SAMPLE_POLL.ends_in}</div>
-            </div>
-            <div className="text-xs text-slate-500 dark:text-gray-300">{totals.total} votes</div>
-          </div>
-
-          <div className="mt-6 grid gap-3">
-            {SAMPLE_POLL.options.map((opt) => (
-              <button
-                key={opt.key}
-                onClick={() => setSelected(opt.key)}
-                className={`text-left p-3 rounded-lg border transition relative overflow-hidden ${selected === opt.key ? 'border-amber-300 bg-amber-50 dark:border-amber-400 dark:bg-amber-500/15' : 'border-slate-200 hover:bg-slate-50 dark:border-[#555] dark:hover:bg-white/10'}`}
-                disabled={voted}
-              >
-                <div className="flex items-center justify-between">
-                  <span className="font-medium text-slate-800 dark:text-white">{opt.label}</span>
-                  <span className="text-sm text-slate-500 dark:text-gray-300">{totals.perc[opt.key] || 0}%</span>
-                </div>
-                <div className="mt-2 h-2 bg-slate-200 dark:bg-[#4a4b4c] rounded-full">
-                  <div className="h-2 bg-amber-500 rounded-full" style={{ width: `${totals.perc[opt.key] || 0}%` }} />
-                </div>
-              </button>
-            ))}
-          </div>
-
-          <div className="mt-4 flex items-center gap-3">
-            {!voted ? (
-              <button
-                className="btn-primary"
-                disabled={!selected}
-                onClick={() => setVoted(true)}
-              >
-                Submit vote
-              </button>
-            ) : (
-              <div className="text-amber-700 dark:text-amber-300 text-sm font-medium">Thanks for voting! Results updated.</div>
-            )}
-            <div className="text-xs text-slate-500 dark:text-gray-300">Sample data for demo purposes</div>
-          </div>
-
-          <div className="mt-6">
-            <Link to="/" className="text-amber-600 hover:text-amber-700 font-medium">← Back to Home</Link>
-          </div>
+      <section className="container-app py-10 grid gap-6">
+        {loading && <div className="text-slate-500 dark:text-gray-300">Loading polls…</div>}
+        {!loading && polls.length === 0 && (
+          <div className="text-slate-500 dark:text-gray-300">No polls are open this week.</div>
+        )}
+        {polls.map((poll) => (
+          <PollCard key={poll.id} poll={poll} />
+        ))}
+        <div>
+          <Link to="/" className="text-amber-600 hover:text-amber-700 font-medium">← Back to Home</Link>
         </div>
       </section>
     </div>
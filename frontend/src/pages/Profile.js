@@ -1,12 +1,13 @@
 import React, { useEffect, useRef, useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { waitForUpload } from '../services/api';
+import Avatar from '../components/Avatar';
 import AvatarCropper from '../components/AvatarCropper';
 
 export default function Profile() {
   const navigate = useNavigate();
-  const { user, logout, setUser } = useAuth();
+  const { user, token, logout, setUser } = useAuth();
   const [editingName, setEditingName] = useState(false);
   const [name, setName] = useState(() => user?.name || '');
   const [saving, setSaving] = useState(false);
@@ -15,6 +16,7 @@ export default function Profile() {
   const [preview, setPreview] = useState('');
   const fileInputRef = useRef(null);
   const [userReviews, setUserReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [savedRestaurants, setSavedRestaurants] = useState([]);
 
   const handleLogout = async () => {
@@ -27,9 +29,11 @@ export default function Profile() {
     // Load user reviews
     (async () => {
       try {
-        if (!user?.id) return;
-        const res = await api.get(`/api/accounts/${user.id}/reviews`);
-        setUserReviews(res.data || []);
+        // Timeline of the signed-in identity, one page at a time
+        if (!token) return;
+        const res = await api.get('/api/me/reviews', { params: { limit: 10 } });
+        setUserReviews(res.data?.items || []);
+        setReviewsCursor(res.data?.next_cursor || null);
       } catch (e) {
         // ignore
       }
@@ -40,14 +44,24 @@ export default function Profile() {
         const key = `bm_saved_${user?.id}`;
         const ids = JSON.parse(localStorage.getItem(key) || '[]');
         if (!Array.isArray(ids) || ids.length === 0) { setSavedRestaurants([]); return; }
-        const all = await api.get('/api/restaurants');
-        const list = (all.data || []).filter((r) => ids.includes(r.id));
-        setSavedRestaurants(list);
+        // Bulk lookup of just the saved ids (server caps a request at 100 ids)
+        const res = await api.get('/api/restaurants', { params: { ids: ids.slice(0, 100).join(',') } });
+        setSavedRestaurants(res.data?.items || []);
       } catch (e) {
         setSavedRestaurants([]);
       }
     })();
-  }, [user?.id]);
+  }, [user?.id, token]);
+
+  const loadMoreReviews = async () => {
+    try {
+      const res = await api.get('/api/me/reviews', { params: { limit: 10, cursor: reviewsCursor } });
+      setUserReviews((r) => [...r, ...(res.data?.items || [])]);
+      setReviewsCursor(res.data?.next_cursor || null);
+    } catch (e) {
+      // ignore
+    }
+  };
 
   if (!user) {
     return (
@@ -66,7 +80,6 @@ export default function Profile() {
   }
 
   const displayName = user.name || 'User';
-  const avatar = user.avatar_url || `https://ui-avatars.com/api/?name=${encodeURIComponent(displayName)}&background=f59e0b&color=fff&size=256&rounded=true`;
 
   const onPickPhoto = () => fileInputRef.current?.click();
   const onFileChange = (e) => {
@@ -97,10 +110,17 @@ export default function Profile() {
       const form = new FormData();
       form.append('avatar', new File([blob], 'avatar.jpg', { type: 'image/jpeg' }));
       const res = await api.patch(`/api/accounts/${user.id}`, form, { headers: { 'Content-Type': 'multipart/form-data' } });
-      setUser(res.data);
+      const { avatar_upload: upload, ...account } = res.data;
+      setUser(account);
       setCropOpen(false);
       setPreview('');
-      // done
+      // The avatar uploads in the background; swap it in once ready
+      if (upload?.job_id) {
+        const job = await waitForUpload(upload.job_id);
+        // Reload the account: the job's url lists every variant, the account has avatar_url and avatar_sources
+        if (job.status === 'ready') setUser((await api.get(`/api/accounts/${user.id}`)).data);
+        else setError('Photo upload failed. Please try again.');
+      }
     } catch (err) {
       setError(err?.response?.data?.error || 'Failed to update photo');
     } finally {
@@ -114,7 +134,7 @@ export default function Profile() {
         <div className="md:col-span-1">
           <div className="bg-white dark:bg-[#2f3031] rounded-xl shadow dark:shadow-none ring-1 ring-slate-200 dark:ring-[#555] p-6 text-center">
             <div className="relative w-32 h-32 mx-auto">
-              <img src={avatar} alt={displayName} className="w-32 h-32 rounded-full mx-auto ring-2 ring-amber-300 object-cover" />
+              <Avatar user={user} name={displayName} size={128} className="w-32 h-32 rounded-full mx-auto ring-2 ring-amber-300 object-cover" />
               <button
                 onClick={onPickPhoto}
                 className="absolute bottom-0 right-0 bg-amber-600 text-white rounded-full p-2 shadow hover:bg-amber-700"
@@ -162,13 +182,16 @@ export default function Profile() {
                 {userReviews.map((rv) => (
                   <div key={rv.id} className="border border-slate-200 dark:border-[#555] rounded-lg p-3">
                     <div className="flex items-center justify-between">
-                      <div className="font-medium text-slate-800 dark:text-white">{rv.restaurant_id ? `#${rv.restaurant_id}` : 'Restaurant'}</div>
+                      <div className="font-medium text-slate-800 dark:text-white">{rv.restaurant_name || (rv.restaurant_id ? `#${rv.restaurant_id}` : 'Restaurant')}</div>
                       <div className="text-sm dark:text-gray-200">⭐ {rv.rating}</div>
                     </div>
                     {rv.comment && <div className="text-slate-700 dark:text-gray-200 text-sm mt-1">{rv.comment}</div>}
                     <div className="text-xs text-slate-400 dark:text-gray-400 mt-1">{new Date(rv.created_at).toLocaleString()}</div>
                   </div>
                 ))}
+                {reviewsCursor && (
+                  <button onClick={loadMoreReviews} className="text-amber-600 hover:text-amber-700 font-medium text-sm">Load more</button>
+                )}
               </div>
             )}
           </div>
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
-import api from '../services/api';
+import api, { waitForUpload, subscribeToStream } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 import StarRating from '../components/StarRating';
 import GoogleLoginButton from '../components/GoogleLoginButton';
@@ -19,6 +19,8 @@ const RestaurantDetail = () => {
   const [formComment, setFormComment] = useState('');
   const [showLoginPrompt, setShowLoginPrompt] = useState(false);
   const [photos, setPhotos] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [files, setFiles] = useState([]); // File[]
   const [previews, setPreviews] = useState([]); // object URLs
   const [saved, setSaved] = useState(false);
@@ -27,12 +29,13 @@ const RestaurantDetail = () => {
     let isMounted = true;
     (async () => {
       try {
-        const res = await axios.get(`/api/restaurants/${id}`);
-        if (isMounted) setRestaurant(res.data);
-        const rv = await axios.get(`/api/restaurants/${id}/reviews`);
-        if (isMounted) setReviews(rv.data || []);
-        const ph = await axios.get(`/api/restaurants/${id}/photos`);
-        if (isMounted) setPhotos(ph.data || []);
+        // One round trip: restaurant, first page of reviews (photos embedded) and the gallery
+        const res = await axios.get(`/api/restaurants/${id}/detail`);
+        if (!isMounted) return;
+        setRestaurant(res.data.restaurant);
+        setReviews(res.data.reviews?.items || []);
+        setReviewsCursor(res.data.reviews?.next_cursor || null);
+        setPhotos(res.data.photos?.items || []);
       } catch (e) {
         console.error(e);
         if (isMounted) setError('Restaurant not found.');
@@ -43,6 +46,36 @@ const RestaurantDetail = () => {
     return () => { isMounted = false; };
   }, [id]);
 
+  // Live updates: reviews (with the new average) and photos posted by anyone while the page is open
+  useEffect(() => {
+    const addPhoto = (list, photo) => (list.some((p) => p.id === photo.id) ? list : [photo, ...list]);
+    return subscribeToStream({ restaurant_id: id }, {
+      review: (event) => {
+        setReviews((rs) => (rs.some((rv) => rv.id === event.review.id) ? rs : [{ ...event.review, photos: [] }, ...rs]));
+        setRestaurant((r) => (r ? { ...r, avg_rating: event.avg_rating, review_count: event.review_count } : r));
+      },
+      photo: (event) => {
+        const photo = { ...event.photo, review_id: event.review_id, status: 'ready' };
+        setPhotos((ps) => addPhoto(ps, photo));
+        setReviews((rs) => rs.map((rv) => (rv.id === event.review_id ? { ...rv, photos: addPhoto(rv.photos || [], photo) } : rv)));
+      },
+    });
+  }, [id]);
+
+  const loadMoreReviews = async () => {
+    if (!reviewsCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await axios.get(`/api/restaurants/${id}/reviews`, { params: { limit: 10, cursor: reviewsCursor } });
+      setReviews((r) => [...r, ...(res.data?.items || [])]);
+      setReviewsCursor(res.data?.next_cursor || null);
+    } catch (e) {
+      console.error(e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     // Check saved state for this restaurant for current user
     try {
@@ -200,10 +233,18 @@ const RestaurantDetail = () => {
                       comment: formComment,
                     });
                   }
-                  setReviews((r) => [res.data, ...r]);
-                  if (res.data?.photos?.length) {
-                    setPhotos((p) => [...res.data.photos, ...p]);
-                  }
+                  // The live feed may have delivered this review already
+                  setReviews((r) => [{ ...res.data, photos: [] }, ...r.filter((rv) => rv.id !== res.data.id)]);
+                  // Photos upload in the background; show each one once it is ready
+                  (res.data?.photos || []).forEach(async (photo) => {
+                    const job = await waitForUpload(photo.job_id);
+                    if (job.status !== 'ready') return;
+                    const ready = { ...photo, url: job.url, status: 'ready' };
+                    setPhotos((p) => [ready, ...p.filter((x) => x.id !== ready.id)]);
+                    setReviews((rs) => rs.map((rv) => (rv.id === res.data.id
+                      ? { ...rv, photos: [...(rv.photos || []).filter((x) => x.id !== ready.id), ready] }
+                      : rv)));
+                  });
                   setFormRating(5);
                   setFormComment('');
                   setFiles([]);
@@ -288,10 +329,24 @@ const RestaurantDetail = () => {
                     <StarRating value={rv.rating} readOnly small />
                   </div>
                   {rv.comment && <p className="text-slate-700 dark:text-gray-200 mt-2">{rv.comment}</p>}
+                  {rv.photos?.length > 0 && (
+                    <div className="mt-3 flex flex-wrap gap-2">
+                      {rv.photos.map((p) => (
+                        <a key={p.id} href={p.url} target="_blank" rel="noreferrer">
+                          <img src={p.url} alt="review" loading="lazy" className="w-20 h-20 object-cover rounded-md ring-1 ring-slate-200 dark:ring-[#555]" />
+                        </a>
+                      ))}
+                    </div>
+                  )}
                   <div className="text-xs text-slate-400 dark:text-gray-400 mt-2">{new Date(rv.created_at).toLocaleString()}</div>
                 </div>
               ))
             )}
+            {reviewsCursor && (
+              <button onClick={loadMoreReviews} disabled={loadingMore} className="px-4 py-2 rounded-md border border-slate-300 text-slate-700 hover:bg-slate-50 dark:border-[#555] dark:text-white dark:hover:bg-white/10">
+                {loadingMore ? 'Loading...' : 'Load more reviews'}
+              </button>
+            )}
           </div>
         </div>
       </section>
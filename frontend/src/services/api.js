@@ -14,4 +14,37 @@ api.interceptors.request.use((config) => {
   return config;
 });
 
+// Poll a background upload job until it is ready or failed; resolves with the final job status
+export async function waitForUpload(jobId, { intervalMs = 1000, maxTries = 60 } = {}) {
+  for (let i = 0; i < maxTries; i += 1) {
+    // eslint-disable-next-line no-await-in-loop
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    try {
+      // eslint-disable-next-line no-await-in-loop
+      const res = await api.get(`/api/uploads/${jobId}`);
+      if (res.data?.status !== 'pending') return res.data;
+    } catch (e) {
+      return { status: 'failed' };
+    }
+  }
+  return { status: 'pending' };
+}
+
+// Live change feed (Server-Sent Events): handlers keyed by event type (review, photo, poll).
+// EventSource reconnects on its own. Returns a function that closes the stream.
+export function subscribeToStream(params, handlers) {
+  if (typeof window === 'undefined' || !window.EventSource) return () => {};
+  const source = new EventSource(`/api/stream?${new URLSearchParams(params).toString()}`);
+  Object.entries(handlers).forEach(([type, handler]) => {
+    source.addEventListener(type, (e) => {
+      try {
+        handler(JSON.parse(e.data));
+      } catch (err) {
+        console.error(err);
+      }
+    });
+  });
+  return () => source.close();
+}
+
 export default api;